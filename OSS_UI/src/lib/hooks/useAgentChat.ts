@@ -37,12 +37,41 @@ const generateUniqueId = (prefix: string): string => {
   return `${prefix}-${timestamp}-${randomSuffix}`;
 };
 
+// Background tool jobs (see /api/jobs/{job_id})
+const FINAL_JOB_STATUSES = ['completed', 'failed', 'cancelled', 'interrupted'];
+const JOB_POLL_INTERVAL = 3000;
+
+interface ToolJob {
+  job_id: string;
+  status: string;
+  error?: string | null;
+  finished_at?: string | null;
+  result?: { summary?: string; conclusion?: string } | null;
+}
+
+// Same answer as the server adds to the chat when a tool job finishes
+const toolJobAnswer = (job: ToolJob): string => {
+  if (job.status === 'cancelled') return 'Analysis cancelled.';
+  if (job.status === 'interrupted') return 'Analysis interrupted, the server was stopped.';
+  if (job.status === 'failed') return `Analysis failed: ${job.error || 'Unknown error'}`;
+  return job.result?.summary || job.result?.conclusion || 'Analysis completed.';
+};
+
 export function useAgentChat(chatId: string, initialHistory: AgentMessage[] = []) {
   const [messages, setMessages] = useState<AgentMessage[]>(initialHistory);
   const [isLoading, setIsLoading] = useState(false);
   const [currentChatId, setCurrentChatId] = useState(chatId);
   const wsRef = useRef<WebSocket | null>(null);
   const fallbackTimerRef = useRef<NodeJS.Timeout | null>(null);
+  // Queued tool jobs whose answer has not arrived yet
+  const pendingJobsRef = useRef<Set<string>>(new Set());
+
+  const clearFallbackTimer = () => {
+    if (fallbackTimerRef.current) {
+      clearTimeout(fallbackTimerRef.current);
+      fallbackTimerRef.current = null;
+    }
+  };
 
   // WebSocket connection for real-time AI responses
   useEffect(() => {
@@ -61,17 +90,56 @@ export function useAgentChat(chatId: string, initialHistory: AgentMessage[] = []
     ws.onmessage = (event) => {
       console.log('📨 Raw WebSocket message:', event.data);
       
-      if (fallbackTimerRef.current) {
-        clearTimeout(fallbackTimerRef.current);
-        fallbackTimerRef.current = null;
-      }
-      
       try {
         const data = JSON.parse(event.data);
         console.log('📩 Parsed WebSocket data:', data);
 
-        if (data.type === 'message_processed') {
+        // Only the frames of the answer stop the HTTP fallback
+        if (['message_start', 'message_delta', 'message_end', 'message_processed'].includes(data.type)) {
+          clearFallbackTimer();
+        }
+
+        if (data.type === 'message_start') {
+          // Streamed answer: an empty assistant message that the deltas fill in
+          const streamedMessage: AgentMessage = {
+            id: data.message_id,
+            role: 'assistant',
+            content: '',
+            timestamp: data.timestamp || new Date().toISOString()
+          };
+          setMessages(prev => [...prev, streamedMessage]);
+
+        } else if (data.type === 'message_delta') {
+          setMessages(prev => prev.map(msg =>
+            msg.id === data.message_id ? { ...msg, content: msg.content + data.delta } : msg
+          ));
+
+        } else if (data.type === 'message_end') {
+          if (data.message) {
+            // The persisted message replaces the streamed text
+            setMessages(prev => prev.map(msg =>
+              msg.id === data.message_id ? { ...msg, content: data.message.content } : msg
+            ));
+            setIsLoading(false);
+          } else {
+            // Failed stream or tool call: the message is not in the chat history
+            setMessages(prev => prev.filter(msg => msg.id !== data.message_id));
+          }
+
+        } else if (data.type === 'message_processed' && data.result?.streamed) {
+          // Already rendered from the delta frames
+          setIsLoading(false);
+
+        } else if (data.type === 'tool_job_update') {
+          console.log(`🛠️ Tool job ${data.job?.job_id}: ${data.job?.status}`);
+
+        } else if (data.type === 'message_processed') {
           console.log('🎯 Processing AI response...');
+
+          // The answer of a tool job: stop polling it
+          if (data.result?.agent_metadata?.job_id) {
+            pendingJobsRef.current.delete(data.result.agent_metadata.job_id);
+          }
           
           let content = '';
           
@@ -129,9 +197,40 @@ export function useAgentChat(chatId: string, initialHistory: AgentMessage[] = []
       if (fallbackTimerRef.current) {
         clearTimeout(fallbackTimerRef.current);
       }
+      pendingJobsRef.current.clear();
     };
   }, [currentChatId]);
 
+  // HTTP fallback of a queued tool job: poll its state until it finished
+  const pollToolJob = useCallback((jobId: string) => {
+    pendingJobsRef.current.add(jobId);
+
+    const poll = async () => {
+      if (!pendingJobsRef.current.has(jobId)) return;
+      try {
+        const response = await fetch(`${API_BASE}/api/jobs/${encodeURIComponent(jobId)}`);
+        if (response.ok) {
+          const job: ToolJob = await response.json();
+          if (FINAL_JOB_STATUSES.includes(job.status)) {
+            // The WebSocket may have delivered the answer meanwhile
+            if (!pendingJobsRef.current.delete(jobId)) return;
+            setMessages(prev => [...prev, {
+              id: generateUniqueId('job'),
+              role: 'assistant',
+              content: toolJobAnswer(job),
+              timestamp: job.finished_at || new Date().toISOString()
+            }]);
+            return;
+          }
+        }
+      } catch (error) {
+        console.error('❌ Failed to get tool job state:', error);
+      }
+      setTimeout(poll, JOB_POLL_INTERVAL);
+    };
+    setTimeout(poll, JOB_POLL_INTERVAL);
+  }, []);
+
   // Update messages when initialHistory changes
   useEffect(() => {
     if (initialHistory.length > 0) {
@@ -319,8 +418,10 @@ export function useAgentChat(chatId: string, initialHistory: AgentMessage[] = []
             fallbackContent = data.message;
           } else if (data.response_type === 'text' && data.message) {
             fallbackContent = data.message;
-          } else if (data.response_type === 'tool_call' && data.agent_result) {
-            fallbackContent = data.agent_result;
+          } else if (data.response_type === 'tool_call_queued') {
+            // The answer follows when the background job finished
+            fallbackContent = data.tool_call;
+            pollToolJob(data.job_id);
           } else {
             fallbackContent = 'Response received successfully';
           }
@@ -346,7 +447,7 @@ export function useAgentChat(chatId: string, initialHistory: AgentMessage[] = []
       // Remove user message on error
       setMessages(prev => prev.filter(msg => msg.id !== userMessage.id));
     }
-  }, [currentChatId, isLoading, getCurrentSessionFilePaths]);
+  }, [currentChatId, isLoading, getCurrentSessionFilePaths, pollToolJob]);
 
   return {
     messages,
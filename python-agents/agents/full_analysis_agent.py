@@ -3,11 +3,14 @@ import uuid
 import asyncio
 from datetime import datetime, timezone
 from pathlib import Path
-from groq import Groq
+from groq import AsyncGroq
 
-from config import CHAT_DIR
+from config import CHAT_DIR, AGENT_STEP_SUMMARY_CHARS
+from core.llm_client import llm_client
 from core.settings_manager import settings_manager
+from core.tool_jobs import report_progress
 from tools.definitions import FULLY_CONTROLLED_INSTRUCTIONS
+from utils.agent_context import AgentContextWindow, estimate_tokens
 from utils.notebook_executor import NotebookExecutor
 
 class FullAnalysisAgent:
@@ -15,12 +18,9 @@ class FullAnalysisAgent:
         self.agent_id = "full_analysis_agent"
         self.notebook_executor = NotebookExecutor()
 
-    def _get_client(self) -> Groq:
-        """Get Groq client with current dynamic settings"""
-        api_key = settings_manager.get("api_key")
-        if not settings_manager.is_valid_api_key(api_key):
-            raise ValueError("Invalid or missing API key")
-        return Groq(api_key=api_key)
+    async def _get_client(self) -> AsyncGroq:
+        """Get the shared AsyncGroq client with current dynamic settings"""
+        return await llm_client.get_client()
 
     def _fix_path(self, path: str) -> str:
         """Convert path to absolute path"""
@@ -60,6 +60,7 @@ class FullAnalysisAgent:
             temp_file.replace(conv_file)
 
             print(f"[AGENT] Checkpoint saved - Status: {status}, Cells: {cell_count}")
+            report_progress(status=status, cells_executed=cell_count, notebook_path=str(notebook_path))
 
         except Exception as e:
             print(f"[AGENT] Error saving checkpoint: {e}")
@@ -78,6 +79,14 @@ class FullAnalysisAgent:
 """
         return base_reminder + feedback
 
+    def _step_summary(self, label: str, source: str, feedback: str) -> str:
+        """One line describing a completed step for the rolling context summary"""
+        first_line = next((line.strip() for line in str(source).splitlines() if line.strip()), "")
+        summary = f"{label}: {first_line} -> {' '.join(feedback.split())}"
+        if len(summary) > AGENT_STEP_SUMMARY_CHARS:
+            summary = summary[:AGENT_STEP_SUMMARY_CHARS - 3] + "..."
+        return summary
+
     async def process(self, tool_call: dict, parent_id=None) -> dict:
         """Main processing method for full dataset analysis"""
         session_id = uuid.uuid4().hex[:8]
@@ -111,13 +120,15 @@ class FullAnalysisAgent:
             return {"error": f"Notebook creation failed: {e}", "status": "failed"}
 
         # Initialize conversation with enhanced system instructions
+        task = f"Analyze dataset at {file_path}\nTasks: {tasks}\nInstructions: {instructions}"
         agent_flow = [
             {"role": "system", "content": FULLY_CONTROLLED_INSTRUCTIONS},
-            {"role": "user", "content": self._create_critical_reminder() +
-                f"Analyze dataset at {file_path}\nTasks: {tasks}\nInstructions: {instructions}"}
+            {"role": "user", "content": self._create_critical_reminder() + task}
         ]
 
-        messages = agent_flow.copy()
+        # agent_flow keeps the whole conversation for the UI, the LLM gets a compacted context
+        context = AgentContextWindow(FULLY_CONTROLLED_INSTRUCTIONS, task, reminder=self._create_critical_reminder())
+        token_usage = {"prompt_tokens": 0, "completion_tokens": 0}
 
         # Initialize counters and status
         cell_count = 0
@@ -130,6 +141,8 @@ class FullAnalysisAgent:
         self._save_conversation_checkpoint(conv_file, agent_flow, tool_call, parent_id,
                                          session_id, notebook_path, cell_count, "started")
 
+        # The kernel keeps the variables of the analysis between the LLM steps
+        self.notebook_executor.pin_kernel(str(notebook_path))
         try:
             while not done and step_count < max_steps:
                 step_count += 1
@@ -137,11 +150,13 @@ class FullAnalysisAgent:
 
                 try:
                     # Get client and model config dynamically
-                    client = self._get_client()
+                    client = await self._get_client()
                     model_config = settings_manager.get_model_config()
 
+                    messages = context.build()
+
                     # Call Groq API with current dynamic settings
-                    response = client.chat.completions.create(
+                    response = await client.chat.completions.create(
                         model=model_config["model"],
                         messages=messages,
                         max_tokens=20000,  # Reduced to prevent overly long responses
@@ -152,6 +167,15 @@ class FullAnalysisAgent:
 
                     content = self._extract_content(response)
 
+                    usage = getattr(response, "usage", None)
+                    prompt_tokens = getattr(usage, "prompt_tokens", None) or estimate_tokens(messages)
+                    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+                    token_usage["prompt_tokens"] += prompt_tokens
+                    token_usage["completion_tokens"] += completion_tokens
+                    print(f"[AGENT] Step {step_count} tokens: prompt {prompt_tokens} ({len(messages)} messages), "
+                          f"completion {completion_tokens}, session total "
+                          f"{token_usage['prompt_tokens'] + token_usage['completion_tokens']}")
+
                     if not content:
                         print("[AGENT] No content received, breaking loop")
                         break
@@ -161,7 +185,7 @@ class FullAnalysisAgent:
                     # Add AI response to conversation flows
                     ai_message = {"role": "assistant", "content": content}
                     agent_flow.append(ai_message)
-                    messages.append(ai_message)
+                    context.add_assistant(content)
 
                     # Save checkpoint after AI response
                     self._save_conversation_checkpoint(conv_file, agent_flow, tool_call, parent_id,
@@ -186,10 +210,10 @@ class FullAnalysisAgent:
                                                                 f"### Malformed Response\n``````")
 
                         # Send recovery message
-                        user_message = {"role": "user", "content": self._create_critical_reminder(
-                            "Previous response was malformed. Please provide valid JSON with ONE key only.")}
+                        feedback = "Previous response was malformed. Please provide valid JSON with ONE key only."
+                        user_message = {"role": "user", "content": self._create_critical_reminder(feedback)}
                         agent_flow.append(user_message)
-                        messages.append(user_message)
+                        context.add_feedback(feedback, f"Step {step_count}: malformed response ({e})")
                         continue
 
                     # Process different response types
@@ -241,7 +265,7 @@ class FullAnalysisAgent:
                             # Continue conversation with execution feedback
                             user_message = {"role": "user", "content": self._create_critical_reminder(feedback)}
                             agent_flow.append(user_message)
-                            messages.append(user_message)
+                            context.add_feedback(feedback, self._step_summary(f"Cell {cell_count} (python)", code, feedback))
 
                         elif key == "markdown":
                             markdown_text = parsed["markdown"]
@@ -249,10 +273,10 @@ class FullAnalysisAgent:
                             print(f"[AGENT] Added markdown cell")
 
                             # Continue conversation
-                            user_message = {"role": "user", "content": self._create_critical_reminder(
-                                "Continue with next step")}
+                            feedback = "Continue with next step"
+                            user_message = {"role": "user", "content": self._create_critical_reminder(feedback)}
                             agent_flow.append(user_message)
-                            messages.append(user_message)
+                            context.add_feedback(feedback, self._step_summary("Markdown", markdown_text, "added"))
 
                         elif key == "visualization":
                             cell_count += 1
@@ -278,7 +302,8 @@ class FullAnalysisAgent:
                             # Continue conversation
                             user_message = {"role": "user", "content": self._create_critical_reminder(feedback)}
                             agent_flow.append(user_message)
-                            messages.append(user_message)
+                            context.add_feedback(feedback, self._step_summary(f"Cell {cell_count} (visualization)",
+                                                                              vis_code, feedback))
 
                         else:
                             # Unknown key - treat as markdown but warn
@@ -286,10 +311,10 @@ class FullAnalysisAgent:
                             self.notebook_executor.add_markdown_cell(str(notebook_path),
                                                                     f"### Unknown Response Type\n``````")
 
-                            user_message = {"role": "user", "content": self._create_critical_reminder(
-                                f"Unknown key '{key}'. Use only: python, markdown, visualization, conclusion")}
+                            feedback = f"Unknown key '{key}'. Use only: python, markdown, visualization, conclusion"
+                            user_message = {"role": "user", "content": self._create_critical_reminder(feedback)}
                             agent_flow.append(user_message)
-                            messages.append(user_message)
+                            context.add_feedback(feedback, f"Step {step_count}: unknown key '{key}'")
 
                     # Save checkpoint after processing step
                     self._save_conversation_checkpoint(conv_file, agent_flow, tool_call, parent_id,
@@ -302,10 +327,10 @@ class FullAnalysisAgent:
                                                             f"### Error in Step {step_count}\n``````")
 
                     # Try to recover
-                    user_message = {"role": "user", "content": self._create_critical_reminder(
-                        f"Error occurred: {step_error}. Please continue with next step.")}
+                    feedback = f"Error occurred: {step_error}. Please continue with next step."
+                    user_message = {"role": "user", "content": self._create_critical_reminder(feedback)}
                     agent_flow.append(user_message)
-                    messages.append(user_message)
+                    context.add_feedback(feedback, self._step_summary(f"Step {step_count}", "error", str(step_error)))
 
                     # Save error checkpoint
                     self._save_conversation_checkpoint(conv_file, agent_flow, tool_call, parent_id,
@@ -315,6 +340,8 @@ class FullAnalysisAgent:
             print(f"[AGENT] Critical error in main loop: {e}")
             final_conclusion = f"Analysis failed due to critical error: {e}"
             done = True
+        finally:
+            await self.notebook_executor.unpin_kernel(str(notebook_path))
 
         # Determine final status
         if step_count >= max_steps:
@@ -340,7 +367,8 @@ class FullAnalysisAgent:
             "conclusion": final_conclusion,
             "status": status,
             "cells_executed": cell_count,
-            "steps_processed": step_count
+            "steps_processed": step_count,
+            "token_usage": token_usage
         }
 
         try:
@@ -349,11 +377,7 @@ class FullAnalysisAgent:
         except Exception as save_error:
             print(f"[AGENT] Error saving final conversation: {save_error}")
 
-        # Clean up notebook executor
-        try:
-            self.notebook_executor.shutdown()
-        except Exception as cleanup_error:
-            print(f"[AGENT] Error during cleanup: {cleanup_error}")
+        # The kernel of the chat is kept for follow-up analyses, the pool evicts it when idle
 
         # Return comprehensive result
         return {
@@ -364,6 +388,7 @@ class FullAnalysisAgent:
             "status": status,
             "cells_executed": cell_count,
             "steps_processed": step_count,
+            "token_usage": token_usage,
         }
 
 
@@ -7,22 +7,22 @@ import sys
 import os
 from datetime import datetime, timezone
 from pathlib import Path
-from groq import Groq
+from groq import AsyncGroq
 
 from config import CHAT_DIR
+from core.llm_client import llm_client
 from core.settings_manager import settings_manager
 from tools.definitions import METADATA_AGENT_SYSTEM_INSTRUCTIONS
+from utils.dataset_profiler import dataset_profiler
+from utils.python_worker_pool import python_worker_pool
 
 class MetadataAgent:
     def __init__(self):
         self.agent_id = "metadata_agent"
 
-    def _get_client(self) -> Groq:
-        """Get Groq client with current dynamic settings"""
-        api_key = settings_manager.get("api_key")
-        if not settings_manager.is_valid_api_key(api_key):
-            raise ValueError("Invalid or missing API key")
-        return Groq(api_key=api_key)
+    async def _get_client(self) -> AsyncGroq:
+        """Get the shared AsyncGroq client with current dynamic settings"""
+        return await llm_client.get_client()
 
     def _fix_file_path(self, file_path: str) -> str:
         """Convert to proper file path"""
@@ -120,55 +120,23 @@ class MetadataAgent:
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
 
-            # Generate code using AI with dynamic settings
-            client = self._get_client()
-            model = settings_manager.get("model")
-
-            # Create focused prompt for metadata analysis
-            code_prompt = f"""Generate Python code for dataset metadata analysis.
-
-File: {file_path}
-Instructions: {instructions}
-
-Requirements:
-- Use pandas to read the file
-- Show shape, columns, data types, missing values, basic statistics
-- Handle file reading errors with try-except
-- Keep code under 15 lines
-- Output only executable Python code, no explanations
-
-Generate clean, working Python code:"""
-
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": METADATA_AGENT_SYSTEM_INSTRUCTIONS},
-                    {"role": "user", "content": code_prompt}
-                ],
-                max_tokens=6000,
-                temperature=0.7
-            )
-
-            # Extract and clean generated code
-            raw_code = self._extract_response_content(response)
-            if not raw_code:
-                raise Exception("AI failed to generate code")
-
+            # Profile the dataset in one chunked pass, other formats fall back to generated code
+            profile = None
+            generated_code = None
             try:
-                generated_code = self._clean_generated_code(raw_code)
-            except ValueError as e:
-                raise Exception(f"Code cleaning failed: {e}")
-
-            print(f"[METADATA_AGENT] Generated code:\n{generated_code}")
-
-            # Execute the cleaned code
-            execution_result = await self._execute_code_async(generated_code)
-
-            if not execution_result["success"]:
-                raise Exception(f"Code execution failed: {execution_result['stderr']}")
+                profile = await dataset_profiler.profile_async(file_path)
+                execution_result = {
+                    "stdout": dataset_profiler.format_profile(profile),
+                    "stderr": "",
+                    "return_code": 0,
+                    "success": True
+                }
+            except Exception as e:
+                print(f"[METADATA_AGENT] Profiler failed, generating analysis code: {e}")
+                generated_code, execution_result = await self._generate_and_execute_code(file_path, instructions)
 
             # Generate summary using AI
-            summary = await self._generate_summary(execution_result, file_path)
+            summary = await self._generate_summary(execution_result, file_path, instructions)
 
             if not summary:
                 raise Exception("AI failed to generate summary")
@@ -181,6 +149,7 @@ Generate clean, working Python code:"""
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "tool_call": tool_call,
                 "file_path": file_path,
+                "profile": profile,
                 "generated_code": generated_code,
                 "execution_result": execution_result,
                 "summary": summary,
@@ -208,9 +177,63 @@ Generate clean, working Python code:"""
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
 
+    async def _generate_and_execute_code(self, file_path: str, instructions: str) -> tuple:
+        """Ask the LLM for pandas analysis code and execute it (formats the profiler cannot read)"""
+        # Generate code using AI with dynamic settings
+        client = await self._get_client()
+        model = settings_manager.get("model")
+
+        # Create focused prompt for metadata analysis
+        code_prompt = f"""Generate Python code for dataset metadata analysis.
+
+File: {file_path}
+Instructions: {instructions}
+
+Requirements:
+- Use pandas to read the file
+- Show shape, columns, data types, missing values, basic statistics
+- Handle file reading errors with try-except
+- Keep code under 15 lines
+- Output only executable Python code, no explanations
+
+Generate clean, working Python code:"""
+
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": METADATA_AGENT_SYSTEM_INSTRUCTIONS},
+                {"role": "user", "content": code_prompt}
+            ],
+            max_tokens=6000,
+            temperature=0.7
+        )
+
+        # Extract and clean generated code
+        raw_code = self._extract_response_content(response)
+        if not raw_code:
+            raise Exception("AI failed to generate code")
+
+        try:
+            generated_code = self._clean_generated_code(raw_code)
+        except ValueError as e:
+            raise Exception(f"Code cleaning failed: {e}")
+
+        print(f"[METADATA_AGENT] Generated code:\n{generated_code}")
+
+        # Execute the cleaned code
+        execution_result = await self._execute_code_async(generated_code)
+
+        if not execution_result["success"]:
+            raise Exception(f"Code execution failed: {execution_result['stderr']}")
+        return generated_code, execution_result
+
     async def _execute_code_async(self, code: str) -> dict:
-        """Execute code asynchronously"""
-        return await asyncio.get_event_loop().run_in_executor(None, self._execute_code, code)
+        """Execute code in a pre-warmed worker, in a subprocess if the pool is not available"""
+        try:
+            return await python_worker_pool.run(code, timeout=15)
+        except Exception as e:
+            print(f"[METADATA_AGENT] Worker pool unavailable, using subprocess: {e}")
+            return await asyncio.get_event_loop().run_in_executor(None, self._execute_code, code)
 
     def _execute_code(self, code: str) -> dict:
         """Execute Python code in subprocess"""
@@ -244,20 +267,22 @@ Generate clean, working Python code:"""
                 "success": False
             }
 
-    async def _generate_summary(self, execution_result: dict, file_path: str) -> str:
+    async def _generate_summary(self, execution_result: dict, file_path: str,
+                                instructions: str = "quick metadata analysis") -> str:
         """Generate summary from execution results"""
         try:
-            client = self._get_client()
+            client = await self._get_client()
             model = settings_manager.get("model")
 
             summary_prompt = f"""Dataset analysis completed for {file_path}.
+Instructions: {instructions}
 
 Execution output:
 {execution_result['stdout']}
 
 Generate a concise, professional summary explaining what was found in the dataset. Include key insights about the data structure, quality, and potential analysis opportunities."""
 
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model=model,
                 messages=[
                     {"role": "system", "content": "Generate a clear, professional analysis summary."},
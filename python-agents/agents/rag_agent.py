@@ -11,14 +11,13 @@ import asyncio
 from pathlib import Path
 from typing import Dict, Any, List
 
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from groq import Groq
+from groq import AsyncGroq
 
 from config import DATA_REFERENCES_DIR, DEFAULT_EMBEDDING_MODEL
+from core.embedding_registry import embedding_registry
+from core.llm_client import llm_client
+from core.reference_ingestion import reference_ingestion
 from core.settings_manager import settings_manager
-from utils.document_processor import extract_text_from_file
 
 class RAGAgent:
     def __init__(self):
@@ -26,82 +25,43 @@ class RAGAgent:
         self.references_root = DATA_REFERENCES_DIR
         self.references_root.mkdir(parents=True, exist_ok=True)
 
-    def _get_client(self) -> Groq:
-        """Get Groq client with current dynamic settings"""
-        api_key = settings_manager.get("api_key")
-        if not settings_manager.is_valid_api_key(api_key):
-            raise ValueError("Invalid or missing API key")
-        return Groq(api_key=api_key)
+    async def _get_client(self) -> AsyncGroq:
+        """Get the shared AsyncGroq client with current dynamic settings"""
+        return await llm_client.get_client()
 
     def is_enabled(self) -> bool:
         return True
 
-    def get_embedding_model(self, model_name: str):
-        if model_name == "BGE Small":
-            return HuggingFaceEmbeddings(model_name="BAAI/bge-small-en-v1.5")
-        elif model_name == "GTE Small":
-            return HuggingFaceEmbeddings(model_name="thenlper/gte-small")
-        elif model_name == "Bert Multilingual":
-            return HuggingFaceEmbeddings(model_name="sentence-transformers/bert-base-multilingual-cased")
-        else:
-            return HuggingFaceEmbeddings(model_name="BAAI/bge-small-en-v1.5")
+    async def get_embedding_model(self, model_name: str):
+        """Shared embedding model, loaded once per process"""
+        return await embedding_registry.get_embeddings(model_name)
 
-    async def ingest_documents(self, chat_id: str, files: List[Path], embedding_model_name: str):
-        chat_ref_dir = self.references_root / chat_id
-        chat_ref_dir.mkdir(exist_ok=True)
-
-        all_texts = []
-        metadatas = []
-        doc_ids = []
-
-        for file_path in files:
-            text = extract_text_from_file(file_path)
-            if not text:
-                continue
-
-            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            chunks = splitter.split_text(text)
-            all_texts.extend(chunks)
-
-            for i in range(len(chunks)):
-                metadatas.append({"source": file_path.name, "chunk": i})
-                doc_ids.append(str(uuid.uuid4()))
-
-        embedder = self.get_embedding_model(embedding_model_name)
-        vectordb_path = chat_ref_dir / "chroma"
+    async def get_vector_store(self, chat_id: str, embedding_model_name: str):
+        """Open Chroma store of the chat's reference documents"""
+        vectordb_path = self.references_root / chat_id / "chroma"
+        return await embedding_registry.get_vector_store(chat_id, str(vectordb_path), embedding_model_name)
 
-        vector_store = Chroma(
-            persist_directory=str(vectordb_path),
-            embedding_function=embedder
-        )
-
-        vector_store.add_texts(
-            texts=all_texts,
-            metadatas=metadatas,
-            ids=doc_ids
-        )
-
-        # Chroma now persists automatically
-        return {"ingested_chunks": len(all_texts)}
+    async def ingest_documents(self, chat_id: str, files: List[Path], embedding_model_name: str):
+        """Index files through the ingestion queue (batched, deduplicated) and wait for the result"""
+        return await reference_ingestion.ingest(chat_id, files, embedding_model_name)
 
     async def query_documents(self, chat_id: str, query: str, embedding_model_name: str, max_docs: int):
         chat_ref_dir = self.references_root / chat_id
         vectordb_path = chat_ref_dir / "chroma"
 
+        # Documents uploaded just before the query may still be indexing
+        if not await reference_ingestion.wait_for_chat(chat_id, timeout=60):
+            print(f"[RAG_AGENT] Reference documents of chat {chat_id} are still being indexed")
+
         if not vectordb_path.exists():
             return {"success": False, "error": "No reference documents indexed for this chat."}
 
-        embedder = self.get_embedding_model(embedding_model_name)
-
-        vector_store = Chroma(
-            persist_directory=str(vectordb_path),
-            embedding_function=embedder
-        )
+        vector_store = await self.get_vector_store(chat_id, embedding_model_name)
 
         retriever = vector_store.as_retriever(search_kwargs={"k": max_docs})
 
         # Get Groq client with dynamic settings
-        client = self._get_client()
+        client = await self._get_client()
         model = settings_manager.get("model")
 
         docs = await retriever.ainvoke(query)
@@ -109,7 +69,7 @@ class RAGAgent:
 
         prompt = f"Context from documents:\n{context}\n\nQuestion: {query}\nAnswer based on the context:"
 
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3
@@ -6,8 +6,9 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any, Optional
 
-from groq import Groq
+from groq import AsyncGroq
 from config import CHAT_DIR, SEARXNG_BASE_URL
+from core.llm_client import llm_client
 from core.settings_manager import settings_manager
 from tools.definitions import WEB_SEARCH_SYSTEM_INSTRUCTIONS
 
@@ -17,12 +18,9 @@ class WebSearchAgent:
         self.searxng_url = SEARXNG_BASE_URL
         self.is_available = self._check_searxng_availability()
 
-    def _get_client(self) -> Groq:
-        """Get Groq client with current dynamic settings"""
-        api_key = settings_manager.get("api_key")
-        if not settings_manager.is_valid_api_key(api_key):
-            raise ValueError("Invalid or missing API key")
-        return Groq(api_key=api_key)
+    async def _get_client(self) -> AsyncGroq:
+        """Get the shared AsyncGroq client with current dynamic settings"""
+        return await llm_client.get_client()
 
     def _check_searxng_availability(self) -> bool:
         try:
@@ -68,7 +66,7 @@ class WebSearchAgent:
         except Exception as e:
             return {"success": False, "error": str(e), "results": [], "query": query}
 
-    def _generate_search_summary(self, search_data: Dict[str, Any]) -> str:
+    async def _generate_search_summary(self, search_data: Dict[str, Any]) -> str:
         if not search_data.get("success") or not search_data.get("results"):
             return f"Search failed: {search_data.get('error', 'No results')}"
 
@@ -77,10 +75,10 @@ class WebSearchAgent:
             context += f"{i}. {r['title']}\n {r['content'][:200]}...\n Source: {r['url']}\n\n"
 
         try:
-            client = self._get_client()
+            client = await self._get_client()
             model = settings_manager.get("model")
 
-            resp = client.chat.completions.create(
+            resp = await client.chat.completions.create(
                 model=model,
                 messages=[
                     {"role": "system", "content": WEB_SEARCH_SYSTEM_INSTRUCTIONS},
@@ -123,7 +121,7 @@ class WebSearchAgent:
             json.dump(data, f, indent=2)
 
         if data.get("success"):
-            summary = self._generate_search_summary(data)
+            summary = await self._generate_search_summary(data)
             status = "completed"
         else:
             summary = f"Search failed: {data.get('error')}"
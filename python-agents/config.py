@@ -16,9 +16,47 @@ DATA_REFERENCES_DIR.mkdir(parents=True, exist_ok=True)
 WS_HOST = "127.0.0.1"
 WS_PORT = 8000
 
+# Conversations: messages are appended to a journal, the journal is compacted
+# into main_conversation.json every N messages
+CONVERSATION_COMPACT_EVERY = 50
+
+# Jupyter kernels of the analyses: one kernel per chat, spares are started in
+# advance with the common libraries imported
+KERNEL_POOL_MAX_KERNELS = 8
+KERNEL_POOL_SPARES = 1
+KERNEL_IDLE_TIMEOUT = 30 * 60
+KERNEL_WARMUP_CODE = "import pandas as pd\nimport numpy as np\nimport matplotlib.pyplot as plt"
+
+# Pre-warmed Python workers of the metadata agent
+METADATA_WORKERS = 2
+METADATA_WORKER_MAX_JOBS = 50  # recycled after N jobs
+METADATA_WORKER_MEMORY_MB = 2048  # address space limit per worker, 0: no limit
+METADATA_WORKER_PRELOAD = ["pandas", "numpy"]
+
+# Dataset profiles of the metadata agent: chunked single pass, cached by content hash
+PROFILE_CACHE_DIR = BASE_DIR / "data" / "profiles"
+PROFILE_CHUNK_ROWS = 100_000
+PROFILE_DISTINCT_LIMIT = 10_000  # exact distinct counts / top values up to N distinct values
+PROFILE_DUPLICATE_ROWS_LIMIT = 1_000_000  # duplicate rows are counted up to N unique rows
+PROFILE_TOP_VALUES = 5
+
+# WebSocket fan-out: each connection has a bounded send queue drained by its
+# own writer task. Full queue policy: "disconnect" (the client resyncs with
+# ?since= on reconnect), "drop_oldest" or "drop_newest". The drop policies only
+# drop messages of WS_COALESCE_TYPES, the client is disconnected otherwise
+WS_SEND_QUEUE_SIZE = 256
+WS_SLOW_CONSUMER_POLICY = "disconnect"
+# State messages of these types replace the queued message of the same type and chat
+WS_COALESCE_TYPES = {"typing_indicator", "ping", "history_update", "websearch_toggled"}
+
 # External services
 SEARXNG_BASE_URL = "http://127.0.0.1:8888"
 
+# LLM client (shared by all agents)
+LLM_MAX_CONNECTIONS = 50
+LLM_MAX_KEEPALIVE_CONNECTIONS = 20
+LLM_MAX_RETRIES = 2
+
 # Available options (for UI dropdowns)
 AVAILABLE_PROVIDERS = ["Groq"]  # Future: OpenAI, Anthropic, etc.
 AVAILABLE_MODELS = {
@@ -30,6 +68,55 @@ AVAILABLE_MODELS = {
 EMBEDDING_MODELS = ["BGE Small", "GTE Small", "Bert Multilingual"]
 DEFAULT_EMBEDDING_MODEL = "BGE Small"
 
+# Embedding models are loaded once per process, least recently used models are
+# unloaded when the budget is exceeded (sizes are estimates of the fp32 weights)
+EMBEDDING_MODEL_IDS = {
+    "BGE Small": "BAAI/bge-small-en-v1.5",
+    "GTE Small": "thenlper/gte-small",
+    "Bert Multilingual": "sentence-transformers/bert-base-multilingual-cased"
+}
+EMBEDDING_MODEL_SIZES_MB = {"BGE Small": 130, "GTE Small": 130, "Bert Multilingual": 680}
+EMBEDDING_MEMORY_BUDGET_MB = 1024
+VECTOR_STORE_CACHE_SIZE = 32  # open Chroma stores (chat, model)
+
+# Reference documents are indexed in the background after the upload
+RAG_INGESTION_WORKERS = 2
+RAG_CHUNK_SIZE = 1000
+RAG_CHUNK_OVERLAP = 200
+RAG_EMBED_BATCH_SIZE = 64  # chunks per embedding call
+
+# Text extraction of documents: page ranges of large PDF/PPTX files are
+# extracted in parallel processes, the extracted text is cached by file hash
+EXTRACTION_CACHE_DIR = BASE_DIR / "data" / "extractions"
+EXTRACTION_PROCESSES = 4
+EXTRACTION_PARALLEL_MIN_PAGES = 40
+
+# Context of the analysis agent loop: the last N exchanges are sent verbatim,
+# older steps as a one-line summary each, within the token budget (estimated)
+AGENT_CONTEXT_TOKEN_BUDGET = 12_000
+AGENT_CONTEXT_KEEP_EXCHANGES = 6
+AGENT_STEP_SUMMARY_CHARS = 160
+
+# Tool calls of the chat run as background jobs, at most N jobs in total and
+# per user at the same time (the others wait in submission order)
+TOOL_JOB_WORKERS = 8
+TOOL_JOBS_PER_USER = 2
+# The per-user limit is keyed on the client address.  Behind a reverse proxy
+# that authenticates the users, the name of the header it sets with the user
+# ID (the header is trusted, clients must not reach the server directly)
+TOOL_JOB_USER_HEADER = None
+
+# Tool calls of one model turn run concurrently, each within the timeout of its
+# tool (seconds), their results are answered in one follow-up completion
+TOOL_CALL_TIMEOUTS = {
+    "dataset_metadata_analysis": 300,
+    "full_dataset_analysis": 3600,
+    "web_search": 60,
+    "rag_knowledge_retrieval": 120
+}
+DEFAULT_TOOL_CALL_TIMEOUT = 300
+TOOL_RESULT_MAX_CHARS = 8000  # result of each tool sent to the follow-up completion
+
 # Feature availability checks
 def check_web_deps():
     try:
@@ -2,7 +2,10 @@ from agents.metadata_agent import MetadataAgent
 from agents.full_analysis_agent import FullAnalysisAgent
 from agents.web_search_agent import WebSearchAgent
 from agents.rag_agent import RAGAgent  # new agent for RAG
-from typing import Dict, Any
+from core.tool_jobs import tool_jobs
+from config import TOOL_CALL_TIMEOUTS, DEFAULT_TOOL_CALL_TIMEOUT
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import asyncio
 
 class AgentOrchestrator:
     def __init__(self):
@@ -20,6 +23,8 @@ class AgentOrchestrator:
         except Exception as e:
             print(f"[ORCHESTRATOR] ⚠️ RAG agent init failed: {e}")
             self.rag_agent = None
+        # Analyses of a chat share its notebook and kernel, they run one after another
+        self._analysis_locks: Dict[str, asyncio.Lock] = {}
 
     async def process_tool_call(self, tool_call: Dict[str, Any], parent_chat_id: str = None) -> Dict[str, Any]:
         try:
@@ -61,6 +66,73 @@ class AgentOrchestrator:
                 "status": "failed"
             }
 
+    async def process_tool_calls(self, tool_calls: List[Dict[str, Any]], parent_chat_id: str = None) -> List[Dict[str, Any]]:
+        """Run the tool calls of a model turn concurrently, results in the order of the calls"""
+        return list(await asyncio.gather(
+            *(self._process_with_timeout(tool_call, parent_chat_id) for tool_call in tool_calls)
+        ))
+
+    async def _process_with_timeout(self, tool_call: Dict[str, Any], parent_chat_id: str = None) -> Dict[str, Any]:
+        fn = tool_call.get("function_name")
+        timeout = TOOL_CALL_TIMEOUTS.get(fn, DEFAULT_TOOL_CALL_TIMEOUT)
+        if fn == "full_dataset_analysis":
+            # The wait for an earlier analysis of the chat does not count toward the timeout
+            async with self._analysis_locks.setdefault(parent_chat_id, asyncio.Lock()):
+                return await self._call_with_timeout(tool_call, parent_chat_id, fn, timeout)
+        return await self._call_with_timeout(tool_call, parent_chat_id, fn, timeout)
+
+    async def _call_with_timeout(self, tool_call: Dict[str, Any], parent_chat_id: Optional[str],
+                                 fn: str, timeout: float) -> Dict[str, Any]:
+        try:
+            return await asyncio.wait_for(self.process_tool_call(tool_call, parent_chat_id), timeout)
+        except asyncio.TimeoutError:
+            print(f"[ORCHESTRATOR] ⚠️ {fn} timed out after {timeout}s")
+            return {
+                "agent_id": "agent_orchestrator",
+                "error": f"{fn} timed out after {timeout}s",
+                "status": "failed"
+            }
+
+    @staticmethod
+    def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One agent result for several tool calls, failed only if every call failed"""
+        failed = [result for result in results if result.get("status") == "failed"]
+        parts = [
+            result.get("summary") or result.get("conclusion") or
+            f"Failed: {result.get('error', 'Unknown error')}"
+            for result in results
+        ]
+        return {
+            "agent_id": "agent_orchestrator",
+            "summary": "\n\n".join(parts),
+            "status": "failed" if len(failed) == len(results) else "completed",
+            "error": "; ".join(str(result.get("error", "Unknown error")) for result in failed) or None,
+            "notebook_path": next((r["notebook_path"] for r in results if r.get("notebook_path")), None),
+            "agent_conversation_file": next(
+                (r["agent_conversation_file"] for r in results if r.get("agent_conversation_file")), None
+            ),
+            "results": results
+        }
+
+    def submit_tool_calls(self, tool_calls: List[Dict[str, Any]], parent_chat_id: str, user_id: Optional[str] = None,
+                          on_finished: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+                          combine: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, Any]]]] = None
+                          ) -> Dict[str, Any]:
+        """Run the tool calls of a model turn as one background job, returns the queued job
+
+        The result of the job is the agent result of a single call, the results
+        of several calls are combined by combine(results) (merge_results by default).
+        """
+        async def run() -> Dict[str, Any]:
+            results = await self.process_tool_calls(tool_calls, parent_chat_id)
+            if len(results) == 1:
+                return results[0]
+            if combine is None:
+                return self.merge_results(results)
+            return await combine(results)
+
+        return tool_jobs.submit(parent_chat_id, user_id, tool_calls, run, on_finished)
+
     def is_web_search_available(self) -> bool:
         return bool(self.web_search_agent and self.web_search_agent.is_enabled())
 
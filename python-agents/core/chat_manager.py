@@ -1,23 +1,59 @@
 import json
+import os
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
-from groq import Groq
-from config import CHAT_DIR
+from groq import AsyncGroq
+from config import CHAT_DIR, CONVERSATION_COMPACT_EVERY, TOOL_RESULT_MAX_CHARS
 from tools.definitions import TOOLS, MAIN_CHAT_SYSTEM_INSTRUCTIONS
 from core.agent_orchestrator import AgentOrchestrator
+from core.conversation_index import conversation_index
+from core.llm_client import llm_client
 from core.settings_manager import settings_manager
+from ws_manager.manager import manager as ws_manager
+
+
+MAIN_CONVERSATION_FILE = "main_conversation.json"
+JOURNAL_FILE = "main_conversation.journal.jsonl"
+
+
+def read_conversation(conversation_folder: Path) -> Optional[Dict[str, Any]]:
+    """Read the snapshot of a conversation and replay the messages of its journal"""
+    main_chat_file = conversation_folder / MAIN_CONVERSATION_FILE
+    if not main_chat_file.exists():
+        return None
+
+    with open(main_chat_file, "r", encoding="utf-8") as f:
+        conversation = json.load(f)
+
+    chat_history = conversation.setdefault("chat_history", [])
+    journal_file = conversation_folder / JOURNAL_FILE
+    if journal_file.exists():
+        with open(journal_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn line of an interrupted write
+                    continue
+                # Entries already in the snapshot (interrupted compaction) are skipped
+                if entry.get("seq") == len(chat_history):
+                    chat_history.append(entry["message"])
+
+    return conversation
 
 
 class ChatManager:
     def __init__(self):
         self.conversations: Dict[str, Dict] = {}
         self.agent_orchestrator = AgentOrchestrator()
+        # Number of journal entries per chat since the last compaction
+        self._journal_counts: Dict[str, int] = {}
 
-    def _get_client(self) -> Groq:
-        """Get Groq client with current dynamic settings"""
+    async def _get_client(self) -> AsyncGroq:
+        """Get the shared AsyncGroq client with current dynamic settings"""
         config = settings_manager.get_model_config()
         
         if not config["api_key"]:
@@ -26,7 +62,7 @@ class ChatManager:
         if not settings_manager.is_valid_api_key(config["api_key"]):
             raise ValueError("Invalid API key format. Please check your Groq API key in settings.")
             
-        return Groq(api_key=config["api_key"])
+        return await llm_client.get_client()
 
     def create_conversation(self, chat_id: Optional[str] = None) -> str:
         """Create a new conversation with auto-generated ID"""
@@ -54,6 +90,7 @@ class ChatManager:
             }
             
             self._save_main_conversation(chat_id)
+            conversation_index.add(chat_id, self.conversations[chat_id]["created_at"])
             return chat_id
             
         except Exception as e:
@@ -75,8 +112,24 @@ class ChatManager:
             **kwargs
         }
 
-        self.conversations[chat_id]["chat_history"].append(message)
-        self._save_main_conversation(chat_id)
+        chat_history = self.conversations[chat_id]["chat_history"]
+        chat_history.append(message)
+        self._append_journal(chat_id, message)
+
+        # History clients receive only the new message
+        try:
+            ws_manager.manager.broadcast_history_delta(chat_id, len(chat_history) - 1, message)
+        except Exception as e:
+            print(f"[CHAT_MANAGER] Error sending history delta for {chat_id}: {e}")
+
+        # The first visible user message is the title of the conversation
+        title = None
+        if role in ("user", "human") and not hidden and isinstance(content, str) and content.strip():
+            title = content.strip()
+        try:
+            conversation_index.message_added(chat_id, message["timestamp"], title)
+        except Exception as e:
+            print(f"[CHAT_MANAGER] Error updating conversation index for {chat_id}: {e}")
         return message
 
     def get_hidden_reference_docs(self, chat_id: str) -> List[str]:
@@ -127,14 +180,11 @@ class ChatManager:
             return True
 
         conversation_folder = CHAT_DIR / chat_id
-        main_chat_file = conversation_folder / "main_conversation.json"
-        
-        if not main_chat_file.exists():
-            return False
 
         try:
-            with open(main_chat_file, "r", encoding="utf-8") as f:
-                loaded_conversation = json.load(f)
+            loaded_conversation = read_conversation(conversation_folder)
+            if loaded_conversation is None:
+                return False
                 
             # Migrate old conversations to include system instructions if missing
             if "system_instructions" not in loaded_conversation:
@@ -148,6 +198,10 @@ class ChatManager:
                 }
                 
             self.conversations[chat_id] = loaded_conversation
+
+            # Fold the replayed journal into a fresh snapshot
+            if (conversation_folder / JOURNAL_FILE).exists():
+                self._save_main_conversation(chat_id)
             return True
             
         except Exception as e:
@@ -197,8 +251,8 @@ class ChatManager:
         
         return augmented_instructions
 
-    async def process_user_message(self, chat_id: str, user_message: str) -> Dict[str, Any]:
-        """Process user message with dynamic settings and enhanced context"""
+    async def process_user_message(self, chat_id: str, user_message: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Process user message with dynamic settings and enhanced context, tool calls run as background jobs of user_id"""
         
         try:
             # Validate settings before processing
@@ -209,7 +263,7 @@ class ChatManager:
             
             # Get current model configuration
             model_config = settings_manager.get_model_config()
-            client = self._get_client()
+            client = await self._get_client()
             
             # Add user message (visible)
             self.add_message(chat_id, "user", user_message)
@@ -232,7 +286,7 @@ class ChatManager:
 
             # Call Groq API with current dynamic settings
             try:
-                response = client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model=model_config["model"],
                     messages=api_messages,
                     tools=TOOLS,
@@ -256,57 +310,37 @@ class ChatManager:
                 error_response = self.add_message(chat_id, "assistant", error_msg)
                 return {"type": "api_error", "message": error_response}
 
+            # Streaming: forward tokens to the chat WebSocket while they arrive
+            if model_config.get("stream"):
+                streamed = await self._stream_completion(chat_id, response)
+
+                if streamed["tool_calls"]:
+                    if streamed["started"]:
+                        await ws_manager.manager.broadcast_message_end(
+                            chat_id, streamed["message_id"], status="tool_call"
+                        )
+                    return await self._handle_tool_calls(chat_id, streamed["tool_calls"], user_id)
+
+                content = streamed["content"].strip()
+                if not content:
+                    content = "I'm OSS_Labs, here to help with your data analysis needs."
+
+                # Persist the complete reply once, with the ID of the streamed message
+                assistant_msg = self.add_message(chat_id, "assistant", content, id=streamed["message_id"])
+                await ws_manager.manager.broadcast_message_end(chat_id, streamed["message_id"], assistant_msg)
+                return {"type": "text_response", "message": assistant_msg, "streamed": True}
+
             # Process response
             if hasattr(response, "choices") and len(response.choices) > 0:
                 choice = response.choices[0]
 
                 # Handle tool calls
                 if hasattr(choice, "message") and hasattr(choice.message, "tool_calls") and choice.message.tool_calls:
-                    try:
-                        tool_call = choice.message.tool_calls[0]
-                        function_name = tool_call.function.name
-                        arguments = json.loads(tool_call.function.arguments)
-
-                        # Add AI's tool call intention to chat
-                        tool_call_msg = self.add_message(
-                            chat_id,
-                            "assistant",
-                            f"I'll analyze that for you using {function_name}..."
-                        )
-
-                        # Route to appropriate agent
-                        agent_result = await self.agent_orchestrator.process_tool_call({
-                            "function_name": function_name,
-                            "arguments": arguments
-                        }, parent_chat_id=chat_id)
-
-                        # Process agent response
-                        response_content = (agent_result.get("summary") or 
-                                          agent_result.get("conclusion") or 
-                                          "Analysis completed.")
-                        
-                        if agent_result.get("status") == "failed":
-                            response_content = f"Analysis failed: {agent_result.get('error', 'Unknown error')}"
-
-                        # Add agent response to chat
-                        agent_response_msg = self.add_message(chat_id, "assistant", response_content)
-
-                        return {
-                            "type": "tool_call_processed",
-                            "tool_call_message": tool_call_msg,
-                            "agent_response": agent_response_msg,
-                            "agent_metadata": {
-                                "agent_id": agent_result.get("agent_id"),
-                                "status": agent_result.get("status"),
-                                "notebook_path": agent_result.get("notebook_path"),
-                                "agent_conversation_file": agent_result.get("agent_conversation_file")
-                            }
-                        }
-
-                    except Exception as e:
-                        error_msg = f"Tool execution failed: {str(e)}"
-                        error_response = self.add_message(chat_id, "assistant", error_msg)
-                        return {"type": "tool_error", "message": error_response}
+                    tool_calls = [
+                        {"id": tool_call.id, "name": tool_call.function.name, "arguments": tool_call.function.arguments}
+                        for tool_call in choice.message.tool_calls
+                    ]
+                    return await self._handle_tool_calls(chat_id, tool_calls, user_id)
 
                 else:
                     # Normal AI text response
@@ -335,6 +369,189 @@ class ChatManager:
             error_response = self.add_message(chat_id, "assistant", error_msg)
             return {"type": "unexpected_error", "message": error_response}
 
+    async def _stream_completion(self, chat_id: str, response) -> Dict[str, Any]:
+        """Forward streamed tokens as delta frames and collect the complete reply"""
+        message_id = str(uuid.uuid4())[:8]
+        content_parts: List[str] = []
+        tool_calls: Dict[int, Dict[str, str]] = {}
+        started = False
+
+        try:
+            async for chunk in response:
+                if not getattr(chunk, "choices", None):
+                    continue
+                delta = chunk.choices[0].delta
+
+                if getattr(delta, "content", None):
+                    if not started:
+                        started = True
+                        await ws_manager.manager.broadcast_message_start(chat_id, message_id)
+                    await ws_manager.manager.broadcast_message_delta(
+                        chat_id, message_id, delta.content, len(content_parts)
+                    )
+                    content_parts.append(delta.content)
+
+                # Tool calls arrive in fragments, the arguments are concatenated per index
+                for tool_call_delta in getattr(delta, "tool_calls", None) or []:
+                    entry = tool_calls.setdefault(tool_call_delta.index, {"id": "", "name": "", "arguments": ""})
+                    if getattr(tool_call_delta, "id", None):
+                        entry["id"] = tool_call_delta.id
+                    function = getattr(tool_call_delta, "function", None)
+                    if function is not None:
+                        entry["name"] += function.name or ""
+                        entry["arguments"] += function.arguments or ""
+        except Exception:
+            if started:
+                await ws_manager.manager.broadcast_message_end(chat_id, message_id, status="failed")
+            raise
+        finally:
+            close = getattr(response, "close", None)
+            if close is not None:
+                await close()
+
+        return {
+            "message_id": message_id,
+            "content": "".join(content_parts),
+            "tool_calls": [tool_calls[index] for index in sorted(tool_calls)],
+            "started": started
+        }
+
+    async def _handle_tool_calls(self, chat_id: str, tool_calls: List[Dict[str, str]],
+                                 user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queue the tool calls of the model as one background job, the answer is added to the chat when it finishes"""
+        try:
+            calls = [{
+                "id": tool_call.get("id") or f"call_{i}",
+                "function_name": tool_call["name"],
+                "arguments": json.loads(tool_call["arguments"] or "{}")
+            } for i, tool_call in enumerate(tool_calls)]
+            function_names = ", ".join(call["function_name"] for call in calls)
+            # The follow-up answer sees the chat as it was when the model made the calls,
+            # not the messages added while the job runs
+            history_len = len(self.conversations[chat_id]["chat_history"])
+
+            # Add AI's tool call intention to chat
+            tool_call_msg = self.add_message(
+                chat_id,
+                "assistant",
+                f"I'll analyze that for you using {function_names}..."
+            )
+
+            # Route to the agents concurrently in the background
+            job = self.agent_orchestrator.submit_tool_calls(
+                calls, parent_chat_id=chat_id, user_id=user_id, on_finished=self._finish_tool_job,
+                combine=lambda results: self._answer_with_tool_results(chat_id, calls, results, history_len)
+            )
+
+            return {
+                "type": "tool_call_queued",
+                "tool_call_message": tool_call_msg,
+                "job": job
+            }
+
+        except Exception as e:
+            error_msg = f"Tool execution failed: {str(e)}"
+            error_response = self.add_message(chat_id, "assistant", error_msg)
+            return {"type": "tool_error", "message": error_response}
+
+    @staticmethod
+    def _tool_result_content(result: Dict[str, Any]) -> str:
+        if result.get("status") == "failed":
+            content = f"Tool failed: {result.get('error', 'Unknown error')}"
+        else:
+            content = result.get("summary") or result.get("conclusion") or json.dumps(result, default=str)
+        return content[:TOOL_RESULT_MAX_CHARS]
+
+    async def _answer_with_tool_results(self, chat_id: str, calls: List[Dict[str, Any]],
+                                        results: List[Dict[str, Any]], history_len: int) -> Dict[str, Any]:
+        """Answer of the model to the results of all tool calls of a turn, in one follow-up completion
+
+        Only the first history_len messages of the chat (its history when the
+        calls were made) come before the tool call and its results.
+        """
+        merged = self.agent_orchestrator.merge_results(results)
+        try:
+            model_config = settings_manager.get_model_config()
+            client = await self._get_client()
+            conv = self.conversations[chat_id]
+
+            augmented_system_instructions = {
+                "role": "system",
+                "content": self._augment_system_instructions(chat_id, conv["system_instructions"]["content"])
+            }
+            api_messages = self._clean_messages_for_api([augmented_system_instructions] + conv["chat_history"][:history_len])
+            api_messages.append({
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": call["id"],
+                    "type": "function",
+                    "function": {"name": call["function_name"], "arguments": json.dumps(call["arguments"])}
+                } for call in calls]
+            })
+            for call, result in zip(calls, results):
+                api_messages.append({
+                    "role": "tool",
+                    "tool_call_id": call["id"],
+                    "content": self._tool_result_content(result)
+                })
+
+            response = await client.chat.completions.create(
+                model=model_config["model"],
+                messages=api_messages,
+                temperature=model_config["temperature"],
+                top_p=model_config["top_p"]
+            )
+            content = self._extract_response_content(response)
+            if content:
+                merged["summary"] = content
+        except Exception as e:
+            # The joined tool results are the answer
+            print(f"[CHAT_MANAGER] Follow-up completion failed for chat {chat_id}: {e}")
+        return merged
+
+    async def _finish_tool_job(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Add the result of a finished tool job to the chat and send it to the chat clients"""
+        chat_id = job["chat_id"]
+        if chat_id not in self.conversations and not self.load_conversation(chat_id):
+            # Chat deleted while the job ran
+            return None
+
+        # Process agent response
+        agent_result = job.get("result") or {}
+        if job["status"] == "cancelled":
+            response_content = "Analysis cancelled."
+        elif job["status"] == "interrupted":
+            response_content = "Analysis interrupted, the server was stopped."
+        elif job["status"] == "failed":
+            response_content = f"Analysis failed: {job.get('error') or 'Unknown error'}"
+        else:
+            response_content = (agent_result.get("summary") or
+                              agent_result.get("conclusion") or
+                              "Analysis completed.")
+
+        # Add agent response to chat
+        agent_response_msg = self.add_message(chat_id, "assistant", response_content)
+
+        result = {
+            "type": "tool_call_processed",
+            "agent_response": agent_response_msg,
+            "agent_metadata": {
+                "job_id": job["job_id"],
+                "agent_id": agent_result.get("agent_id"),
+                "status": agent_result.get("status") or job["status"],
+                "notebook_path": agent_result.get("notebook_path"),
+                "agent_conversation_file": agent_result.get("agent_conversation_file")
+            }
+        }
+        await ws_manager.manager.send("chat", chat_id, {
+            "type": "message_processed",
+            "chat_id": chat_id,
+            "result": result,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        })
+        return result
+
     def get_conversation_title(self, chat_id: str) -> str:
         """Generate conversation title from first user message"""
         if chat_id not in self.conversations:
@@ -368,25 +585,64 @@ class ChatManager:
         self._save_main_conversation(chat_id)
         return True
 
+    def _append_journal(self, chat_id: str, message: Dict[str, Any]):
+        """Append a message to the journal of the conversation, compact every N messages"""
+        conversation = self.conversations[chat_id]
+        conversation["updated_at"] = message["timestamp"]
+        journal_file = Path(conversation["conversation_folder"]) / JOURNAL_FILE
+        entry = {"seq": len(conversation["chat_history"]) - 1, "message": message}
+
+        try:
+            with open(journal_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"[CHAT_MANAGER] Error appending to journal of {chat_id}: {e}")
+            self._save_main_conversation(chat_id)
+            return
+
+        count = self._journal_counts.get(chat_id, 0) + 1
+        if count >= CONVERSATION_COMPACT_EVERY:
+            self._save_main_conversation(chat_id)
+        else:
+            self._journal_counts[chat_id] = count
+
     def _save_main_conversation(self, chat_id: str):
-        """Save conversation to disk"""
+        """Save a snapshot of the conversation to disk and truncate its journal"""
         try:
             conversation_folder = Path(self.conversations[chat_id]["conversation_folder"])
-            main_chat_file = conversation_folder / "main_conversation.json"
+            main_chat_file = conversation_folder / MAIN_CONVERSATION_FILE
 
             # Add metadata
             self.conversations[chat_id]["updated_at"] = datetime.now(timezone.utc).isoformat()
             self.conversations[chat_id]["version"] = "2.0"  # Version for compatibility
 
-            with open(main_chat_file, "w", encoding='utf-8') as f:
+            # Atomic write: a crash leaves either the old or the new snapshot
+            temp_file = main_chat_file.with_suffix(".tmp")
+            with open(temp_file, "w", encoding='utf-8') as f:
                 json.dump(self.conversations[chat_id], f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, main_chat_file)
+
+            # All journal entries are in the snapshot now
+            journal_file = conversation_folder / JOURNAL_FILE
+            if journal_file.exists():
+                journal_file.unlink()
+            self._journal_counts.pop(chat_id, None)
         except Exception as e:
             print(f"[CHAT_MANAGER] Error saving conversation {chat_id}: {e}")
 
+    def compact_all(self):
+        """Compact the journals of all conversations (application shutdown)"""
+        for chat_id in list(self._journal_counts):
+            if chat_id in self.conversations:
+                self._save_main_conversation(chat_id)
+
     def cleanup_conversation(self, chat_id: str):
         """Remove conversation from memory (for deletion)"""
         if chat_id in self.conversations:
             del self.conversations[chat_id]
+        self._journal_counts.pop(chat_id, None)
 
     def get_conversation_stats(self, chat_id: str) -> Dict[str, Any]:
         """Get statistics for a conversation"""
@@ -432,14 +688,14 @@ class ChatManager:
             "web_search_global": settings_manager.get("web_search_enabled", True)
         }
 
-    def test_api_connection(self) -> Dict[str, Any]:
+    async def test_api_connection(self) -> Dict[str, Any]:
         """Test API connection with current settings"""
         try:
-            client = self._get_client()
+            client = await self._get_client()
             config = settings_manager.get_model_config()
             
             # Simple test call
-            test_response = client.chat.completions.create(
+            test_response = await client.chat.completions.create(
                 model=config["model"],
                 messages=[{"role": "user", "content": "Hello"}],
                 max_tokens=10,
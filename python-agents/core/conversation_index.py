@@ -0,0 +1,203 @@
+# core/conversation_index.py
+import datetime
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from config import CHAT_DIR
+
+INDEX_FILE = "conversations_index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    chat_id TEXT PRIMARY KEY,
+    title TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT,
+    notebook_count INTEGER NOT NULL DEFAULT 0,
+    dataset_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS conversations_created_at ON conversations (created_at DESC);
+"""
+
+
+def count_chat_files(chat_dir: Path) -> Dict[str, int]:
+    """Count the notebooks and the user datasets (system files excluded) of a chat folder"""
+    notebook_count = len(list(chat_dir.glob("analysis_*.ipynb")))
+
+    csv_files = list(chat_dir.glob("*.csv"))
+    xlsx_files = list(chat_dir.glob("*.xlsx"))
+    user_json_files = [f for f in chat_dir.glob("*.json")
+                       if f.name not in ("main_conversation.json",)
+                       and not f.name.startswith(("agent_", "metadata_agent_", "full_analysis_agent_"))]
+
+    return {
+        "notebook_count": notebook_count,
+        "dataset_count": len(csv_files) + len(xlsx_files) + len(user_json_files)
+    }
+
+
+class ConversationIndex:
+    """SQLite index of the conversations in CHAT_DIR for the conversation list"""
+
+    def __init__(self, chat_dir: Path = CHAT_DIR):
+        self.chat_dir = Path(chat_dir)
+        self.db_file = self.chat_dir / INDEX_FILE
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index, a new index is built from the chat folders"""
+        with self._lock:
+            if self._conn is None:
+                is_new = not self.db_file.exists()
+                conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(SCHEMA)
+                self._conn = conn
+                if is_new:
+                    self.rebuild()
+            return self._conn
+
+    def add(self, chat_id: str, created_at: str, title: Optional[str] = None):
+        """Register a new conversation"""
+        conn = self._connect()
+        with self._lock, conn:
+            conn.execute(
+                "INSERT INTO conversations (chat_id, title, created_at, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(chat_id) DO NOTHING",
+                (chat_id, title, created_at, created_at)
+            )
+
+    def message_added(self, chat_id: str, timestamp: str, title: Optional[str] = None):
+        """Update a conversation after a new message, the first title sticks"""
+        conn = self._connect()
+        with self._lock, conn:
+            conn.execute(
+                "UPDATE conversations SET updated_at = ?, title = COALESCE(title, ?) WHERE chat_id = ?",
+                (timestamp, title, chat_id)
+            )
+
+    def refresh_counts(self, chat_id: str):
+        """Recount the notebooks and datasets of one chat folder (uploads, new notebooks)"""
+        chat_dir = self.chat_dir / chat_id
+        if not chat_dir.is_dir():
+            return
+        counts = count_chat_files(chat_dir)
+        conn = self._connect()
+        with self._lock, conn:
+            conn.execute(
+                "UPDATE conversations SET notebook_count = ?, dataset_count = ? WHERE chat_id = ?",
+                (counts["notebook_count"], counts["dataset_count"], chat_id)
+            )
+
+    def remove(self, chat_id: str):
+        """Remove a deleted conversation"""
+        conn = self._connect()
+        with self._lock, conn:
+            conn.execute("DELETE FROM conversations WHERE chat_id = ?", (chat_id,))
+
+    def list(self, limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        """List the conversations (newest first) with the totals of all conversations"""
+        conn = self._connect()
+        with self._lock:
+            totals = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(notebook_count), 0), COALESCE(SUM(dataset_count), 0)"
+                " FROM conversations"
+            ).fetchone()
+            rows = conn.execute(
+                "SELECT * FROM conversations ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+
+        conversations = []
+        for row in rows:
+            conversations.append({
+                "id": row["chat_id"],
+                "title": row["title"] or f"Chat {row['chat_id'][:8]}",
+                "created_at": row["created_at"],
+                "has_notebook": row["notebook_count"] > 0,
+                "notebook_count": row["notebook_count"],
+                "dataset_count": row["dataset_count"],
+                "focusMode": "webSearch"
+            })
+
+        return {
+            "conversations": conversations,
+            "total": totals[0],
+            "total_experiments": totals[1],
+            "total_datasets": totals[2]
+        }
+
+    def rebuild(self) -> int:
+        """Rebuild the index from the chat folders (fixes drift), returns the number of conversations"""
+        # Imported here: the chat manager updates this index
+        from core.chat_manager import read_conversation
+
+        entries = []
+        if self.chat_dir.exists():
+            for chat_dir in self.chat_dir.iterdir():
+                if not chat_dir.is_dir():
+                    continue
+
+                title = None
+                created_at = None
+                updated_at = None
+                try:
+                    content = read_conversation(chat_dir)
+                    if content:
+                        # Find first non-hidden user message for title
+                        for msg in content.get("chat_history", []):
+                            if (msg.get("role") in ("user", "human") and
+                                not msg.get("hidden", False) and
+                                isinstance(msg.get("content"), str) and
+                                msg["content"].strip()):
+                                title = msg["content"].strip()
+                                break
+                        created_at = content.get("created_at")
+                        updated_at = content.get("updated_at")
+                except Exception as e:
+                    print(f"[CONVERSATION_INDEX] Error reading conversation {chat_dir.name}: {e}")
+
+                if not created_at:
+                    try:
+                        stat = chat_dir.stat()
+                        timestamp = getattr(stat, "st_mtime", stat.st_ctime)
+                        created_at = datetime.datetime.fromtimestamp(timestamp).isoformat()
+                    except Exception:
+                        created_at = datetime.datetime.now().isoformat()
+
+                counts = count_chat_files(chat_dir)
+                entries.append((chat_dir.name, title, created_at, updated_at or created_at,
+                                counts["notebook_count"], counts["dataset_count"]))
+
+        conn = self._connect()
+        with self._lock, conn:
+            conn.execute("DELETE FROM conversations")
+            conn.executemany(
+                "INSERT INTO conversations (chat_id, title, created_at, updated_at, notebook_count, dataset_count)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                entries
+            )
+
+        print(f"[CONVERSATION_INDEX] Rebuilt index with {len(entries)} conversations")
+        return len(entries)
+
+    def close(self):
+        """Close the index database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global conversation index instance
+conversation_index = ConversationIndex()
+
+
+if __name__ == "__main__":
+    # python -m core.conversation_index: rebuild the index after manual changes in CHAT_DIR
+    conversation_index.rebuild()
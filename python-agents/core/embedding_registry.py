@@ -0,0 +1,131 @@
+# core/embedding_registry.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_chroma import Chroma
+
+from config import (DEFAULT_EMBEDDING_MODEL, EMBEDDING_MODEL_IDS, EMBEDDING_MODEL_SIZES_MB,
+                    EMBEDDING_MEMORY_BUDGET_MB, VECTOR_STORE_CACHE_SIZE)
+
+
+class EmbeddingRegistry:
+    """Embedding models loaded once per process and open Chroma stores per chat
+
+    Models are loaded lazily in a thread.  When loading a model would exceed
+    EMBEDDING_MEMORY_BUDGET_MB, the least recently used models are unloaded
+    together with the vector stores that use them.
+    """
+
+    def __init__(self, memory_budget_mb: int = EMBEDDING_MEMORY_BUDGET_MB,
+                 max_vector_stores: int = VECTOR_STORE_CACHE_SIZE):
+        self.memory_budget_mb = memory_budget_mb
+        self.max_vector_stores = max_vector_stores
+        # model name -> {"embeddings", "size_mb"}, least recently used first
+        self._models: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # (chat id, model name) -> Chroma, least recently used first
+        self._stores: "OrderedDict[Tuple[str, str], Chroma]" = OrderedDict()
+        self._locks: Dict[Any, asyncio.Lock] = {}
+        self.stats = {"model_loads": 0, "model_evictions": 0, "store_opens": 0, "store_hits": 0}
+
+    @staticmethod
+    def resolve_name(model_name: Optional[str]) -> str:
+        """Known model name, unknown names use the default model"""
+        return model_name if model_name in EMBEDDING_MODEL_IDS else DEFAULT_EMBEDDING_MODEL
+
+    def _lock(self, key: Any) -> asyncio.Lock:
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    @staticmethod
+    def _model_size_mb(model_name: str, embeddings: HuggingFaceEmbeddings) -> float:
+        """Size of the loaded weights, the configured estimate if the model cannot be inspected"""
+        model = getattr(embeddings, "_client", None) or getattr(embeddings, "client", None)
+        try:
+            size = sum(p.numel() * p.element_size() for p in model.parameters())
+            return size / (1024 * 1024)
+        except Exception:
+            return EMBEDDING_MODEL_SIZES_MB.get(model_name, 500)
+
+    async def get_embeddings(self, model_name: Optional[str]) -> HuggingFaceEmbeddings:
+        """Loaded embedding model, concurrent requests for a model wait for one load"""
+        model_name = self.resolve_name(model_name)
+        entry = self._models.get(model_name)
+        if entry is None:
+            async with self._lock(model_name):
+                entry = self._models.get(model_name)
+                if entry is None:
+                    self._make_room(EMBEDDING_MODEL_SIZES_MB.get(model_name, 500))
+                    started = time.perf_counter()
+                    embeddings = await asyncio.to_thread(
+                        HuggingFaceEmbeddings, model_name=EMBEDDING_MODEL_IDS[model_name]
+                    )
+                    entry = {"embeddings": embeddings, "size_mb": self._model_size_mb(model_name, embeddings)}
+                    self._models[model_name] = entry
+                    self.stats["model_loads"] += 1
+                    print(f"[EMBEDDINGS] Loaded {model_name} ({entry['size_mb']:.0f} MB) "
+                          f"in {time.perf_counter() - started:.1f}s")
+
+        if model_name in self._models:
+            self._models.move_to_end(model_name)
+        return entry["embeddings"]
+
+    def _make_room(self, needed_mb: float):
+        """Unload least recently used models until the new model fits in the budget"""
+        while self._models:
+            used = sum(entry["size_mb"] for entry in self._models.values())
+            if used + needed_mb <= self.memory_budget_mb:
+                break
+            model_name, _ = self._models.popitem(last=False)
+            for key in [key for key in self._stores if key[1] == model_name]:
+                del self._stores[key]
+            self.stats["model_evictions"] += 1
+            print(f"[EMBEDDINGS] Unloaded {model_name} to stay within {self.memory_budget_mb} MB")
+
+    async def get_vector_store(self, chat_id: str, persist_directory: str, model_name: Optional[str]) -> Chroma:
+        """Open Chroma store of a chat with the given embedding model"""
+        model_name = self.resolve_name(model_name)
+        key = (chat_id, model_name)
+        store = self._stores.get(key)
+        if store is None:
+            async with self._lock(key):
+                store = self._stores.get(key)
+                if store is None:
+                    embeddings = await self.get_embeddings(model_name)
+                    store = await asyncio.to_thread(
+                        Chroma, persist_directory=persist_directory, embedding_function=embeddings
+                    )
+                    self._stores[key] = store
+                    self.stats["store_opens"] += 1
+                    while len(self._stores) > self.max_vector_stores:
+                        self._stores.popitem(last=False)
+                    return store
+
+        self.stats["store_hits"] += 1
+        self._stores.move_to_end(key)
+        # The model of a cached store is in use
+        if model_name in self._models:
+            self._models.move_to_end(model_name)
+        return store
+
+    def drop_vector_stores(self, chat_id: str):
+        """Forget the open stores of a chat (e.g. deleted chat)"""
+        for key in [key for key in self._stores if key[0] == chat_id]:
+            del self._stores[key]
+        for key in [key for key in self._locks if isinstance(key, tuple) and key[0] == chat_id]:
+            del self._locks[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "models": {name: round(entry["size_mb"]) for name, entry in self._models.items()},
+            "vector_stores": len(self._stores),
+            "memory_budget_mb": self.memory_budget_mb
+        }
+
+
+# Global embedding registry
+embedding_registry = EmbeddingRegistry()
@@ -0,0 +1,73 @@
+# core/llm_client.py
+import asyncio
+from typing import Optional
+
+import httpx
+from groq import AsyncGroq, DefaultAsyncHttpxClient
+
+from config import LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_MAX_RETRIES
+from core.settings_manager import settings_manager
+
+
+class LLMClientService:
+    """Shared AsyncGroq client for all agents, one connection pool per API key"""
+
+    def __init__(self):
+        self._client: Optional[AsyncGroq] = None
+        self._api_key: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._closing = set()
+
+    async def get_client(self) -> AsyncGroq:
+        """Get the shared client, rebuilt only when the API key in the settings changed"""
+        api_key = settings_manager.get("api_key")
+        if not settings_manager.is_valid_api_key(api_key):
+            raise ValueError("Invalid or missing API key")
+
+        client = self._client
+        if client is not None and self._api_key == api_key:
+            return client
+
+        async with self._lock:
+            if self._client is None or self._api_key != api_key:
+                old_client = self._client
+                self._client = AsyncGroq(
+                    api_key=api_key,
+                    max_retries=LLM_MAX_RETRIES,
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=LLM_MAX_CONNECTIONS,
+                            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS
+                        )
+                    )
+                )
+                self._api_key = api_key
+                print("[LLM_CLIENT] Created shared AsyncGroq client")
+
+                # Requests in flight keep their own reference, the old pool is closed in the background
+                if old_client is not None:
+                    task = asyncio.create_task(self._close_client(old_client))
+                    self._closing.add(task)
+                    task.add_done_callback(self._closing.discard)
+
+            return self._client
+
+    async def _close_client(self, client: AsyncGroq):
+        """Close a replaced client once its requests had time to finish"""
+        await asyncio.sleep(600)
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"[LLM_CLIENT] Error closing replaced client: {e}")
+
+    async def close(self):
+        """Close the shared client (application shutdown)"""
+        async with self._lock:
+            if self._client is not None:
+                await self._client.close()
+            self._client = None
+            self._api_key = None
+
+
+# Global LLM client instance
+llm_client = LLMClientService()
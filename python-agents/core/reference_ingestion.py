@@ -0,0 +1,207 @@
+# core/reference_ingestion.py
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from config import (DATA_REFERENCES_DIR, RAG_CHUNK_SIZE, RAG_CHUNK_OVERLAP, RAG_EMBED_BATCH_SIZE,
+                    RAG_INGESTION_WORKERS)
+from core.embedding_registry import embedding_registry
+from core.settings_manager import settings_manager
+from utils.document_processor import UNIT_SEPARATORS, iter_text_units
+from ws_manager.manager import manager
+
+
+def chunk_id(source: str, text: str) -> str:
+    """Content address of a chunk, unchanged chunks keep their id when a document is uploaded again"""
+    return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()
+
+
+class ReferenceIngestionQueue:
+    """Indexes uploaded reference documents in the background
+
+    The files of a job are extracted in parallel threads and split with one
+    shared splitter while their pages are extracted, then embedded in batches of RAG_EMBED_BATCH_SIZE chunks.
+    Chunks already in the store of the chat are skipped, chunks of an older
+    version of a document are deleted.  Progress is sent on the
+    ``file_upload`` WebSocket route.
+    """
+
+    def __init__(self, workers: int = RAG_INGESTION_WORKERS, batch_size: int = RAG_EMBED_BATCH_SIZE):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=RAG_CHUNK_SIZE, chunk_overlap=RAG_CHUNK_OVERLAP)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        # chat id -> futures of the queued jobs of the chat
+        self._pending: Dict[str, set] = {}
+        self._chat_locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {"jobs": 0, "failed": 0, "chunks_added": 0, "chunks_skipped": 0, "chunks_deleted": 0}
+
+    async def start(self):
+        """Start the ingestion workers (application startup or first job)"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def enqueue(self, chat_id: str, files: List[Path], embedding_model_name: Optional[str] = None) -> asyncio.Future:
+        """Queue files of a chat for indexing, the future resolves to the result of the job"""
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(chat_id, set())
+        pending.add(future)
+        future.add_done_callback(pending.discard)
+        await self._queue.put((chat_id, [Path(f) for f in files], embedding_model_name, future))
+        return future
+
+    async def ingest(self, chat_id: str, files: List[Path], embedding_model_name: Optional[str] = None) -> Dict[str, Any]:
+        """Queue files and wait until they are indexed"""
+        return await (await self.enqueue(chat_id, files, embedding_model_name))
+
+    async def wait_for_chat(self, chat_id: str, timeout: float) -> bool:
+        """Wait for the queued jobs of a chat, False if they did not finish in time"""
+        pending = list(self._pending.get(chat_id, ()))
+        if not pending:
+            return True
+        _, not_done = await asyncio.wait(pending, timeout=timeout)
+        return not not_done
+
+    async def _worker(self):
+        while True:
+            chat_id, files, embedding_model_name, future = await self._queue.get()
+            try:
+                result = await self._ingest(chat_id, files, embedding_model_name)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"[INGESTION] Failed to index {[f.name for f in files]} for chat {chat_id}: {e}")
+                result = {"status": "failed", "error": str(e), "ingested_chunks": 0}
+                await self._send(chat_id, {
+                    "type": "reference_ingestion_failed",
+                    "file_names": [f.name for f in files],
+                    "error": str(e)
+                })
+            finally:
+                self._queue.task_done()
+            if not future.done():
+                future.set_result(result)
+
+    async def _ingest(self, chat_id: str, files: List[Path], embedding_model_name: Optional[str]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        model_name = embedding_registry.resolve_name(embedding_model_name or settings_manager.get("embedding_model"))
+        file_names = [f.name for f in files]
+        self.stats["jobs"] += 1
+        await self._send(chat_id, {
+            "type": "reference_ingestion_started",
+            "file_names": file_names,
+            "embedding_model": model_name
+        })
+
+        # Extract and split all files in parallel
+        file_chunks = await asyncio.gather(*(asyncio.to_thread(self._split_file, f) for f in files))
+        chunks: Dict[str, Dict[str, Any]] = {}
+        sources = []
+        for file_path, texts in zip(files, file_chunks):
+            if not texts:
+                print(f"[INGESTION] No text extracted from {file_path.name}")
+                continue
+            sources.append(file_path.name)
+            for i, chunk in enumerate(texts):
+                chunks.setdefault(chunk_id(file_path.name, chunk), {
+                    "text": chunk,
+                    "metadata": {"source": file_path.name, "chunk": i}
+                })
+
+        if chat_id not in self._chat_locks:
+            self._chat_locks[chat_id] = asyncio.Lock()
+        async with self._chat_locks[chat_id]:
+            chat_ref_dir = DATA_REFERENCES_DIR / chat_id
+            chat_ref_dir.mkdir(parents=True, exist_ok=True)
+            store = await embedding_registry.get_vector_store(chat_id, str(chat_ref_dir / "chroma"), model_name)
+
+            existing = set()
+            if sources:
+                found = await asyncio.to_thread(store.get, where={"source": {"$in": sources}}, include=[])
+                existing = set(found["ids"])
+            new_ids = [cid for cid in chunks if cid not in existing]
+            stale_ids = [cid for cid in existing if cid not in chunks]
+            if stale_ids:
+                await asyncio.to_thread(store.delete, ids=stale_ids)
+
+            # Embed the new chunks in batches
+            for start in range(0, len(new_ids), self.batch_size):
+                batch = new_ids[start:start + self.batch_size]
+                await asyncio.to_thread(
+                    store.add_texts,
+                    texts=[chunks[cid]["text"] for cid in batch],
+                    metadatas=[chunks[cid]["metadata"] for cid in batch],
+                    ids=batch
+                )
+                await self._send(chat_id, {
+                    "type": "reference_ingestion_progress",
+                    "file_names": file_names,
+                    "embedded_chunks": start + len(batch),
+                    "total_chunks": len(new_ids)
+                })
+
+        skipped = len(chunks) - len(new_ids)
+        self.stats["chunks_added"] += len(new_ids)
+        self.stats["chunks_skipped"] += skipped
+        self.stats["chunks_deleted"] += len(stale_ids)
+        result = {
+            "status": "completed",
+            "file_names": file_names,
+            "embedding_model": model_name,
+            "ingested_chunks": len(new_ids),
+            "skipped_chunks": skipped,
+            "deleted_chunks": len(stale_ids),
+            "elapsed_seconds": round(time.perf_counter() - started, 2)
+        }
+        print(f"[INGESTION] Indexed {file_names} for chat {chat_id}: {len(new_ids)} new, {skipped} unchanged, "
+              f"{len(stale_ids)} removed chunks in {result['elapsed_seconds']}s")
+        await self._send(chat_id, {"type": "reference_indexed", **result})
+        return result
+
+    def _split_file(self, file_path: Path) -> List[str]:
+        """Chunks of a document, split while the pages / paragraphs are extracted"""
+        separator = UNIT_SEPARATORS.get(file_path.suffix.lower(), "")
+        chunks: List[str] = []
+        buffer = ""
+        for unit in iter_text_units(file_path):
+            buffer = f"{buffer}{separator}{unit}" if buffer else unit
+            if len(buffer) >= RAG_CHUNK_SIZE * 16:
+                # The last chunk may continue in the next unit, it is split again with it
+                parts = self.splitter.split_text(buffer)
+                chunks.extend(parts[:-1])
+                buffer = parts[-1] if parts else ""
+        if buffer.strip():
+            chunks.extend(self.splitter.split_text(buffer))
+        return chunks
+
+    async def _send(self, chat_id: str, message: Dict[str, Any]):
+        try:
+            await manager.manager.send("file_upload", chat_id, {
+                **message,
+                "chat_id": chat_id,
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            })
+        except Exception as e:
+            print(f"[INGESTION] Error sending progress: {e}")
+
+    async def shutdown(self):
+        """Stop the workers (application shutdown), queued jobs are dropped"""
+        for task in self._worker_tasks:
+            task.cancel()
+        self._worker_tasks = []
+        self._queue = None
+
+
+# Global ingestion queue of reference documents
+reference_ingestion = ReferenceIngestionQueue()
@@ -0,0 +1,223 @@
+# core/tool_jobs.py
+import asyncio
+import contextvars
+import json
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from config import CHAT_DIR, TOOL_JOB_WORKERS, TOOL_JOBS_PER_USER
+from ws_manager.manager import manager
+
+JOBS_FOLDER = "tool_jobs"
+FINAL_STATUSES = {"completed", "failed", "cancelled", "interrupted"}
+
+# Job of the running tool call, agents report their progress to it
+_current_job: contextvars.ContextVar = contextvars.ContextVar("current_tool_job", default=None)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def report_progress(**progress):
+    """Update the progress of the tool job running in this task (no-op outside of a job)"""
+    job = _current_job.get()
+    if job is not None:
+        tool_jobs.update_progress(job, progress)
+
+
+class ToolJobManager:
+    """Runs the tool calls of the chats as background jobs
+
+    Each job has an ID and a state file in its chat folder
+    (tool_jobs/{job_id}.json).  Status changes and progress are sent on the
+    ``chat`` WebSocket route.  At most TOOL_JOBS_PER_USER jobs of a user and
+    TOOL_JOB_WORKERS jobs in total run at the same time, the other jobs wait
+    in submission order.
+    """
+
+    def __init__(self, max_running: int = TOOL_JOB_WORKERS, per_user: int = TOOL_JOBS_PER_USER):
+        self.max_running = max_running
+        self.per_user = per_user
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._user_slots: Dict[str, asyncio.Semaphore] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], Awaitable[Any]]] = []
+        self._closing = False
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], Awaitable[Any]]):
+        """Coroutine function called with every finished job"""
+        self._listeners.append(callback)
+
+    def submit(self, chat_id: str, user_id: Optional[str], tool_calls: List[Dict[str, Any]],
+               run: Callable[[], Awaitable[Dict[str, Any]]],
+               on_finished: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None) -> Dict[str, Any]:
+        """Queue the tool calls of a model turn, run() returns the agent result; returns a copy of the queued job"""
+        job = {
+            "job_id": uuid.uuid4().hex[:12],
+            "chat_id": chat_id,
+            "user_id": user_id or "anonymous",
+            "function_name": ", ".join(str(call.get("function_name")) for call in tool_calls),
+            "tool_calls": tool_calls,
+            "status": "queued",
+            "progress": {},
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        self.jobs[job["job_id"]] = job
+        self.stats["submitted"] += 1
+        self._save(job)
+        self._publish(job)
+        self._tasks[job["job_id"]] = asyncio.create_task(self._run(job, run, on_finished))
+        print(f"[JOBS] Queued {job['function_name']} job {job['job_id']} for chat {chat_id}")
+        return dict(job)
+
+    async def _run(self, job: Dict[str, Any], run: Callable[[], Awaitable[Dict[str, Any]]],
+                   on_finished: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]]):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_running)
+        user_slots = self._user_slots.setdefault(job["user_id"], asyncio.Semaphore(self.per_user))
+        try:
+            async with user_slots:
+                async with self._slots:
+                    self._set_status(job, "running", started_at=_now())
+                    _current_job.set(job)
+                    result = await run()
+            status = "failed" if result.get("status") == "failed" else "completed"
+            self._set_status(job, status, result=result, error=result.get("error") if status == "failed" else None)
+        except asyncio.CancelledError:
+            self._set_status(job, "interrupted" if self._closing else "cancelled")
+        except Exception as e:
+            print(f"[JOBS] Job {job['job_id']} failed: {e}")
+            self._set_status(job, "failed", error=str(e))
+        finally:
+            self._tasks.pop(job["job_id"], None)
+
+        for callback in ([on_finished] if on_finished else []) + self._listeners:
+            try:
+                await callback(dict(job))
+            except Exception as e:
+                print(f"[JOBS] Error in job callback: {e}")
+        # Finished jobs are read back from their state file
+        self.jobs.pop(job["job_id"], None)
+
+    def _set_status(self, job: Dict[str, Any], status: str, **fields):
+        job.update(fields, status=status)
+        if status in FINAL_STATUSES:
+            job["finished_at"] = _now()
+            if status in self.stats:
+                self.stats[status] += 1
+        self._save(job)
+        self._publish(job)
+        print(f"[JOBS] Job {job['job_id']} {status}")
+
+    def update_progress(self, job: Dict[str, Any], progress: Dict[str, Any]):
+        job["progress"].update(progress)
+        self._save(job)
+        self._publish(job)
+
+    def _publish(self, job: Dict[str, Any]):
+        try:
+            manager.manager.publish("chat", job["chat_id"], {
+                "type": "tool_job_update",
+                "chat_id": job["chat_id"],
+                "job": job,
+                "timestamp": _now()
+            })
+        except Exception as e:
+            print(f"[JOBS] Error sending job update: {e}")
+
+    @staticmethod
+    def _job_file(chat_id: str, job_id: str) -> Path:
+        return CHAT_DIR / chat_id / JOBS_FOLDER / f"{job_id}.json"
+
+    def _save(self, job: Dict[str, Any]):
+        """Atomic write of the job state, jobs of deleted chats are not saved"""
+        job_file = self._job_file(job["chat_id"], job["job_id"])
+        if not job_file.parent.parent.exists():
+            return
+        try:
+            job_file.parent.mkdir(exist_ok=True)
+            temp_file = job_file.with_suffix(".tmp")
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(job, f, indent=2, default=str)
+            temp_file.replace(job_file)
+        except Exception as e:
+            print(f"[JOBS] Error saving job {job['job_id']}: {e}")
+
+    @staticmethod
+    def _read(job_file: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(job_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """State of a job, jobs of earlier runs are read from their state file"""
+        if job_id in self.jobs:
+            return dict(self.jobs[job_id])
+        job_file = next(CHAT_DIR.glob(f"*/{JOBS_FOLDER}/{job_id}.json"), None)
+        return self._read(job_file) if job_file else None
+
+    def list_jobs(self, chat_id: str) -> List[Dict[str, Any]]:
+        """Jobs of a chat, oldest first"""
+        jobs = {}
+        for job_file in (CHAT_DIR / chat_id / JOBS_FOLDER).glob("*.json"):
+            job = self._read(job_file)
+            if job:
+                jobs[job["job_id"]] = job
+        for job_id, job in self.jobs.items():
+            if job["chat_id"] == chat_id:
+                jobs[job_id] = dict(job)
+        return sorted(jobs.values(), key=lambda job: job["created_at"])
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job and wait until it stopped, None if the job is unknown"""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return self.get(job_id)
+
+    async def cancel_chat(self, chat_id: str):
+        """Cancel the jobs of a chat (e.g. deleted chat)"""
+        for job_id in [job_id for job_id, job in self.jobs.items() if job["chat_id"] == chat_id]:
+            await self.cancel(job_id)
+
+    def recover(self):
+        """Mark the jobs left unfinished by a previous run of the server as interrupted"""
+        for job_file in CHAT_DIR.glob(f"*/{JOBS_FOLDER}/*.json"):
+            job = self._read(job_file)
+            if job and job.get("status") not in FINAL_STATUSES and job["job_id"] not in self.jobs:
+                job.update(status="interrupted", finished_at=_now())
+                self._save(job)
+
+    async def shutdown(self):
+        """Stop the running jobs (application shutdown), they are saved as interrupted"""
+        self._closing = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        statuses = [job["status"] for job in self.jobs.values()]
+        return {
+            **self.stats,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "max_running": self.max_running,
+            "per_user": self.per_user
+        }
+
+
+# Global tool job manager
+tool_jobs = ToolJobManager()
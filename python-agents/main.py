@@ -10,8 +10,17 @@ import shutil
 from pathlib import Path
 from ws_manager.manager import manager
 from core.chat_manager import ChatManager
+from core.conversation_index import conversation_index
 from core.settings_manager import settings_manager
-from config import WS_HOST, WS_PORT, CHAT_DIR, AVAILABLE_PROVIDERS, AVAILABLE_MODELS, EMBEDDING_MODELS
+from core.llm_client import llm_client
+from core.embedding_registry import embedding_registry
+from core.reference_ingestion import reference_ingestion
+from core.tool_jobs import tool_jobs
+from utils.notebook_cache import notebook_cache
+from utils.kernel_pool import kernel_pool
+from utils.python_worker_pool import python_worker_pool
+from utils.document_processor import shutdown_process_pool
+from config import WS_HOST, WS_PORT, CHAT_DIR, AVAILABLE_PROVIDERS, AVAILABLE_MODELS, EMBEDDING_MODELS, TOOL_JOB_USER_HEADER
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'websocket'))
@@ -48,14 +57,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-async def execute_complete_notebook(notebook_path: str) -> bool:
+async def execute_complete_notebook(notebook_path: str, force: bool = False) -> bool:
+    """Execute the notebook unless its outputs belong to its current code and datasets"""
+    notebook_file = Path(notebook_path)
+    if not notebook_file.exists():
+        print(f"[NOTEBOOK] File not found: {notebook_path}")
+        return False
+
+    # Concurrent requests for the same notebook wait for one execution
+    async with notebook_cache.lock(notebook_path):
+        if not force and notebook_cache.is_fresh(notebook_path):
+            print(f"[NOTEBOOK] Unchanged, serving cached outputs: {notebook_file.name}")
+            return True
+        return await _execute_notebook(notebook_path)
+
+
+async def _execute_notebook(notebook_path: str) -> bool:
     """Clear all outputs then execute all cells in notebook using nbclient for proper context and outputs"""
     try:
         notebook_file = Path(notebook_path)
-        if not notebook_file.exists():
-            print(f"[NOTEBOOK] File not found: {notebook_path}")
-            return False
-
         print(f"[NOTEBOOK] Starting execution of: {notebook_file.name}")
         
         # Read the notebook
@@ -94,9 +114,11 @@ async def execute_complete_notebook(notebook_path: str) -> bool:
         
         print(f"[NOTEBOOK] Execution completed: {notebook_file.name}")
 
-        # Save the executed notebook with fresh outputs
+        # Save the executed notebook with fresh outputs and their execution key
+        execution = notebook_cache.mark_executed(nb, notebook_path)
         with open(notebook_file, 'w', encoding='utf-8') as f:
             nbformat.write(nb, f)
+        notebook_cache.remember(notebook_path, execution)
             
         print(f"[NOTEBOOK] Saved with fresh outputs: {notebook_file.name}")
         return True
@@ -108,9 +130,9 @@ async def execute_complete_notebook(notebook_path: str) -> bool:
         return False
 
 
-# FIXED: Always re-execute notebook once before broadcasting
+# Execute the notebook (if it changed) before broadcasting
 async def broadcast_notebook_created(chat_id: str):
-    """Always re-execute notebook completely then broadcast to UI clients"""
+    """Execute the notebook if its code or datasets changed, then broadcast to UI clients"""
     try:
         folder = CHAT_DIR / chat_id
         notebooks = list(folder.glob("analysis_*.ipynb"))
@@ -121,9 +143,10 @@ async def broadcast_notebook_created(chat_id: str):
         latest_notebook = max(notebooks, key=lambda p: p.stat().st_mtime)
         notebook_path = str(latest_notebook)
         
-        print(f"[NOTEBOOK] Re-executing notebook: {latest_notebook.name}")
+        print(f"[NOTEBOOK] Checking notebook: {latest_notebook.name}")
+        conversation_index.refresh_counts(chat_id)
         
-        # ALWAYS re-execute the notebook (no conditions)
+        # Executed only if the code cells or the referenced datasets changed
         execution_success = await execute_complete_notebook(notebook_path)
         
         if execution_success:
@@ -156,9 +179,113 @@ async def broadcast_notebook_created(chat_id: str):
         import traceback
         traceback.print_exc()
 
+# Lifecycle of the shared components: one handler each, an error in one
+# handler does not keep the others from running (Starlette stops at the first error)
+@app.on_event("startup")
+async def start_kernel_pool():
+    """Start the pre-warmed Jupyter kernels of the analyses"""
+    try:
+        await kernel_pool.start()
+    except Exception as e:
+        print(f"[STARTUP] Kernel pool failed to start: {e}")
+
+@app.on_event("startup")
+async def start_python_workers():
+    """Start the pre-warmed Python workers of the metadata agent"""
+    try:
+        await python_worker_pool.start()
+    except Exception as e:
+        print(f"[STARTUP] Python workers failed to start: {e}")
+
+@app.on_event("startup")
+async def start_reference_ingestion():
+    """Start the indexing workers of the reference documents"""
+    try:
+        await reference_ingestion.start()
+    except Exception as e:
+        print(f"[STARTUP] Reference ingestion failed to start: {e}")
+
+@app.on_event("shutdown")
+async def stop_tool_jobs():
+    """Stop the running tool jobs first, they use the LLM client, kernels and workers"""
+    try:
+        await tool_jobs.shutdown()
+    except Exception as e:
+        print(f"[SHUTDOWN] Error stopping tool jobs: {e}")
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    """Close the pooled connections of the shared LLM client"""
+    try:
+        await llm_client.close()
+    except Exception as e:
+        print(f"[SHUTDOWN] Error closing LLM client: {e}")
+
+@app.on_event("shutdown")
+async def close_conversation_index():
+    """Close the SQLite conversation index"""
+    try:
+        conversation_index.close()
+    except Exception as e:
+        print(f"[SHUTDOWN] Error closing conversation index: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_kernel_pool():
+    """Shut down the Jupyter kernels"""
+    try:
+        await kernel_pool.shutdown()
+    except Exception as e:
+        print(f"[SHUTDOWN] Error shutting down kernels: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_python_workers():
+    """Kill the Python workers"""
+    try:
+        await python_worker_pool.shutdown()
+    except Exception as e:
+        print(f"[SHUTDOWN] Error shutting down Python workers: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_reference_ingestion():
+    """Stop the indexing workers"""
+    try:
+        await reference_ingestion.shutdown()
+    except Exception as e:
+        print(f"[SHUTDOWN] Error stopping reference ingestion: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_extraction_processes():
+    """Stop the text extraction processes"""
+    try:
+        shutdown_process_pool()
+    except Exception as e:
+        print(f"[SHUTDOWN] Error stopping extraction processes: {e}")
+
 # Initialize chat manager (will use dynamic settings)
 chat_manager = ChatManager()
 
+async def on_tool_job_finished(job: Dict[str, Any]):
+    """Update the chat clients after a background tool job"""
+    conversation_index.refresh_counts(job["chat_id"])
+    ran_analysis = any(call["function_name"] == "full_dataset_analysis" for call in job["tool_calls"])
+    if ran_analysis and (CHAT_DIR / job["chat_id"]).exists():
+        # The analysis notebook is new or changed
+        await broadcast_notebook_created(job["chat_id"])
+
+@app.on_event("startup")
+async def start_tool_jobs():
+    """Mark the jobs of a previous run as interrupted, update the chats after each job"""
+    try:
+        tool_jobs.recover()
+        tool_jobs.add_listener(on_tool_job_finished)
+    except Exception as e:
+        print(f"[STARTUP] Tool jobs failed to start: {e}")
+
+@app.on_event("shutdown")
+async def compact_conversations():
+    """Fold the message journals into the conversation snapshots"""
+    chat_manager.compact_all()
+
 # Pydantic models
 class ChatRequest(BaseModel):
     chat_id: Optional[str] = None
@@ -171,6 +298,7 @@ class SettingsUpdate(BaseModel):
     model: Optional[str] = None
     temperature: Optional[float] = None
     top_p: Optional[float] = None
+    stream: Optional[bool] = None
     embedding_model: Optional[str] = None
     system_instructions: Optional[str] = None
     web_search_enabled: Optional[bool] = None
@@ -307,6 +435,7 @@ async def upload_reference(chat_id: str = Form(...), file: UploadFile = File(...
         # Add hidden message for reference document context
         hidden_content = f"[REFERENCE_DOC]:{str(path)}"
         message = chat_manager.add_message(chat_id, "system", hidden_content, hidden=True)
+        conversation_index.refresh_counts(chat_id)
         
         await manager.manager.send("file_upload", chat_id, {
             "type": "reference_uploaded",
@@ -318,11 +447,15 @@ async def upload_reference(chat_id: str = Form(...), file: UploadFile = File(...
             "message": f"{file.filename} uploaded for reference",
             "message_id": message["id"]
         })
+
+        # Index in the background, progress is sent on the file_upload route
+        await reference_ingestion.enqueue(chat_id, [path])
         
         return {
             "filename": file.filename,
             "chat_id": chat_id,
             "file_size": file_size,
+            "indexing": True,
             "message": f"Reference document {file.filename} uploaded successfully"
         }
         
@@ -398,8 +531,12 @@ async def chat_endpoint(request: Request):
             hidden_content = "[WEB_SEARCH_ENABLED]:Use web search agent tool for this response"
             chat_manager.add_message(chat_id, "system", hidden_content, hidden=True)
         
-        # Process user message with current settings
-        result = await chat_manager.process_user_message(chat_id, chat_req.message)
+        # Process user message with current settings, tool calls continue as background jobs
+        # Key of the per-user job limit: never a value the client chooses itself
+        user_id = request.headers.get(TOOL_JOB_USER_HEADER) if TOOL_JOB_USER_HEADER else None
+        user_id = user_id or (request.client.host if request.client else None)
+        result = await chat_manager.process_user_message(chat_id, chat_req.message, user_id)
+        conversation_index.refresh_counts(chat_id)
 
         # FIXED: Always re-execute notebooks when detected
         try:
@@ -408,7 +545,7 @@ async def chat_endpoint(request: Request):
                 notebooks = list(folder.glob("analysis_*.ipynb"))
                 if notebooks:
                     print(f"[NOTEBOOK] Found {len(notebooks)} notebooks for chat {chat_id}")
-                    # Always broadcast and re-execute (no time conditions)
+                    # Broadcast, the notebook is executed only if it changed
                     await broadcast_notebook_created(chat_id)
         except Exception as e:
             print(f"[NOTEBOOK] Error checking for notebooks: {e}")
@@ -438,12 +575,12 @@ async def chat_endpoint(request: Request):
 
         # Build response based on result type
         response = {"chat_id": chat_id}
-        if result.get("type") == "tool_call_processed":
+        if result.get("type") == "tool_call_queued":
             response.update({
-                "response_type": "tool_call",
+                "response_type": "tool_call_queued",
                 "tool_call": result["tool_call_message"]["content"],
-                "agent_result": result["agent_response"]["content"],
-                "agent_details": result["agent_metadata"]
+                "job_id": result["job"]["job_id"],
+                "job_status": result["job"]["status"]
             })
         elif result.get("type") == "confirmation_requested":
             response.update({
@@ -512,10 +649,17 @@ async def delete_chat(chat_id: str):
         raise HTTPException(status_code=404, detail="Chat not found")
         
     try:
+        # Shut down the kernels of the chat's analyses
+        for notebook in folder.glob("analysis_*.ipynb"):
+            await kernel_pool.release(str(notebook.resolve()))
+        embedding_registry.drop_vector_stores(chat_id)
+        await tool_jobs.cancel_chat(chat_id)
+
         shutil.rmtree(folder)
         
         # Remove from chat_manager memory
         chat_manager.cleanup_conversation(chat_id)
+        conversation_index.remove(chat_id)
         
         # Broadcast deletion to all clients
         await manager.manager.send("global", None, {
@@ -538,9 +682,32 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
         "api_key_configured": settings_manager.is_valid_api_key(),
-        "settings_version": settings_manager.get("version", "unknown")
+        "settings_version": settings_manager.get("version", "unknown"),
+        "tool_jobs": tool_jobs.get_stats()
     }
 
+# Background tool jobs
+@app.get("/api/jobs/{job_id}")
+async def get_tool_job(job_id: str):
+    """Status, progress and result of a tool job"""
+    job = tool_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/chat/{chat_id}/jobs")
+async def list_tool_jobs(chat_id: str):
+    """Tool jobs of a chat, oldest first"""
+    return {"chat_id": chat_id, "jobs": tool_jobs.list_jobs(chat_id)}
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_tool_job(job_id: str):
+    """Cancel a queued or running tool job"""
+    job = await tool_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job_id, "status": job["status"]}
+
 # WebSocket endpoints
 @app.websocket("/ws/{chat_id}")
 async def websocket_chat(websocket: WebSocket, chat_id: str):
@@ -594,21 +761,21 @@ async def websocket_notebook(websocket: WebSocket, chat_id: str):
         
         if notebooks:
             latest_notebook = max(notebooks, key=lambda p: p.stat().st_mtime)
-            await websocket.send_text(json.dumps({
+            await manager.manager.send_to_connection(websocket, {
                 "type": "notebook_found",
                 "chat_id": chat_id,
                 "notebook_path": str(latest_notebook),
                 "notebook_name": latest_notebook.name,
                 "has_notebook": True,
                 "created_at": datetime.datetime.fromtimestamp(latest_notebook.stat().st_mtime).isoformat()
-            }))
+            })
         else:
-            await websocket.send_text(json.dumps({
+            await manager.manager.send_to_connection(websocket, {
                 "type": "no_notebook_found",
                 "chat_id": chat_id,
                 "has_notebook": False,
                 "message": "No notebook available for this conversation"
-            }))
+            })
         
         while True:
             await websocket.receive_text()
@@ -620,11 +787,36 @@ async def websocket_notebook(websocket: WebSocket, chat_id: str):
         manager.disconnect(websocket, chat_id, route)
         await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
 
+def _history_message(chat_id: str, since: Optional[int] = None) -> Dict[str, Any]:
+    """Full history (history_update) or the messages after seq `since` (history_resume)"""
+    conversation = chat_manager.conversations[chat_id]
+    chat_history = conversation["chat_history"]
+    last_seq = len(chat_history) - 1
+    if since is not None and -1 <= since <= last_seq:
+        return {
+            "type": "history_resume",
+            "chat_id": chat_id,
+            "from_seq": since + 1,
+            "seq": last_seq,
+            "messages": chat_history[since + 1:]
+        }
+    return {
+        "type": "history_update",
+        "chat_id": chat_id,
+        "seq": last_seq,
+        "history": conversation
+    }
+
 @app.websocket("/ws/{chat_id}/history")
-async def websocket_history(websocket: WebSocket, chat_id: str):
+async def websocket_history(websocket: WebSocket, chat_id: str, since: Optional[int] = None):
+    """History of a chat: a snapshot (or the messages after ?since=<seq>), then history_delta messages.
+
+    Each message has a sequence number (its position in the history). Clients can send
+    {"type": "resume", "since": <seq>} after a gap, or {"type": "snapshot"}.
+    """
     route = "history"
     file_path = CHAT_DIR / chat_id / "main_conversation.json"
-    if not file_path.exists():
+    if not file_path.exists() or not chat_manager.load_conversation(chat_id):
         await websocket.accept()
         await websocket.send_text(json.dumps({
             "type": "no_history",
@@ -635,14 +827,19 @@ async def websocket_history(websocket: WebSocket, chat_id: str):
         
     await manager.connect(websocket, chat_id, route)
     try:
+        # Queued right after registration: deltas of later messages follow the snapshot
+        await manager.manager.send_to_connection(websocket, _history_message(chat_id, since))
         while True:
-            content = json.loads(file_path.read_text(encoding="utf-8"))
-            await manager.manager.send(route, chat_id, {
-                "type": "history_update",
-                "chat_id": chat_id,
-                "history": content
-            })
-            await websocket.receive_text()
+            try:
+                request = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(request, dict) or chat_id not in chat_manager.conversations:
+                continue
+            if request.get("type") == "resume" and isinstance(request.get("since"), int):
+                await manager.manager.send_to_connection(websocket, _history_message(chat_id, request["since"]))
+            elif request.get("type") == "snapshot":
+                await manager.manager.send_to_connection(websocket, _history_message(chat_id))
     except WebSocketDisconnect:
         manager.disconnect(websocket, chat_id, route)
     except Exception:
@@ -651,97 +848,27 @@ async def websocket_history(websocket: WebSocket, chat_id: str):
 
 # ✅ FIXED: Get all conversations with enhanced metadata
 @app.get("/api/conversations")
-async def list_conversations():
-    """List all conversations with metadata"""
+async def list_conversations(limit: Optional[int] = None, offset: int = 0):
+    """List conversations with metadata from the conversation index (newest first)"""
+    if (limit is not None and limit < 0) or offset < 0:
+        raise HTTPException(status_code=400, detail="limit and offset must not be negative")
     try:
-        if not CHAT_DIR.exists():
-            return {"conversations": [], "total_experiments": 0, "total_datasets": 0}
-
-        conversations = []
-        total_experiments = 0
-        total_datasets = 0
-
-        for chat_dir in CHAT_DIR.iterdir():
-            if not chat_dir.is_dir():
-                continue
-
-            chat_id = chat_dir.name
-            title = None
-            created_at = None
-
-            # Count experiments (notebooks) - ONLY in this chat's folder
-            notebooks = list(chat_dir.glob("analysis_*.ipynb"))
-            notebook_count = len(notebooks)
-
-            # Count user datasets (exclude system files)
-            csv_files = list(chat_dir.glob("*.csv"))
-            xlsx_files = list(chat_dir.glob("*.xlsx"))
-            
-            user_json_files = [f for f in chat_dir.glob("*.json") 
-                               if f.name not in ("main_conversation.json",) 
-                               and not f.name.startswith(("agent_", "metadata_agent_", "full_analysis_agent_"))]
-
-            dataset_count = len(csv_files) + len(xlsx_files) + len(user_json_files)
-
-            total_experiments += notebook_count
-            total_datasets += dataset_count
-
-            # Get chat metadata
-            main_conversation_path = chat_dir / "main_conversation.json"
-            if main_conversation_path.exists():
-                try:
-                    content = json.loads(main_conversation_path.read_text(encoding="utf-8"))
-                    chat_history = content.get("chat_history", [])
-                    
-                    # Find first non-hidden user message for title
-                    for msg in chat_history:
-                        if (msg.get("role") in ("user", "human") and 
-                            not msg.get("hidden", False) and
-                            isinstance(msg.get("content"), str) and 
-                            msg["content"].strip()):
-                            title = msg["content"].strip()
-                            break
-                            
-                    created_at = content.get("created_at")
-                except Exception:
-                    pass
-
-            # Generate fallback title and timestamp
-            if not title:
-                title = f"Chat {chat_id[:8]}"
-            if not created_at:
-                try:
-                    stat = chat_dir.stat()
-                    timestamp = getattr(stat, "st_mtime", stat.st_ctime)
-                    created_at = datetime.datetime.fromtimestamp(timestamp).isoformat()
-                except Exception:
-                    created_at = datetime.datetime.now().isoformat()
-
-            conversations.append({
-                "id": chat_id,
-                "title": title,
-                "created_at": created_at,
-                "has_notebook": notebook_count > 0,
-                "notebook_count": notebook_count,
-                "dataset_count": dataset_count,
-                "focusMode": "webSearch"
-            })
-
-        # Sort conversations by creation date (newest first)
-        conversations.sort(key=lambda x: x["created_at"], reverse=True)
-
-        return {
-            "conversations": conversations,
-            "total_experiments": total_experiments,
-            "total_datasets": total_datasets
-        }
-
+        return conversation_index.list(limit=limit, offset=offset)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list conversations: {str(e)}")
 
+@app.post("/api/conversations/rebuild_index")
+async def rebuild_conversation_index():
+    """Rebuild the conversation index from the chat folders"""
+    try:
+        count = await asyncio.to_thread(conversation_index.rebuild)
+        return {"message": "Conversation index rebuilt", "conversations": count}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild conversation index: {str(e)}")
+
 @app.get("/api/conversation/{chat_id}/notebook")
 async def get_conversation_notebook(chat_id: str):
-    """Get notebook content for a specific conversation - ALWAYS RE-EXECUTE FIRST"""
+    """Get notebook content for a specific conversation, executed first if it changed"""
     # Ensure we only look in this chat's specific folder
     folder = CHAT_DIR / chat_id
     if not folder.exists():
@@ -755,9 +882,9 @@ async def get_conversation_notebook(chat_id: str):
     latest_notebook = max(notebooks, key=lambda p: p.stat().st_mtime)
     notebook_path = str(latest_notebook)
     
-    print(f"[NOTEBOOK] Request for notebook {latest_notebook.name} - re-executing first")
+    print(f"[NOTEBOOK] Request for notebook {latest_notebook.name}")
     
-    # ALWAYS re-execute before serving
+    # Unchanged notebooks are served with their last executed outputs
     execution_success = await execute_complete_notebook(notebook_path)
     
     if not execution_success:
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+# The modules of the backend are imported from the python-agents folder (e.g. "from config import ...")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
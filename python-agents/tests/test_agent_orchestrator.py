@@ -0,0 +1,116 @@
+# tests/test_agent_orchestrator.py
+import asyncio
+import time
+
+import pytest
+
+# The agents need the full requirements (LangChain, Chroma, ...)
+orchestrator_module = pytest.importorskip("core.agent_orchestrator")
+AgentOrchestrator = orchestrator_module.AgentOrchestrator
+
+
+class SlowAgent:
+    """Agent answering after a delay, records the calls running at the same time"""
+
+    def __init__(self, delay: float, name: str):
+        self.delay = delay
+        self.name = name
+        self.running = 0
+        self.peak = 0
+
+    async def _answer(self, tool_call):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return {"agent_id": self.name, "status": "completed", "summary": f"{self.name} {tool_call['id']}"}
+
+    async def process_tool_call(self, tool_call, parent_chat_id=None):
+        return await self._answer(tool_call)
+
+    async def process(self, tool_call, parent_chat_id=None):
+        return await self._answer(tool_call)
+
+    def is_enabled(self):
+        return True
+
+
+def _orchestrator(metadata=0.0, analysis=0.0, web_search=0.0):
+    """Orchestrator with stand-in agents (the real agents need an LLM and kernels)"""
+    orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+    orchestrator.metadata_agent = SlowAgent(metadata, "metadata")
+    orchestrator.full_analysis_agent = SlowAgent(analysis, "analysis")
+    orchestrator.web_search_agent = SlowAgent(web_search, "web_search")
+    orchestrator.rag_agent = None
+    orchestrator._analysis_locks = {}
+    return orchestrator
+
+
+def _call(call_id, name):
+    return {"id": call_id, "function_name": name, "arguments": {}}
+
+
+def test_calls_run_concurrently_in_call_order():
+    orchestrator = _orchestrator(metadata=0.2, web_search=0.1)
+    calls = [_call("1", "dataset_metadata_analysis"), _call("2", "web_search"), _call("3", "unknown_tool")]
+
+    started = time.perf_counter()
+    results = asyncio.run(orchestrator.process_tool_calls(calls, "chat"))
+    elapsed = time.perf_counter() - started
+
+    assert [result["summary"] for result in results[:2]] == ["metadata 1", "web_search 2"]
+    assert results[2]["status"] == "failed"
+    assert elapsed < 0.3
+
+
+def test_timeout_gives_partial_merged_result(monkeypatch):
+    monkeypatch.setattr(orchestrator_module, "TOOL_CALL_TIMEOUTS", {"web_search": 0.1})
+    orchestrator = _orchestrator(web_search=5)
+    calls = [_call("1", "dataset_metadata_analysis"), _call("2", "web_search")]
+
+    results = asyncio.run(orchestrator.process_tool_calls(calls, "chat"))
+    merged = orchestrator.merge_results(results)
+
+    assert results[0]["status"] == "completed"
+    assert results[1]["status"] == "failed" and "timed out" in results[1]["error"]
+    # Failed only if every call failed
+    assert merged["status"] == "completed"
+    assert "metadata 1" in merged["summary"] and "timed out" in merged["summary"]
+    assert "web_search timed out" in merged["error"]
+    assert merged["results"] == results
+
+
+def test_merge_results_all_failed():
+    merged = AgentOrchestrator.merge_results([
+        {"status": "failed", "error": "a"},
+        {"status": "failed", "error": "b"}
+    ])
+    assert merged["status"] == "failed"
+    assert merged["error"] == "a; b"
+
+
+def test_analyses_of_a_chat_wait_outside_the_timeout(monkeypatch):
+    """Analyses of one chat run one after another, the wait for the lock does not count toward the timeout"""
+    monkeypatch.setattr(orchestrator_module, "TOOL_CALL_TIMEOUTS", {"full_dataset_analysis": 0.3})
+    orchestrator = _orchestrator(analysis=0.2)
+    calls = [_call(str(i), "full_dataset_analysis") for i in range(3)]
+
+    results = asyncio.run(orchestrator.process_tool_calls(calls, "chat"))
+
+    assert [result["status"] for result in results] == ["completed"] * 3
+    assert orchestrator.full_analysis_agent.peak == 1
+
+
+def test_analyses_of_different_chats_run_concurrently():
+    orchestrator = _orchestrator(analysis=0.1)
+
+    async def scenario():
+        return await asyncio.gather(
+            orchestrator.process_tool_calls([_call("1", "full_dataset_analysis")], "chat-a"),
+            orchestrator.process_tool_calls([_call("1", "full_dataset_analysis")], "chat-b")
+        )
+
+    asyncio.run(scenario())
+    assert orchestrator.full_analysis_agent.peak == 2
@@ -0,0 +1,107 @@
+# tests/test_chat_manager.py
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+# The chat manager needs the full requirements (LangChain, Chroma, ...)
+chat_manager_module = pytest.importorskip("core.chat_manager")
+from core.agent_orchestrator import AgentOrchestrator  # noqa: E402
+
+CHAT_ID = "chat-1"
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Follow-up answer"))])
+
+
+class FakeOrchestrator:
+    merge_results = staticmethod(AgentOrchestrator.merge_results)
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit_tool_calls(self, calls, parent_chat_id, user_id=None, on_finished=None, combine=None):
+        self.submitted.append({"calls": calls, "combine": combine})
+        return {"job_id": "job-1", "status": "queued"}
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    """Chat manager with one conversation in memory, a fake LLM client and no disk writes"""
+    manager = chat_manager_module.ChatManager.__new__(chat_manager_module.ChatManager)
+    manager.conversations = {CHAT_ID: {
+        "system_instructions": {"role": "system", "content": "You are helpful"},
+        "chat_history": [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Hi"},
+            {"role": "user", "content": "Analyze data.csv"}
+        ]
+    }}
+    manager.agent_orchestrator = FakeOrchestrator()
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    async def get_client():
+        return client
+
+    def add_message(chat_id, role, content, **fields):
+        message = {"role": role, "content": content, **fields}
+        manager.conversations[chat_id]["chat_history"].append(message)
+        return message
+
+    monkeypatch.setattr(manager, "_get_client", get_client)
+    monkeypatch.setattr(manager, "add_message", add_message)
+    monkeypatch.setattr(manager, "_augment_system_instructions", lambda chat_id, base: base)
+    monkeypatch.setattr(chat_manager_module.settings_manager, "get_model_config",
+                        lambda: {"model": "test-model", "temperature": 0, "top_p": 1})
+    return manager, completions
+
+
+def test_answer_uses_the_history_at_submit_time(chat):
+    manager, completions = chat
+    tool_calls = [
+        {"id": "call_a", "name": "dataset_metadata_analysis", "arguments": json.dumps({"file_path": "data.csv"})},
+        {"id": "call_b", "name": "web_search", "arguments": ""}
+    ]
+
+    queued = asyncio.run(manager._handle_tool_calls(CHAT_ID, tool_calls, "user"))
+    assert queued["type"] == "tool_call_queued"
+    submitted = manager.agent_orchestrator.submitted[0]
+    assert [call["arguments"] for call in submitted["calls"]] == [{"file_path": "data.csv"}, {}]
+
+    # The user goes on chatting while the job runs
+    manager.add_message(CHAT_ID, "user", "Any news?")
+    manager.add_message(CHAT_ID, "assistant", "Still working")
+
+    results = [{"status": "completed", "summary": "3 columns"}, {"status": "failed", "error": "offline"}]
+    merged = asyncio.run(submitted["combine"](results))
+
+    messages = completions.requests[0]["messages"]
+    assert [message["content"] for message in messages[:4]] == ["You are helpful", "Hello", "Hi", "Analyze data.csv"]
+    assert messages[4]["role"] == "assistant"
+    assert [call["id"] for call in messages[4]["tool_calls"]] == ["call_a", "call_b"]
+    assert messages[5:] == [
+        {"role": "tool", "tool_call_id": "call_a", "content": "3 columns"},
+        {"role": "tool", "tool_call_id": "call_b", "content": "Tool failed: offline"}
+    ]
+    assert merged["summary"] == "Follow-up answer"
+    assert merged["status"] == "completed"
+
+
+def test_failed_follow_up_keeps_the_joined_results(chat):
+    manager, completions = chat
+
+    async def failing_create(**kwargs):
+        raise RuntimeError("rate limited")
+
+    completions.create = failing_create
+    calls = [{"id": "call_a", "function_name": "web_search", "arguments": {}}]
+    merged = asyncio.run(manager._answer_with_tool_results(CHAT_ID, calls, [{"status": "completed", "summary": "x"}], 3))
+    assert merged["summary"] == "x"
@@ -0,0 +1,108 @@
+# tests/test_dataset_profiler.py
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from utils.dataset_profiler import DatasetProfiler
+
+CHUNK_ROWS = 100
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    return DatasetProfiler(cache_dir=tmp_path / "profiles", chunk_rows=CHUNK_ROWS)
+
+
+@pytest.fixture
+def frame():
+    """Rows over several chunks with nulls, duplicate rows and a column that only appears after the first chunk"""
+    rows = []
+    for i in range(350):
+        row = {"id": i % 300, "value": None if i % 7 == 0 else i * 0.5, "name": f"name-{i % 300}"}
+        if i >= 250:
+            row["late"] = i
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _check_against_pandas(profile, frame):
+    assert profile["rows"] == len(frame)
+    assert profile["duplicate_rows"] == int(frame.duplicated().sum())
+    columns = {column["name"]: column for column in profile["column_profiles"]}
+    assert set(columns) == set(frame.columns)
+    for name in frame.columns:
+        assert columns[name]["nulls"] == int(frame[name].isna().sum()), name
+        if pd.api.types.is_numeric_dtype(frame[name]):
+            assert columns[name]["mean"] == pytest.approx(frame[name].mean()), name
+            assert columns[name]["std"] == pytest.approx(frame[name].std()), name
+            assert columns[name]["min"] == pytest.approx(frame[name].min()), name
+            assert columns[name]["max"] == pytest.approx(frame[name].max()), name
+
+
+def test_csv(profiler, frame, tmp_path):
+    path = tmp_path / "data.csv"
+    frame.to_csv(path, index=False)
+    _check_against_pandas(profiler.profile(str(path)), pd.read_csv(path))
+
+
+def test_json_lines(profiler, frame, tmp_path):
+    path = tmp_path / "data.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for record in frame.to_dict(orient="records"):
+            f.write(json.dumps({k: v for k, v in record.items() if not pd.isna(v)}) + "\n")
+    _check_against_pandas(profiler.profile(str(path)), pd.read_json(path, lines=True))
+
+
+def test_json_array(profiler, frame, tmp_path):
+    path = tmp_path / "data.json"
+    records = [{k: v for k, v in record.items() if not pd.isna(v)} for record in frame.to_dict(orient="records")]
+    path.write_text(json.dumps(records), encoding="utf-8")
+    profile = profiler.profile(str(path))
+    _check_against_pandas(profile, pd.read_json(path))
+    late = next(column for column in profile["column_profiles"] if column["name"] == "late")
+    assert late["nulls"] == 250
+
+
+def test_xlsx(profiler, frame, tmp_path):
+    pytest.importorskip("openpyxl")
+    path = tmp_path / "data.xlsx"
+    frame.to_excel(path, index=False)
+    _check_against_pandas(profiler.profile(str(path)), pd.read_excel(path))
+
+
+def test_profile_is_cached(profiler, frame, tmp_path):
+    path = tmp_path / "data.csv"
+    frame.to_csv(path, index=False)
+    assert profiler.profile(str(path))["cached"] is False
+    assert profiler.profile(str(path))["cached"] is True
+    # A new profiler reads the profile of the same content from disk
+    other = DatasetProfiler(cache_dir=profiler.cache_dir, chunk_rows=CHUNK_ROWS)
+    assert other.profile(str(path))["cached"] is True
+
+
+def test_json_array_items_over_block_boundaries(profiler, tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.dataset_profiler.JSON_READ_SIZE", 7)
+    items = [123456, {"a": [1, 2, {"b": "x, ]"}]}, "text", 1.5, None, True]
+    path = tmp_path / "items.json"
+    path.write_text(" [ " + " , ".join(json.dumps(item) for item in items) + " ] ", encoding="utf-8")
+    assert list(profiler._iter_json_array(path)) == items
+
+
+def test_json_array_parse_is_linear(profiler, tmp_path):
+    """A large array parses in about the time of pd.read_json (it was quadratic in the buffer size)"""
+    path = tmp_path / "large.json"
+    records = [{"id": i, "name": f"name-{i}", "value": i * 1.5} for i in range(200_000)]
+    path.write_text(json.dumps(records), encoding="utf-8")
+
+    started = time.perf_counter()
+    pd.read_json(path)
+    pandas_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    count = sum(1 for _ in profiler._iter_json_array(path))
+    parse_time = time.perf_counter() - started
+
+    assert count == len(records)
+    assert parse_time < max(5 * pandas_time, 3.0)
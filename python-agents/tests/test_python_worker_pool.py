@@ -0,0 +1,55 @@
+# tests/test_python_worker_pool.py
+import asyncio
+
+import pytest
+
+from utils.python_worker_pool import PythonWorkerPool
+
+
+def test_run_and_recycle():
+    async def scenario():
+        pool = PythonWorkerPool(size=1, max_jobs=2, preload=[])
+        code = "import os\nprint(os.getpid())"
+        try:
+            pids = [(await pool.run(code))["stdout"].strip() for _ in range(3)]
+        finally:
+            await pool.shutdown()
+        return pool, pids
+
+    pool, pids = asyncio.run(scenario())
+    # Each job has a fresh namespace in the same process, the process is recycled after max_jobs
+    assert pids[0] == pids[1] != pids[2]
+    assert pool.stats["recycled"] == 1
+
+
+def test_timeout_replaces_worker():
+    async def scenario():
+        pool = PythonWorkerPool(size=1, preload=[])
+        try:
+            timed_out = await pool.run("import time; time.sleep(30)", timeout=1)
+            after = await pool.run("print('ok')")
+        finally:
+            await pool.shutdown()
+        return timed_out, after
+
+    timed_out, after = asyncio.run(scenario())
+    assert not timed_out["success"] and "timed out" in timed_out["stderr"]
+    assert after["stdout"].strip() == "ok"
+
+
+def test_cancelled_caller_does_not_lose_the_worker():
+    async def scenario():
+        pool = PythonWorkerPool(size=1, preload=[])
+        try:
+            for _ in range(2):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(pool.run("import time; time.sleep(30)", timeout=60), 1)
+            result = await asyncio.wait_for(pool.run("print('ok')"), 30)
+            live = pool._live
+        finally:
+            await pool.shutdown()
+        return result, live
+
+    result, live = asyncio.run(scenario())
+    assert result["stdout"].strip() == "ok"
+    assert live == 1
@@ -0,0 +1,157 @@
+# tests/test_tool_jobs.py
+import asyncio
+import json
+
+import pytest
+
+import core.tool_jobs as tool_jobs_module
+from core.tool_jobs import ToolJobManager
+
+CHAT_ID = "chat-1"
+
+
+@pytest.fixture(autouse=True)
+def chat_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tool_jobs_module, "CHAT_DIR", tmp_path)
+    (tmp_path / CHAT_ID).mkdir()
+    return tmp_path
+
+
+def _calls(name="dataset_metadata_analysis"):
+    return [{"id": "call_0", "function_name": name, "arguments": {}}]
+
+
+def test_per_user_and_global_limits():
+    """At most per_user jobs of a user and max_running jobs in total run, the others start in submission order"""
+    async def scenario():
+        jobs = ToolJobManager(max_running=2, per_user=1)
+        running, started = set(), []
+        peak = {"total": 0}
+        release = asyncio.Event()
+
+        def job_run(name):
+            async def run():
+                running.add(name)
+                started.append(name)
+                peak["total"] = max(peak["total"], len(running))
+                await release.wait()
+                running.discard(name)
+                return {"status": "completed", "summary": name}
+            return run
+
+        for name, user in [("a1", "a"), ("a2", "a"), ("b1", "b"), ("c1", "c"), ("a3", "a")]:
+            jobs.submit(CHAT_ID, user, _calls(), job_run(name))
+        await asyncio.sleep(0.05)
+        first = sorted(running)
+        release.set()
+        while jobs._tasks:
+            await asyncio.sleep(0.01)
+        return first, started, peak["total"], jobs.stats
+
+    first, started, peak, stats = asyncio.run(scenario())
+    assert first == ["a1", "b1"]
+    assert peak == 2
+    # The jobs of user a run one after another in submission order
+    assert [name for name in started if name.startswith("a")] == ["a1", "a2", "a3"]
+    assert stats["completed"] == 5
+
+
+def test_job_state_file_and_callbacks(chat_dir):
+    async def scenario():
+        jobs = ToolJobManager()
+        finished = []
+
+        async def on_finished(job):
+            finished.append(("own", job["status"]))
+
+        async def listener(job):
+            finished.append(("listener", job["status"]))
+
+        async def run():
+            tool_jobs_module.report_progress(step=1)
+            return {"status": "completed", "summary": "done"}
+
+        jobs.add_listener(listener)
+        job = jobs.submit(CHAT_ID, None, _calls(), run, on_finished)
+        await asyncio.gather(*jobs._tasks.values())
+        return jobs, job, finished
+
+    jobs, job, finished = asyncio.run(scenario())
+    assert job["status"] == "queued" and job["user_id"] == "anonymous"
+    assert finished == [("own", "completed"), ("listener", "completed")]
+    saved = json.loads((chat_dir / CHAT_ID / "tool_jobs" / f"{job['job_id']}.json").read_text())
+    assert saved["status"] == "completed"
+    assert saved["progress"] == {"step": 1}
+    assert saved["result"]["summary"] == "done"
+    # Finished jobs are read back from their state file
+    assert job["job_id"] not in jobs.jobs
+    assert jobs.get(job["job_id"])["status"] == "completed"
+    assert [j["job_id"] for j in jobs.list_jobs(CHAT_ID)] == [job["job_id"]]
+
+
+def test_failed_run():
+    async def scenario():
+        jobs = ToolJobManager()
+
+        async def run():
+            raise RuntimeError("boom")
+
+        job = jobs.submit(CHAT_ID, "a", _calls(), run)
+        await asyncio.gather(*jobs._tasks.values())
+        return jobs.get(job["job_id"])
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+
+
+def test_cancel_running_and_queued_jobs():
+    async def scenario():
+        jobs = ToolJobManager(max_running=1)
+        finished = []
+
+        async def on_finished(job):
+            finished.append(job["status"])
+
+        async def run():
+            await asyncio.Event().wait()
+
+        running = jobs.submit(CHAT_ID, "a", _calls(), run, on_finished)
+        queued = jobs.submit(CHAT_ID, "b", _calls(), run, on_finished)
+        await asyncio.sleep(0.05)
+        assert jobs.get(queued["job_id"])["status"] == "queued"
+        cancelled = await jobs.cancel(queued["job_id"])
+        await jobs.cancel_chat(CHAT_ID)
+        return jobs, running, cancelled, finished
+
+    jobs, running, cancelled, finished = asyncio.run(scenario())
+    assert cancelled["status"] == "cancelled" and cancelled["started_at"] is None
+    assert jobs.get(running["job_id"])["status"] == "cancelled"
+    assert finished == ["cancelled", "cancelled"]
+    assert jobs.stats["cancelled"] == 2
+    assert asyncio.run(jobs.cancel("unknown")) is None
+
+
+def test_shutdown_and_recover(chat_dir):
+    async def scenario():
+        jobs = ToolJobManager()
+
+        async def run():
+            await asyncio.Event().wait()
+
+        job = jobs.submit(CHAT_ID, "a", _calls(), run)
+        await asyncio.sleep(0.01)
+        await jobs.shutdown()
+        return job
+
+    job = asyncio.run(scenario())
+    assert ToolJobManager().get(job["job_id"])["status"] == "interrupted"
+
+    # A job left running by a killed server
+    job_file = chat_dir / CHAT_ID / "tool_jobs" / "lost.json"
+    job_file.write_text(json.dumps({"job_id": "lost", "chat_id": CHAT_ID, "status": "running"}))
+    jobs = ToolJobManager()
+    jobs.recover()
+    recovered = jobs.get("lost")
+    assert recovered["status"] == "interrupted"
+    assert recovered["finished_at"]
@@ -0,0 +1,78 @@
+# tests/test_ws_manager.py
+import asyncio
+import json
+
+from ws_manager.manager import ConnectionWriter
+
+
+class BlockedSocket:
+    """WebSocket that only sends once it is released"""
+
+    def __init__(self):
+        self.sent = []
+        self.released = asyncio.Event()
+
+    async def send_text(self, payload):
+        await self.released.wait()
+        self.sent.append(json.loads(payload))
+
+
+def _message(message_type, value, chat_id="chat"):
+    return json.dumps({"type": message_type, "chat_id": chat_id, "value": value})
+
+
+async def _drained(writer, websocket):
+    websocket.released.set()
+    while writer.depth:
+        await asyncio.sleep(0.01)
+    writer.close()
+    return [(message["type"], message["value"]) for message in websocket.sent]
+
+
+def test_state_messages_are_coalesced_in_order():
+    async def scenario():
+        websocket = BlockedSocket()
+        writer = ConnectionWriter(websocket, on_error=lambda ws: None, max_queue=10)
+        for value in range(3):
+            assert writer.enqueue(_message("message_delta", value))
+            assert writer.enqueue(_message("typing", value), coalesce_key=("typing", "chat"))
+        return writer.stats, await _drained(writer, websocket)
+
+    stats, sent = asyncio.run(scenario())
+    # Only the state messages are coalesced, the latest one wins
+    deltas = [value for message_type, value in sent if message_type == "message_delta"]
+    assert deltas == [0, 1, 2]
+    assert [value for message_type, value in sent if message_type == "typing"] == [2]
+    assert stats["coalesced"] == 2
+
+
+def test_full_queue_disconnects_by_default():
+    async def scenario():
+        websocket = BlockedSocket()
+        writer = ConnectionWriter(websocket, on_error=lambda ws: None, max_queue=2)
+        await asyncio.sleep(0)
+        accepted = [writer.enqueue(_message("message_delta", value)) for value in range(4)]
+        writer.close()
+        return accepted
+
+    assert asyncio.run(scenario()) == [True, True, False, False]
+
+
+def test_drop_oldest_only_drops_state_messages():
+    async def scenario():
+        websocket = BlockedSocket()
+        writer = ConnectionWriter(websocket, on_error=lambda ws: None, max_queue=2, policy="drop_oldest")
+        writer.enqueue(_message("message_delta", "taken by the writer"))
+        await asyncio.sleep(0)
+        assert writer.enqueue(_message("typing", 1), coalesce_key=("typing", "chat"))
+        assert writer.enqueue(_message("message_delta", 1))
+        # Full: the queued state message makes room
+        assert writer.enqueue(_message("message_delta", 2))
+        # Full of messages that must not be lost: the client is disconnected
+        assert not writer.enqueue(_message("message_delta", 3))
+        return writer.stats, await _drained(writer, websocket)
+
+    stats, sent = asyncio.run(scenario())
+    assert stats["dropped"] == 1
+    assert [value for message_type, value in sent if message_type == "message_delta"][1:] == [1, 2]
+    assert not any(message_type == "typing" for message_type, _ in sent)
@@ -0,0 +1,80 @@
+from typing import Dict, Any, List, Optional
+
+from config import AGENT_CONTEXT_TOKEN_BUDGET, AGENT_CONTEXT_KEEP_EXCHANGES
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Rough token count of chat messages (4 characters per token, plus the message framing)"""
+    return sum(len(message.get("content") or "") // 4 + 4 for message in messages)
+
+
+class AgentContextWindow:
+    """Messages of an agent loop, compacted to a token budget
+
+    The system prompt and the task are always sent.  The last N exchanges
+    (assistant response + feedback) are sent verbatim, older steps only as
+    one line each in a rolling summary.  The reminder is prefixed to the
+    latest user message only.
+    """
+
+    def __init__(self, system_prompt: str, task: str, reminder: str = "",
+                 token_budget: int = AGENT_CONTEXT_TOKEN_BUDGET, keep_exchanges: int = AGENT_CONTEXT_KEEP_EXCHANGES):
+        self.system_prompt = system_prompt
+        self.task = task
+        self.reminder = reminder
+        self.token_budget = token_budget
+        self.keep_exchanges = keep_exchanges
+        # {"assistant": content or None, "feedback": content, "summary": one line}
+        self.exchanges: List[Dict[str, Optional[str]]] = []
+        self._pending_assistant: Optional[str] = None
+
+    def add_assistant(self, content: str):
+        self._pending_assistant = content
+
+    def add_feedback(self, feedback: str, summary: str):
+        """Close the current exchange, summary describes the step in one line"""
+        self.exchanges.append({"assistant": self._pending_assistant, "feedback": feedback, "summary": summary})
+        self._pending_assistant = None
+
+    def _summary_message(self, lines: List[str], omitted: int) -> Optional[Dict[str, str]]:
+        if not lines and not omitted:
+            return None
+        header = "Summary of the completed steps (notebook cells already exist, do not repeat them):"
+        if omitted:
+            lines = [f"({omitted} earlier steps omitted)"] + lines
+        return {"role": "user", "content": header + "\n" + "\n".join(lines)}
+
+    def build(self) -> List[Dict[str, str]]:
+        """Messages for the next completion, within the token budget when possible"""
+        window = min(len(self.exchanges), self.keep_exchanges)
+        omitted = 0
+        while True:
+            recent = self.exchanges[len(self.exchanges) - window:]
+            older = self.exchanges[:len(self.exchanges) - window]
+            summary_lines = [exchange["summary"] for exchange in older[omitted:]]
+            messages = self._assemble(summary_lines, omitted, recent)
+            if estimate_tokens(messages) <= self.token_budget:
+                return messages
+            # Over budget: fewer raw exchanges first (at least one), then fewer summary lines
+            if window > 1:
+                window -= 1
+            elif summary_lines:
+                omitted += max(1, len(summary_lines) // 4)
+            else:
+                return messages
+
+    def _assemble(self, summary_lines: List[str], omitted: int,
+                  recent: List[Dict[str, Optional[str]]]) -> List[Dict[str, str]]:
+        messages = [{"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": self.task}]
+        summary = self._summary_message(summary_lines, omitted)
+        if summary:
+            messages.append(summary)
+        for exchange in recent:
+            if exchange["assistant"] is not None:
+                messages.append({"role": "assistant", "content": exchange["assistant"]})
+            messages.append({"role": "user", "content": exchange["feedback"]})
+
+        # The reminder goes with the latest user message only
+        messages[-1] = {**messages[-1], "content": self.reminder + messages[-1]["content"]}
+        return messages
@@ -0,0 +1,444 @@
+import asyncio
+import hashlib
+import json
+import math
+import re
+import time
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+import pandas as pd
+
+from config import (PROFILE_CACHE_DIR, PROFILE_CHUNK_ROWS, PROFILE_DISTINCT_LIMIT, PROFILE_DUPLICATE_ROWS_LIMIT,
+                    PROFILE_TOP_VALUES)
+
+# Bumped when the content of a profile changes, older cached profiles are ignored
+PROFILE_VERSION = 1
+
+CSV_EXTENSIONS = {".csv": ",", ".tsv": "\t", ".txt": ","}
+JSON_EXTENSIONS = {".json", ".jsonl", ".ndjson"}
+EXCEL_EXTENSIONS = {".xlsx", ".xlsm", ".xls"}
+
+JSON_READ_SIZE = 1024 * 1024
+# Whitespace and commas between the items of a JSON array
+_JSON_SEPARATORS = re.compile(r"[\s,]*")
+
+
+class UnsupportedDatasetError(ValueError):
+    """The file format cannot be profiled"""
+
+
+def _plain(value: Any) -> Any:
+    """JSON-friendly version of a cell value"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class ColumnProfile:
+    """Statistics of one column, updated chunk by chunk with bounded memory"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.kinds = set()
+        # Numeric columns: running mean / sum of squared deviations (Chan et al.)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Any = None
+        self.max: Any = None
+        self.min_length: Optional[int] = None
+        self.max_length: Optional[int] = None
+        # Exact value counts until there are too many distinct values
+        self.values: Optional[Counter] = Counter()
+
+    @staticmethod
+    def _kind(series: pd.Series) -> str:
+        if pd.api.types.is_bool_dtype(series):
+            return "boolean"
+        if pd.api.types.is_integer_dtype(series):
+            return "integer"
+        if pd.api.types.is_float_dtype(series):
+            return "float"
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return "datetime"
+        return "string"
+
+    def update(self, series: pd.Series):
+        self.count += len(series)
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        if values.empty:
+            return
+
+        kind = self._kind(series)
+        self.kinds.add(kind)
+        if kind in ("integer", "float"):
+            chunk = values.astype("float64")
+            n, mean = len(chunk), float(chunk.mean())
+            m2 = float(((chunk - mean) ** 2).sum())
+            total = self.n + n
+            delta = mean - self.mean
+            self.mean += delta * n / total
+            self.m2 += m2 + delta * delta * self.n * n / total
+            self.n = total
+            self._bounds(values.min(), values.max())
+        elif kind == "datetime":
+            self._bounds(values.min(), values.max())
+        elif kind == "string":
+            lengths = values.astype(str).str.len()
+            low, high = int(lengths.min()), int(lengths.max())
+            self.min_length = low if self.min_length is None else min(self.min_length, low)
+            self.max_length = high if self.max_length is None else max(self.max_length, high)
+
+        if self.values is not None:
+            try:
+                for value, count in values.value_counts(sort=False).items():
+                    self.values[_plain(value)] += int(count)
+            except TypeError:
+                # Unhashable cells (nested JSON)
+                self.values = None
+            if self.values is not None and len(self.values) > PROFILE_DISTINCT_LIMIT:
+                self.values = None
+
+    def _bounds(self, low: Any, high: Any):
+        low, high = _plain(low), _plain(high)
+        try:
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+        except TypeError:
+            # Numbers in some chunks, dates in others: no common ordering
+            self.min = self.max = None
+
+    @property
+    def dtype(self) -> str:
+        if not self.kinds:
+            return "empty"
+        if len(self.kinds) == 1:
+            return next(iter(self.kinds))
+        if self.kinds <= {"integer", "float"}:
+            return "float"
+        return "mixed"
+
+    def to_dict(self) -> Dict[str, Any]:
+        dtype = self.dtype
+        profile = {
+            "name": self.name,
+            "dtype": dtype,
+            "non_null": self.count - self.nulls,
+            "nulls": self.nulls,
+            "null_pct": round(100.0 * self.nulls / self.count, 2) if self.count else 0.0,
+            "distinct": len(self.values) if self.values is not None else None
+        }
+        if dtype in ("integer", "float") and self.n:
+            profile.update({
+                "min": self.min,
+                "max": self.max,
+                "mean": self.mean,
+                "std": math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+            })
+        elif dtype == "datetime":
+            profile.update({"min": self.min, "max": self.max})
+        elif dtype == "string" and self.min_length is not None:
+            profile.update({"min_length": self.min_length, "max_length": self.max_length})
+
+        if self.values is not None:
+            top = sorted(self.values.items(), key=lambda item: (-item[1], str(item[0])))
+            profile["top_values"] = [[value, count] for value, count in top[:PROFILE_TOP_VALUES]]
+        return profile
+
+
+class DatasetProfiler:
+    """Shape, dtypes, missing values and statistics of a dataset in one chunked pass
+
+    CSV/TSV, JSON lines, JSON arrays of records and XLSX files are read in
+    chunks of PROFILE_CHUNK_ROWS rows, so files bigger than RAM can be
+    profiled.  Profiles are cached by content hash (memory and disk).
+    """
+
+    def __init__(self, cache_dir: Path = PROFILE_CACHE_DIR, chunk_rows: int = PROFILE_CHUNK_ROWS):
+        self.cache_dir = Path(cache_dir)
+        self.chunk_rows = chunk_rows
+        # path -> [size, mtime, content hash], avoids hashing unchanged files again
+        self._hashes: Dict[str, List[Any]] = {}
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def content_hash(self, path: Path) -> str:
+        """sha256 of the file content, remembered while size and mtime are unchanged"""
+        stat = path.stat()
+        known = self._hashes.get(str(path))
+        if known and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return known[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        self._hashes[str(path)] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def _cache_file(self, content_hash: str) -> Path:
+        return self.cache_dir / f"{content_hash}.v{PROFILE_VERSION}.json"
+
+    def _cached_profile(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        if content_hash in self._profiles:
+            return self._profiles[content_hash]
+        cache_file = self._cache_file(content_hash)
+        if not cache_file.exists():
+            return None
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                profile = json.load(f)
+        except Exception as e:
+            print(f"[PROFILER] Ignoring unreadable cached profile {cache_file.name}: {e}")
+            return None
+        self._profiles[content_hash] = profile
+        return profile
+
+    def _store_profile(self, content_hash: str, profile: Dict[str, Any]):
+        self._profiles[content_hash] = profile
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = self._cache_file(content_hash)
+            tmp_file = cache_file.with_suffix(".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(profile, f, indent=2)
+            tmp_file.replace(cache_file)
+        except Exception as e:
+            print(f"[PROFILER] Error caching profile: {e}")
+
+    def profile(self, file_path: str) -> Dict[str, Any]:
+        """Profile of a dataset, computed once per file content"""
+        path = Path(file_path).resolve()
+        if not self.supports(path):
+            raise UnsupportedDatasetError(f"Unsupported dataset format: {path.suffix or path.name}")
+
+        content_hash = self.content_hash(path)
+        cached = self._cached_profile(content_hash)
+        if cached is not None:
+            print(f"[PROFILER] Cached profile of {path.name}")
+            return {**cached, "file_path": str(path), "file_name": path.name, "cached": True}
+
+        started = time.perf_counter()
+        profile = self._compute_profile(path)
+        profile["content_hash"] = content_hash
+        self._store_profile(content_hash, profile)
+        print(f"[PROFILER] Profiled {path.name}: {profile['rows']} rows x {profile['columns']} columns "
+              f"in {time.perf_counter() - started:.2f}s")
+        return {**profile, "cached": False}
+
+    async def profile_async(self, file_path: str) -> Dict[str, Any]:
+        """Profile a dataset in a thread, concurrent requests for a file wait for one pass"""
+        key = str(Path(file_path).resolve())
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        async with self._locks[key]:
+            return await asyncio.to_thread(self.profile, file_path)
+
+    @staticmethod
+    def supports(path: Path) -> bool:
+        suffix = path.suffix.lower()
+        return suffix in CSV_EXTENSIONS or suffix in JSON_EXTENSIONS or suffix in EXCEL_EXTENSIONS
+
+    def _compute_profile(self, path: Path) -> Dict[str, Any]:
+        """Single pass over the chunks of the file"""
+        columns: Dict[str, ColumnProfile] = {}
+        rows = 0
+        sample_rows: List[Dict[str, Any]] = []
+        row_hashes: Optional[set] = set()
+        duplicate_rows = 0
+
+        for chunk in self._read_chunks(path):
+            chunk.columns = [str(c) for c in chunk.columns]
+            for name in chunk.columns:
+                if name not in columns:
+                    # Column first seen in a later chunk (JSON records): missing in the earlier rows
+                    columns[name] = ColumnProfile(name)
+                    columns[name].count = columns[name].nulls = rows
+            for name, column in columns.items():
+                if name in chunk.columns:
+                    column.update(chunk[name])
+                else:
+                    column.count += len(chunk)
+                    column.nulls += len(chunk)
+
+            if len(sample_rows) < 5:
+                head = chunk.head(5 - len(sample_rows))
+                sample_rows.extend(json.loads(head.to_json(orient="records", date_format="iso")))
+
+            if row_hashes is not None:
+                try:
+                    hashes = pd.util.hash_pandas_object(chunk, index=False)
+                    for value in hashes.tolist():
+                        if value in row_hashes:
+                            duplicate_rows += 1
+                        else:
+                            row_hashes.add(value)
+                except (TypeError, ValueError):
+                    # Unhashable cells (nested JSON)
+                    row_hashes = None
+                if row_hashes is not None and len(row_hashes) > PROFILE_DUPLICATE_ROWS_LIMIT:
+                    row_hashes = None
+            rows += len(chunk)
+
+        return {
+            "version": PROFILE_VERSION,
+            "file_name": path.name,
+            "file_path": str(path),
+            "format": path.suffix.lower().lstrip("."),
+            "size_bytes": path.stat().st_size,
+            "rows": rows,
+            "columns": len(columns),
+            "duplicate_rows": duplicate_rows if row_hashes is not None else None,
+            "column_profiles": [column.to_dict() for column in columns.values()],
+            "sample_rows": sample_rows
+        }
+
+    def _read_chunks(self, path: Path) -> Iterator[pd.DataFrame]:
+        suffix = path.suffix.lower()
+        if suffix in CSV_EXTENSIONS:
+            with pd.read_csv(path, sep=CSV_EXTENSIONS[suffix], chunksize=self.chunk_rows,
+                             encoding_errors="replace") as reader:
+                yield from reader
+        elif suffix in JSON_EXTENSIONS:
+            yield from self._read_json_chunks(path)
+        elif suffix == ".xls":
+            # Legacy Excel files cannot be read in a streaming way
+            yield pd.read_excel(path)
+        else:
+            yield from self._read_xlsx_chunks(path)
+
+    def _read_json_chunks(self, path: Path) -> Iterator[pd.DataFrame]:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            start = f.read(4096).lstrip()[:1]
+            f.seek(0)
+            first_line = f.readline()
+            more_lines = bool(f.read(4096).strip())
+
+        if start == "[":
+            yield from self._batches(self._iter_json_array(path))
+            return
+        # JSON lines: one object per line (.json files are checked by parsing the first line)
+        lines = path.suffix.lower() != ".json"
+        if not lines and start == "{" and more_lines:
+            try:
+                lines = isinstance(json.loads(first_line), dict)
+            except ValueError:
+                lines = False
+        if lines:
+            with pd.read_json(path, lines=True, chunksize=self.chunk_rows, encoding_errors="replace") as reader:
+                yield from reader
+        else:
+            # A single JSON object (e.g. column orientation) is read at once
+            yield pd.read_json(path)
+
+    def _iter_json_array(self, path: Path) -> Iterator[Any]:
+        """Items of a top-level JSON array, parsed incrementally"""
+        decoder = json.JSONDecoder()
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            buffer = f.read(JSON_READ_SIZE).lstrip()[1:]
+            index, eof = 0, False
+            while True:
+                # The buffer is read by index, it is only cut when it is refilled
+                index = _JSON_SEPARATORS.match(buffer, index).end()
+                if buffer.startswith("]", index):
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, index)
+                    # A number at the end of the buffer may go on in the next block
+                    complete = eof or end < len(buffer)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    complete = False
+                if complete:
+                    yield item
+                    index = end
+                    continue
+                more = f.read(JSON_READ_SIZE)
+                eof = not more
+                buffer = buffer[index:] + more
+                index = 0
+
+    def _read_xlsx_chunks(self, path: Path) -> Iterator[pd.DataFrame]:
+        """Rows of the first worksheet in read-only (streaming) mode"""
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns, seen = [], Counter()
+            for i, name in enumerate(header):
+                name = f"Unnamed: {i}" if name is None else str(name)
+                columns.append(name if not seen[name] else f"{name}.{seen[name]}")
+                seen[name] += 1
+
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.chunk_rows:
+                    yield pd.DataFrame.from_records(batch, columns=columns)
+                    batch = []
+            if batch:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+        finally:
+            workbook.close()
+
+    def _batches(self, records: Iterator[Any]) -> Iterator[pd.DataFrame]:
+        batch = []
+        for record in records:
+            batch.append(record if isinstance(record, dict) else {"value": record})
+            if len(batch) >= self.chunk_rows:
+                yield pd.DataFrame.from_records(batch)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch)
+
+    @staticmethod
+    def format_profile(profile: Dict[str, Any]) -> str:
+        """Compact text version of a profile for the LLM"""
+        size_mb = profile["size_bytes"] / (1024 * 1024)
+        lines = [
+            f"File: {profile['file_name']} ({profile['format']}, {size_mb:.1f} MB)",
+            f"Shape: {profile['rows']} rows x {profile['columns']} columns",
+            f"Duplicate rows: {profile['duplicate_rows'] if profile['duplicate_rows'] is not None else 'not computed'}",
+            "",
+            "Columns:"
+        ]
+        for column in profile["column_profiles"]:
+            distinct = column["distinct"] if column["distinct"] is not None else f">{PROFILE_DISTINCT_LIMIT}"
+            line = (f"- {column['name']} [{column['dtype']}] nulls={column['nulls']} ({column['null_pct']}%) "
+                    f"distinct={distinct}")
+            if "mean" in column:
+                low, high = (f"{v:.4g}" if isinstance(v, float) else v for v in (column["min"], column["max"]))
+                line += f" min={low} max={high} mean={column['mean']:.4g} std={column['std']:.4g}"
+            elif "min" in column:
+                line += f" min={column['min']} max={column['max']}"
+            elif "min_length" in column:
+                line += f" length={column['min_length']}..{column['max_length']}"
+            if column.get("top_values") and column["dtype"] in ("string", "boolean", "mixed"):
+                top = ", ".join(f"{str(value)[:40]} ({count})" for value, count in column["top_values"])
+                line += f" top: {top}"
+            lines.append(line)
+
+        if profile["sample_rows"]:
+            lines.extend(["", "Sample rows:"])
+            lines.extend(json.dumps(row, default=str)[:300] for row in profile["sample_rows"])
+        return "\n".join(lines)
+
+
+# Global dataset profiler
+dataset_profiler = DatasetProfiler()
@@ -1,56 +1,189 @@
+import hashlib
+import json
+import math
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
 from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
 import fitz  # PyMuPDF for PDFs
 import docx
 from pptx import Presentation
 
+from config import EXTRACTION_CACHE_DIR, EXTRACTION_PROCESSES, EXTRACTION_PARALLEL_MIN_PAGES
+
+# Bumped when the extracted units change, older cache entries are ignored
+EXTRACTION_VERSION = 1
+
+# Separator of the units of a document in the whole text
+UNIT_SEPARATORS = {".pdf": "", ".docx": "\n", ".pptx": "\n"}
+TEXT_EXTENSIONS = {".txt", ".md", ".json"}
+TEXT_BLOCK_SIZE = 64 * 1024
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
 def extract_text_from_file(file_path: Path) -> str:
-    suffix = file_path.suffix.lower()
+    """Whole text of a document (pages, slides or paragraphs joined)"""
+    file_path = Path(file_path)
+    separator = UNIT_SEPARATORS.get(file_path.suffix.lower(), "")
+    return separator.join(iter_text_units(file_path))
+
+def iter_text_units(file_path: Path, use_cache: bool = True) -> Iterator[str]:
+    """Pages (PDF), slides (PPTX), paragraphs (DOCX) or blocks (text) of a document
+
+    The units are cached by file hash in EXTRACTION_CACHE_DIR, an unchanged
+    file is read back from the cache.  Extraction errors end the iteration.
+    """
+    file_path = Path(file_path)
+    extractor = _get_extractor(file_path.suffix.lower())
+    if extractor is None:
+        return
+
+    cache_file = None
+    if use_cache:
+        try:
+            cache_file = EXTRACTION_CACHE_DIR / f"{file_hash(file_path)}.v{EXTRACTION_VERSION}.jsonl"
+        except OSError as e:
+            print(f"[DOCUMENT] Cannot read {file_path.name}: {e}")
+            return
+        if cache_file.exists():
+            with open(cache_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+            return
+
+    tmp_file = None
+    cache = None
+    if cache_file is not None:
+        try:
+            EXTRACTION_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+            cache = open(tmp_file, "w", encoding="utf-8")
+        except OSError as e:
+            print(f"[DOCUMENT] Extraction cache unavailable: {e}")
+
+    complete = False
+    try:
+        units = extractor(file_path)
+        while True:
+            try:
+                unit = next(units)
+            except StopIteration:
+                complete = True
+                break
+            except Exception as e:
+                print(f"[DOCUMENT] Error extracting {file_path.name}: {e}")
+                break
+            if cache is not None:
+                cache.write(json.dumps(unit) + "\n")
+            yield unit
+    finally:
+        # Only complete extractions are cached (not errors or consumers that stopped early)
+        if cache is not None:
+            cache.close()
+            if complete:
+                tmp_file.replace(cache_file)
+            else:
+                tmp_file.unlink(missing_ok=True)
+
+def file_hash(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _get_extractor(suffix: str) -> Optional[Callable[[Path], Iterator[str]]]:
     if suffix == ".pdf":
-        return extract_text_from_pdf(file_path)
+        return iter_pdf_pages
     elif suffix == ".docx":
-        return extract_text_from_docx(file_path)
+        return iter_docx_paragraphs
     elif suffix == ".pptx":
-        return extract_text_from_pptx(file_path)
-    elif suffix in [".txt"]:
-        return extract_text_from_txt(file_path)
+        return iter_pptx_slides
+    elif suffix in TEXT_EXTENSIONS:
+        return iter_text_blocks
     else:
-        return ""
+        return None
 
-def extract_text_from_pdf(file_path: Path) -> str:
-    text = ""
-    try:
-        doc = fitz.open(str(file_path))
-        for page in doc:
-            text += page.get_text()
-        return text
-    except Exception:
-        return ""
-
-def extract_text_from_docx(file_path: Path) -> str:
-    try:
-        doc = docx.Document(str(file_path))
-        full_text = []
-        for para in doc.paragraphs:
-            full_text.append(para.text)
-        return "\n".join(full_text)
-    except Exception:
-        return ""
-
-def extract_text_from_pptx(file_path: Path) -> str:
-    text = []
-    try:
-        pres = Presentation(str(file_path))
-        for slide in pres.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    text.append(shape.text)
-        return "\n".join(text)
-    except Exception:
-        return ""
-
-def extract_text_from_txt(file_path: Path) -> str:
+def iter_pdf_pages(file_path: Path) -> Iterator[str]:
+    with fitz.open(str(file_path)) as doc:
+        page_count = doc.page_count
+    yield from _iter_units(file_path, page_count, _pdf_pages, extract_pdf_pages)
+
+def iter_docx_paragraphs(file_path: Path) -> Iterator[str]:
+    doc = docx.Document(str(file_path))
+    for para in doc.paragraphs:
+        yield para.text
+
+def iter_pptx_slides(file_path: Path) -> Iterator[str]:
+    slide_count = len(Presentation(str(file_path)).slides)
+    yield from _iter_units(file_path, slide_count, _pptx_slides, extract_pptx_slides)
+
+def iter_text_blocks(file_path: Path) -> Iterator[str]:
+    """Blocks of whole lines of about TEXT_BLOCK_SIZE characters"""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        block, size = [], 0
+        for line in f:
+            block.append(line)
+            size += len(line)
+            if size >= TEXT_BLOCK_SIZE:
+                yield "".join(block)
+                block, size = [], 0
+        if block:
+            yield "".join(block)
+
+def _pdf_pages(path: str, start: int, stop: int) -> Iterator[str]:
+    with fitz.open(path) as doc:
+        for number in range(start, stop):
+            yield doc.load_page(number).get_text()
+
+def _pptx_slides(path: str, start: int, stop: int) -> Iterator[str]:
+    pres = Presentation(path)
+    for slide in islice(pres.slides, start, stop):
+        yield "\n".join(shape.text for shape in slide.shapes if hasattr(shape, "text"))
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> List[str]:
+    """Text of a range of PDF pages (runs in an extraction process)"""
+    return list(_pdf_pages(path, start, stop))
+
+def extract_pptx_slides(path: str, start: int, stop: int) -> List[str]:
+    """Text of a range of slides (runs in an extraction process)"""
+    return list(_pptx_slides(path, start, stop))
+
+def _iter_units(file_path: Path, count: int, serial: Callable[[str, int, int], Iterator[str]],
+                extract_range: Callable[[str, int, int], List[str]]) -> Iterator[str]:
+    """Units in order, large documents are split into page ranges extracted by the process pool"""
+    path = str(file_path)
+    if count < EXTRACTION_PARALLEL_MIN_PAGES or EXTRACTION_PROCESSES < 2:
+        yield from serial(path, 0, count)
+        return
+
+    step = max(8, math.ceil(count / (EXTRACTION_PROCESSES * 4)))
+    starts = list(range(0, count, step))
+    stops = [min(start + step, count) for start in starts]
+    done = 0
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except Exception:
-        return ""
+        results = _get_process_pool().map(extract_range, [path] * len(starts), starts, stops)
+        for stop, units in zip(stops, results):
+            done = stop
+            yield from units
+    except (BrokenProcessPool, OSError) as e:
+        print(f"[DOCUMENT] Extraction processes failed, continuing in this process: {e}")
+        shutdown_process_pool()
+        yield from serial(path, done, count)
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=EXTRACTION_PROCESSES)
+    return _process_pool
+
+def shutdown_process_pool():
+    """Stop the extraction processes (application shutdown)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -0,0 +1,287 @@
+import asyncio
+import time
+from typing import Dict, Any, List, Optional
+
+from jupyter_client.manager import AsyncKernelManager
+
+from config import KERNEL_POOL_MAX_KERNELS, KERNEL_POOL_SPARES, KERNEL_IDLE_TIMEOUT, KERNEL_WARMUP_CODE
+
+
+class PooledKernel:
+    """A Jupyter kernel with an IOPub pump that routes the messages to the running execution"""
+
+    def __init__(self, kernel_manager: AsyncKernelManager, kernel_client):
+        self.kernel_manager = kernel_manager
+        self.kernel_client = kernel_client
+        self.session_key: Optional[str] = None
+        self.last_used = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._pending: Dict[str, asyncio.Queue] = {}
+        self._pump_task = asyncio.create_task(self._pump_iopub())
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    @property
+    def alive(self) -> bool:
+        return not self._pump_task.done()
+
+    async def _pump_iopub(self):
+        """Read the IOPub channel and hand each message to the queue of its execution"""
+        while True:
+            try:
+                msg = await self.kernel_client.get_iopub_msg()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[KERNEL_POOL] IOPub pump stopped: {e}")
+                break
+            queue = self._pending.get(msg["parent_header"].get("msg_id"))
+            if queue is not None:
+                queue.put_nowait(msg)
+
+    async def execute(self, code: str, timeout: float = 30) -> Dict[str, Any]:
+        """Execute code, collect the outputs until the kernel is idle again"""
+        async with self._lock:
+            if not self.alive:
+                raise RuntimeError("Kernel is not running")
+            self.last_used = time.monotonic()
+            queue: asyncio.Queue = asyncio.Queue()
+            msg_id = self.kernel_client.execute(code)
+            self._pending[msg_id] = queue
+
+            outputs: List[str] = []
+            errors: List[str] = []
+            timed_out = False
+            deadline = time.monotonic() + timeout
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    msg = await asyncio.wait_for(queue.get(), remaining)
+                    msg_type = msg["msg_type"]
+                    content = msg["content"]
+
+                    if msg_type == "stream":
+                        outputs.append(content["text"])
+                    elif msg_type == "execute_result":
+                        outputs.append(content["data"].get("text/plain", ""))
+                    elif msg_type == "display_data":
+                        # Handle plots/images
+                        outputs.append("Display data generated")
+                    elif msg_type == "error":
+                        errors.append(f"{content['ename']}: {content['evalue']}")
+                    elif msg_type == "status" and content["execution_state"] == "idle":
+                        break
+            except asyncio.TimeoutError:
+                timed_out = True
+                errors.append(f"TimeoutError: execution exceeded {timeout}s and was interrupted")
+                await self.kernel_manager.interrupt_kernel()
+            finally:
+                self._pending.pop(msg_id, None)
+                self.last_used = time.monotonic()
+
+            return {"outputs": outputs, "errors": errors, "timed_out": timed_out}
+
+    async def shutdown(self):
+        """Stop the pump and the kernel"""
+        self._pump_task.cancel()
+        try:
+            self.kernel_client.stop_channels()
+            await self.kernel_manager.shutdown_kernel(now=True)
+        except Exception as e:
+            print(f"[KERNEL_POOL] Error shutting down kernel: {e}")
+
+
+class KernelPool:
+    """One kernel per chat session, bounded, with pre-warmed spares and idle eviction"""
+
+    def __init__(self, max_kernels: int = KERNEL_POOL_MAX_KERNELS, spares: int = KERNEL_POOL_SPARES,
+                 idle_timeout: float = KERNEL_IDLE_TIMEOUT):
+        self.max_kernels = max_kernels
+        self.spares = spares
+        self.idle_timeout = idle_timeout
+        self.kernels: Dict[str, PooledKernel] = {}
+        self._spares: List[PooledKernel] = []
+        self._starting = 0
+        # session key -> number of pins, the kernel of a pinned session is never evicted
+        self._pins: Dict[str, int] = {}
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._condition: Optional[asyncio.Condition] = None
+        self._background: set = set()
+        self._reaper_task: Optional[asyncio.Task] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+            self._reaper_task = asyncio.create_task(self._reap_idle_kernels())
+        return self._condition
+
+    async def _start_kernel(self) -> PooledKernel:
+        """Start a kernel and import the common libraries"""
+        kernel_manager = AsyncKernelManager(kernel_name="python3")
+        await kernel_manager.start_kernel()
+        kernel_client = kernel_manager.client()
+        kernel_client.start_channels()
+        try:
+            await kernel_client.wait_for_ready(timeout=60)
+            kernel = PooledKernel(kernel_manager, kernel_client)
+        except Exception:
+            kernel_client.stop_channels()
+            await kernel_manager.shutdown_kernel(now=True)
+            raise
+
+        result = await kernel.execute(KERNEL_WARMUP_CODE, timeout=120)
+        if result["errors"]:
+            print(f"[KERNEL_POOL] Warm-up failed: {result['errors']}")
+        print("[KERNEL_POOL] Started Jupyter kernel")
+        return kernel
+
+    def _fill_spares(self):
+        """Start spare kernels in the background up to the configured number"""
+        missing = self.spares - len(self._spares) - self._starting
+        free = self.max_kernels - len(self.kernels) - len(self._spares) - self._starting
+        for _ in range(max(0, min(missing, free))):
+            self._starting += 1
+            task = asyncio.create_task(self._start_spare())
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _start_spare(self):
+        try:
+            kernel = await self._start_kernel()
+            self._spares.append(kernel)
+        except Exception as e:
+            print(f"[KERNEL_POOL] Failed to start spare kernel: {e}")
+        finally:
+            self._starting -= 1
+        async with self._get_condition():
+            self._get_condition().notify_all()
+
+    def _in_use(self, kernel: PooledKernel) -> bool:
+        return kernel.busy or self._pins.get(kernel.session_key, 0) > 0
+
+    async def acquire(self, session_key: str) -> PooledKernel:
+        """Get the kernel of a session, a spare (or new) kernel is assigned to a new session"""
+        condition = self._get_condition()
+        kernel = self.kernels.get(session_key)
+        if kernel is not None:
+            if kernel.alive:
+                kernel.last_used = time.monotonic()
+                return kernel
+            # The kernel died, the session gets a new one
+            await self.release(session_key)
+
+        # One kernel is assigned per session, concurrent acquires of the session wait for it
+        session_lock = self._session_locks.setdefault(session_key, asyncio.Lock())
+        async with session_lock:
+            kernel = self.kernels.get(session_key)
+            if kernel is not None:
+                kernel.last_used = time.monotonic()
+                return kernel
+
+            victim = None
+            async with condition:
+                while True:
+                    if self._spares:
+                        kernel = self._spares.pop(0)
+                        break
+                    if len(self.kernels) + self._starting < self.max_kernels:
+                        # Reserve the slot, the kernel is started outside of the condition
+                        self._starting += 1
+                        kernel = None
+                        break
+                    # Pool is full: evict the least recently used idle session, else wait
+                    idle = [k for k in self.kernels.values() if not self._in_use(k)]
+                    if idle:
+                        victim = min(idle, key=lambda k: k.last_used)
+                        print(f"[KERNEL_POOL] Evicting kernel of session {victim.session_key}")
+                        self.kernels.pop(victim.session_key, None)
+                        self._starting += 1
+                        kernel = None
+                        break
+                    await condition.wait()
+
+            if victim is not None:
+                await victim.shutdown()
+            if kernel is None:
+                try:
+                    kernel = await self._start_kernel()
+                finally:
+                    async with condition:
+                        self._starting -= 1
+                        condition.notify_all()
+
+            kernel.session_key = session_key
+            kernel.last_used = time.monotonic()
+            self.kernels[session_key] = kernel
+
+        self._fill_spares()
+        return kernel
+
+    def pin(self, session_key: str):
+        """Keep the kernel of a session between executions (e.g. a running analysis), until unpin"""
+        self._pins[session_key] = self._pins.get(session_key, 0) + 1
+
+    async def unpin(self, session_key: str):
+        """Release a pin, the kernel can be evicted again once it is idle"""
+        count = self._pins.get(session_key, 0) - 1
+        if count > 0:
+            self._pins[session_key] = count
+            return
+        self._pins.pop(session_key, None)
+        condition = self._get_condition()
+        async with condition:
+            condition.notify_all()
+
+    async def start(self):
+        """Start the reaper and the pre-warmed spare kernels (application startup)"""
+        self._get_condition()
+        self._fill_spares()
+
+    async def release(self, session_key: str):
+        """Shut down the kernel of a session (e.g. deleted chat)"""
+        kernel = self.kernels.pop(session_key, None)
+        session_lock = self._session_locks.get(session_key)
+        if session_lock is not None and not session_lock.locked():
+            del self._session_locks[session_key]
+        if kernel is not None:
+            await kernel.shutdown()
+            condition = self._get_condition()
+            async with condition:
+                condition.notify_all()
+
+    async def _reap_idle_kernels(self):
+        """Shut down the kernels of sessions that have been idle for too long"""
+        while True:
+            await asyncio.sleep(min(60, self.idle_timeout))
+            now = time.monotonic()
+            for session_key, kernel in list(self.kernels.items()):
+                if not self._in_use(kernel) and now - kernel.last_used > self.idle_timeout:
+                    print(f"[KERNEL_POOL] Idle kernel of session {session_key} shut down")
+                    await self.release(session_key)
+
+    async def shutdown(self):
+        """Shut down all kernels (application shutdown)"""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+        for session_key in list(self.kernels):
+            await self.release(session_key)
+        spares, self._spares = self._spares, []
+        for kernel in spares:
+            await kernel.shutdown()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.kernels),
+            "busy": sum(1 for k in self.kernels.values() if k.busy),
+            "pinned": len(self._pins),
+            "spares": len(self._spares),
+            "max_kernels": self.max_kernels
+        }
+
+
+# Global kernel pool
+kernel_pool = KernelPool()
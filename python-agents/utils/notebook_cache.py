@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import json
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import nbformat
+
+# String literals in code cells that look like paths of datasets
+DATASET_PATH_RE = re.compile(r"""['"]([^'"\n]+\.(?:csv|tsv|xlsx|xls|json|parquet|feather|pkl|txt))['"]""", re.IGNORECASE)
+
+
+class NotebookExecutionCache:
+    """Execution keys of notebooks, a notebook is only executed again when its code or datasets changed
+
+    The key is a hash of the code cell sources, the kernel and the signatures
+    (size, mtime) of the dataset files referenced in the code.  It is stored in
+    the notebook metadata next to the outputs it belongs to, so the cache
+    survives restarts.  Markdown cells are not part of the key.
+    """
+
+    METADATA_KEY = "oss_lab_execution"
+
+    def __init__(self):
+        # path -> {"stat": notebook file signature, "datasets": dataset signatures}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def lock(self, notebook_path: str) -> asyncio.Lock:
+        """Lock of a notebook, concurrent requests wait for one execution"""
+        path = str(Path(notebook_path).resolve())
+        if path not in self._locks:
+            self._locks[path] = asyncio.Lock()
+        return self._locks[path]
+
+    @staticmethod
+    def file_signature(path: Path) -> List[Any]:
+        """Signature of a file: path, size and modification time"""
+        try:
+            stat = path.stat()
+            return [str(path), stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            return [str(path), None, None]
+
+    @staticmethod
+    def dataset_paths(nb: nbformat.NotebookNode, notebook_dir: Path) -> List[Path]:
+        """Dataset files referenced by the code cells of a notebook"""
+        paths = set()
+        for cell in nb.cells:
+            if cell.cell_type != "code":
+                continue
+            for match in DATASET_PATH_RE.findall(cell.source):
+                path = Path(match).expanduser()
+                if not path.is_absolute():
+                    # The kernel runs in the working directory of the server
+                    candidates = [Path.cwd() / path, notebook_dir / path]
+                    path = next((p for p in candidates if p.exists()), candidates[0])
+                paths.add(path.resolve())
+        return sorted(paths)
+
+    def execution_key(self, nb: nbformat.NotebookNode, notebook_dir: Path) -> Tuple[str, List[List[Any]]]:
+        """Content address of the execution of a notebook"""
+        datasets = [self.file_signature(path) for path in self.dataset_paths(nb, notebook_dir)]
+        digest = hashlib.sha256()
+        digest.update(nb.metadata.get("kernelspec", {}).get("name", "python3").encode("utf-8"))
+        for cell in nb.cells:
+            if cell.cell_type == "code":
+                digest.update(b"\0")
+                digest.update(cell.source.encode("utf-8"))
+        digest.update(json.dumps(datasets).encode("utf-8"))
+        return digest.hexdigest(), datasets
+
+    def is_fresh(self, notebook_path: str) -> bool:
+        """True if the outputs in the notebook belong to its current code and datasets"""
+        notebook_file = Path(notebook_path).resolve()
+        path = str(notebook_file)
+        stat = self.file_signature(notebook_file)
+
+        # Fast path: the notebook file is unchanged since it has been checked
+        entry = self._entries.get(path)
+        if entry and entry["stat"] == stat:
+            if all(self.file_signature(Path(sig[0])) == sig for sig in entry["datasets"]):
+                return True
+
+        try:
+            with open(notebook_file, "r", encoding="utf-8") as f:
+                nb = nbformat.read(f, as_version=4)
+        except Exception as e:
+            print(f"[NOTEBOOK_CACHE] Error reading {notebook_file.name}: {e}")
+            self._entries.pop(path, None)
+            return False
+
+        key, datasets = self.execution_key(nb, notebook_file.parent)
+        stored_key = nb.metadata.get(self.METADATA_KEY, {}).get("key")
+        if stored_key != key:
+            self._entries.pop(path, None)
+            return False
+
+        self._entries[path] = {"stat": stat, "datasets": datasets}
+        return True
+
+    def mark_executed(self, nb: nbformat.NotebookNode, notebook_path: str) -> Dict[str, Any]:
+        """Store the execution key in the metadata of an executed notebook (before it is written)"""
+        notebook_file = Path(notebook_path).resolve()
+        key, datasets = self.execution_key(nb, notebook_file.parent)
+        nb.metadata[self.METADATA_KEY] = {
+            "key": key,
+            "executed_at": datetime.now(timezone.utc).isoformat()
+        }
+        return {"datasets": datasets}
+
+    def remember(self, notebook_path: str, execution: Dict[str, Any]):
+        """Remember the signature of the written notebook for the fast path"""
+        notebook_file = Path(notebook_path).resolve()
+        self._entries[str(notebook_file)] = {
+            "stat": self.file_signature(notebook_file),
+            "datasets": execution["datasets"]
+        }
+
+    def forget(self, notebook_path: Optional[str] = None):
+        """Forget one notebook (or all), the stored keys in the notebooks stay valid"""
+        if notebook_path is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(str(Path(notebook_path).resolve()), None)
+
+
+# Global notebook execution cache
+notebook_cache = NotebookExecutionCache()
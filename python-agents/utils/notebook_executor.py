@@ -7,28 +7,12 @@ from datetime import datetime
 from typing import Dict, Any, List
 import nbformat as nbf
 from nbformat import read, write, NO_CONVERT
-from jupyter_client import KernelManager
-import queue
-import threading
-import time
+from utils.kernel_pool import kernel_pool
 
 class NotebookExecutor:
     def __init__(self):
         self.notebooks: Dict[str, nbf.NotebookNode] = {}
         self.failed_cells: Dict[str, List[int]] = {}
-        self.kernel_manager = None
-        self.kernel_client = None
-        self._start_kernel()
-
-    def _start_kernel(self):
-        """Start Jupyter kernel for real execution"""
-        try:
-            self.kernel_manager = KernelManager()
-            self.kernel_manager.start_kernel()
-            self.kernel_client = self.kernel_manager.client()
-            print("[NOTEBOOK] Started Jupyter kernel")
-        except Exception as e:
-            print(f"[NOTEBOOK] Failed to start kernel: {e}")
 
     def create_notebook(self, notebook_path: str) -> str:
         """Create actual Jupyter notebook file"""
@@ -122,8 +106,9 @@ class NotebookExecutor:
             print(f"[NOTEBOOK] Error adding code cell: {e}")
             return ""
 
-    async def execute_code_cell(self, notebook_path: str, code: str, cell_number: int) -> Dict[str, Any]:
-        """Execute code cell in Jupyter kernel"""
+    async def execute_code_cell(self, notebook_path: str, code: str, cell_number: int,
+                                session_key: str = None) -> Dict[str, Any]:
+        """Execute code cell in the pooled Jupyter kernel of the session (default: the notebook)"""
         notebook_path = str(Path(notebook_path).resolve())
         
         # Add cell to notebook first
@@ -133,43 +118,11 @@ class NotebookExecutor:
             return {"success": False, "error": "Failed to add cell to notebook", "cell_id": ""}
 
         try:
-            # Execute in kernel
-            if not self.kernel_client:
-                return {"success": False, "error": "Kernel not available", "cell_id": cell_id}
-
-            # Send code to kernel
-            msg_id = self.kernel_client.execute(code)
-            
-            # Collect outputs
-            timeout = 30
-            outputs = []
-            error_outputs = []
-            start_time = time.time()
-            
-            while time.time() - start_time < timeout:
-                try:
-                    msg = self.kernel_client.get_iopub_msg(timeout=1)
-                    
-                    if msg['parent_header'].get('msg_id') == msg_id:
-                        msg_type = msg['msg_type']
-                        content = msg['content']
-                        
-                        if msg_type == 'stream':
-                            outputs.append(content['text'])
-                        elif msg_type == 'execute_result':
-                            outputs.append(content['data'].get('text/plain', ''))
-                        elif msg_type == 'display_data':
-                            # Handle plots/images
-                            outputs.append("Display data generated")
-                        elif msg_type == 'error':
-                            error_outputs.append(f"{content['ename']}: {content['evalue']}")
-                        elif msg_type == 'status' and content['execution_state'] == 'idle':
-                            break
-                            
-                except queue.Empty:
-                    continue
-                except Exception as e:
-                    break
+            # Execute in the kernel of this notebook's session
+            kernel = await kernel_pool.acquire(session_key or notebook_path)
+            result = await kernel.execute(code, timeout=30)
+            outputs = result["outputs"]
+            error_outputs = result["errors"]
 
             # Update notebook with results
             self._update_cell_output(notebook_path, cell_id, outputs, error_outputs)
@@ -298,17 +251,18 @@ class NotebookExecutor:
         except Exception as e:
             return {"error": str(e)}
 
-    def shutdown(self):
-        """Clean shutdown of Jupyter kernel"""
+    def pin_kernel(self, notebook_path: str):
+        """Keep the kernel of a notebook for a whole analysis, it is not evicted between its cells"""
+        kernel_pool.pin(str(Path(notebook_path).resolve()))
+
+    async def unpin_kernel(self, notebook_path: str):
+        """End of the analysis, the pool may evict the idle kernel again"""
+        await kernel_pool.unpin(str(Path(notebook_path).resolve()))
+
+    async def release_kernel(self, session_key: str):
+        """Shut down the kernel of a session, idle kernels are also evicted by the pool"""
         try:
-            if self.kernel_client:
-                self.kernel_client.stop_channels()
-            if self.kernel_manager:
-                self.kernel_manager.shutdown_kernel()
-            print("[NOTEBOOK] Jupyter kernel shut down")
+            await kernel_pool.release(session_key)
+            print(f"[NOTEBOOK] Jupyter kernel of {Path(session_key).name} shut down")
         except Exception as e:
             print(f"[NOTEBOOK] Error shutting down kernel: {e}")
-
-    def __del__(self):
-        """Cleanup on deletion"""
-        self.shutdown()
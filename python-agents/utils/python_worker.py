@@ -0,0 +1,97 @@
+"""Worker process of utils.python_worker_pool: executes Python code received as JSON lines on stdin
+
+Started as ``python python_worker.py <memory limit MB> <module> ...``: the
+modules are imported once at startup, then each job runs in a fresh
+namespace.  The answer of a job is one JSON line on the original stdout,
+the prints of the job are captured.
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import traceback
+
+
+def limit_memory(memory_limit_mb: int):
+    """Limit the address space of the worker (POSIX only)"""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def print_job_exception():
+    """Print the traceback of the job without the frame of the worker"""
+    exc_type, exc, tb = sys.exc_info()
+    traceback.print_exception(exc_type, exc, tb.tb_next)
+
+
+def run_job(code: str) -> dict:
+    """Execute code like a script, return its output and exit code"""
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    return_code = 0
+    memory_error = False
+    cwd = os.getcwd()
+
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            exec(compile(code, "<metadata_code>", "exec"), {"__name__": "__main__"})
+        except SystemExit as e:
+            if isinstance(e.code, int):
+                return_code = e.code
+            elif e.code is not None:
+                print(e.code, file=sys.stderr)
+                return_code = 1
+        except MemoryError:
+            memory_error = True
+            return_code = 1
+            print_job_exception()
+        except BaseException:
+            return_code = 1
+            print_job_exception()
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "stdout": stdout.getvalue().strip(),
+        "stderr": stderr.getvalue().strip(),
+        "return_code": return_code,
+        "success": return_code == 0,
+        "memory_error": memory_error
+    }
+
+
+def main():
+    memory_limit_mb = int(sys.argv[1])
+    preload = sys.argv[2:]
+
+    # The original stdout is the channel to the pool, writes of the jobs to fd 1 are discarded
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+
+    for module in preload:
+        try:
+            __import__(module)
+        except Exception as e:
+            print(f"[PYTHON_WORKER] Failed to preload {module}: {e}", file=sys.stderr)
+    limit_memory(memory_limit_mb)
+
+    channel.write(json.dumps({"ready": True, "pid": os.getpid()}) + "\n")
+    channel.flush()
+
+    for line in sys.stdin:
+        job = json.loads(line)
+        result = run_job(job["code"])
+        channel.write(json.dumps(result) + "\n")
+        channel.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from config import (METADATA_WORKERS, METADATA_WORKER_MAX_JOBS, METADATA_WORKER_MEMORY_MB,
+                    METADATA_WORKER_PRELOAD)
+
+WORKER_SCRIPT = Path(__file__).with_name("python_worker.py")
+
+
+class PythonWorker:
+    """A long-lived Python process (utils/python_worker.py) that executes one job at a time"""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.jobs = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def run(self, code: str) -> Dict[str, Any]:
+        self.jobs += 1
+        self.process.stdin.write((json.dumps({"code": code}) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+        line = await self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"Worker process exited (code {self.process.returncode})")
+        return json.loads(line)
+
+    async def kill(self):
+        if self.alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+        await self.process.wait()
+
+
+class PythonWorkerPool:
+    """Pre-warmed Python processes with pandas/numpy imported, recycled after N jobs"""
+
+    def __init__(self, size: int = METADATA_WORKERS, max_jobs: int = METADATA_WORKER_MAX_JOBS,
+                 memory_limit_mb: int = METADATA_WORKER_MEMORY_MB, preload: List[str] = METADATA_WORKER_PRELOAD):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.memory_limit_mb = memory_limit_mb
+        self.preload = list(preload)
+        self._idle: Optional[asyncio.Queue] = None
+        self._background: set = set()
+        self._live = 0  # started workers, idle or running a job
+        self._failed_starts = 0  # failed starts since the last started worker
+        self.stats = {"jobs": 0, "timeouts": 0, "recycled": 0, "crashed": 0}
+
+    async def _start_worker(self) -> PythonWorker:
+        """Start a worker and wait until the libraries are imported"""
+        env = dict(os.environ)
+        # One BLAS thread: less memory per worker, the jobs are small
+        env.setdefault("OPENBLAS_NUM_THREADS", "1")
+        env.setdefault("OMP_NUM_THREADS", "1")
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, str(WORKER_SCRIPT), str(self.memory_limit_mb), *self.preload,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=str(Path.cwd()),
+            env=env
+        )
+        worker = PythonWorker(process)
+        try:
+            ready = await asyncio.wait_for(process.stdout.readline(), timeout=120)
+        except BaseException:
+            # Timed out or cancelled (shutdown), the process is not left behind
+            await worker.kill()
+            raise
+        if not ready:
+            await worker.kill()
+            raise RuntimeError("Worker process failed to start")
+        return worker
+
+    async def start(self):
+        """Start the workers of the pool (application startup or first job)"""
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._replace_worker()
+        print(f"[WORKER_POOL] Starting {self.size} Python workers")
+
+    def _replace_worker(self, worker: Optional[PythonWorker] = None):
+        """Kill a worker (if given) and start a new one in the background"""
+        async def replace():
+            if worker is not None:
+                self._live -= 1
+                await worker.kill()
+            idle = self._idle
+            if idle is None:
+                return
+            try:
+                new_worker = await self._start_worker()
+            except Exception as e:
+                self._failed_starts += 1
+                print(f"[WORKER_POOL] Failed to start worker: {e}")
+                # Retry later, unless the pool was shut down meanwhile
+                await asyncio.sleep(5)
+                if self._idle is idle:
+                    self._replace_worker()
+                return
+            if self._idle is not idle:
+                await new_worker.kill()
+                return
+            self._live += 1
+            self._failed_starts = 0
+            idle.put_nowait(new_worker)
+
+        task = asyncio.create_task(replace())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def run(self, code: str, timeout: float = 15) -> Dict[str, Any]:
+        """Execute code in a worker, same result format as a subprocess run"""
+        await self.start()
+        if self._idle.empty() and self._live == 0 and self._failed_starts > 0:
+            # No worker could be started, the caller falls back to a subprocess
+            raise RuntimeError("No Python worker is running")
+        worker = await asyncio.wait_for(self._idle.get(), timeout=120)
+        self.stats["jobs"] += 1
+        try:
+            result = await asyncio.wait_for(worker.run(code), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self._replace_worker(worker)
+            return {"stdout": "", "stderr": f"Execution timed out after {timeout}s", "return_code": -1,
+                    "success": False}
+        except Exception as e:
+            self.stats["crashed"] += 1
+            self._replace_worker(worker)
+            return {"stdout": "", "stderr": str(e), "return_code": -1, "success": False}
+        except BaseException:
+            # Cancelled caller (job cancel, tool timeout, shutdown): the worker may still be running the code
+            self._replace_worker(worker)
+            raise
+
+        # Recycle workers after N jobs or a memory error, jobs may leave state behind
+        if result.pop("memory_error", False) or worker.jobs >= self.max_jobs or not worker.alive:
+            self.stats["recycled"] += 1
+            self._replace_worker(worker)
+        elif self._idle is not None:
+            self._idle.put_nowait(worker)
+        else:
+            await worker.kill()
+        return result
+
+    async def shutdown(self):
+        """Kill all idle workers (application shutdown)"""
+        if self._idle is None:
+            return
+        for task in list(self._background):
+            task.cancel()
+        idle, self._idle = self._idle, None
+        while not idle.empty():
+            self._live -= 1
+            await idle.get_nowait().kill()
+
+
+# Global pool of the metadata agent
+python_worker_pool = PythonWorkerPool()
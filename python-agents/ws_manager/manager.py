@@ -2,15 +2,117 @@
 
 import json
 import asyncio
-from typing import Dict, Set, List
+from collections import deque
+from typing import Dict, Set, List, Iterable, Optional
 from fastapi import WebSocket
 from datetime import datetime, timezone
 
+from config import WS_SEND_QUEUE_SIZE, WS_SLOW_CONSUMER_POLICY, WS_COALESCE_TYPES
+
+
+class ConnectionWriter:
+    """
+    Bounded outbound queue of one WebSocket, drained by its own writer task.
+    A slow client only delays its own messages.
+    """
+
+    def __init__(self, websocket: WebSocket, on_error, max_queue: int = WS_SEND_QUEUE_SIZE,
+                 policy: str = WS_SLOW_CONSUMER_POLICY):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        # entries: [coalesce key, encoded message], the message is None once superseded
+        self._queue: deque = deque()
+        self._latest: Dict[tuple, list] = {}
+        self._live = 0
+        self._wakeup = asyncio.Event()
+        self._on_error = on_error
+        self.stats = {"sent": 0, "dropped": 0, "coalesced": 0, "max_depth": 0}
+        self._task = asyncio.create_task(self._drain())
+
+    @property
+    def depth(self) -> int:
+        return self._live
+
+    def enqueue(self, payload: str, coalesce_key: Optional[tuple] = None) -> bool:
+        """
+        Queue an encoded message. Returns False if the client is too slow and must be disconnected.
+        """
+        if coalesce_key is not None:
+            # A newer state message supersedes the queued one (latest wins)
+            previous = self._latest.get(coalesce_key)
+            if previous is not None and previous[1] is not None:
+                previous[1] = None
+                self._live -= 1
+                self.stats["coalesced"] += 1
+
+        if self._live >= self.max_queue:
+            # Only state messages (coalesced types) may be dropped, a client that
+            # would lose any other message is disconnected and resyncs on reconnect
+            if self.policy == "disconnect":
+                return False
+            if self.policy == "drop_newest" and coalesce_key is not None:
+                self.stats["dropped"] += 1
+                return True
+            if not self._drop_oldest_state_message():
+                return False
+
+        entry = [coalesce_key, payload]
+        self._queue.append(entry)
+        self._live += 1
+        if coalesce_key is not None:
+            self._latest[coalesce_key] = entry
+        if len(self._queue) > 2 * self.max_queue:
+            # Compact the superseded entries
+            self._queue = deque(e for e in self._queue if e[1] is not None)
+        self.stats["max_depth"] = max(self.stats["max_depth"], self._live)
+        self._wakeup.set()
+        return True
+
+    def _drop_oldest_state_message(self) -> bool:
+        for entry in self._queue:
+            if entry[0] is not None and entry[1] is not None:
+                entry[1] = None
+                self._live -= 1
+                if self._latest.get(entry[0]) is entry:
+                    del self._latest[entry[0]]
+                self.stats["dropped"] += 1
+                return True
+        return False
+
+    async def _drain(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                coalesce_key, payload = self._queue.popleft()
+                if payload is None:
+                    continue
+                self._live -= 1
+                if coalesce_key is not None and self._latest.get(coalesce_key, [None, None])[1] is payload:
+                    del self._latest[coalesce_key]
+                await self.websocket.send_text(payload)
+                self.stats["sent"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._on_error(self.websocket)
+
+    def close(self):
+        self._task.cancel()
+        self._queue.clear()
+        self._latest.clear()
+        self._live = 0
+
 
 class WebSocketMultiManager:
     def __init__(self):
         # key: (route, chat_id), value: set of active WebSocket connections
         self.active_connections: Dict[tuple[str, str], Set[WebSocket]] = {}
+        # One writer per connection, messages are encoded once per send
+        self._writers: Dict[WebSocket, ConnectionWriter] = {}
+        self.stats = {"messages": 0, "deliveries": 0, "send_errors": 0, "slow_consumers_disconnected": 0}
 
     async def connect(self, websocket: WebSocket, chat_id: str, route: str):
         """
@@ -19,6 +121,9 @@ class WebSocketMultiManager:
         try:
             await websocket.accept()
             key = (route, chat_id)
+
+            if websocket not in self._writers:
+                self._writers[websocket] = ConnectionWriter(websocket, self._on_send_error)
             
             if key not in self.active_connections:
                 self.active_connections[key] = set()
@@ -47,36 +152,77 @@ class WebSocketMultiManager:
             if not self.active_connections[key]:
                 del self.active_connections[key]
 
-    async def send(self, route: str, chat_id: str, message: dict):
+        # Stop the writer once the connection is not registered anywhere
+        if websocket in self._writers and not any(websocket in conns for conns in self.active_connections.values()):
+            self._writers.pop(websocket).close()
+
+    def _deliver(self, connections: Iterable[WebSocket], message: dict):
         """
-        Send a JSON message to all WebSockets registered for given route and chat_id.
-        Removes closed/broken connections.
+        Encode a message once and queue it on the writer of each connection.
         """
-        key = (route, chat_id)
-        connections = self.active_connections.get(key, set()).copy()
-
+        connections = [ws for ws in connections if ws in self._writers]
         if not connections:
             return
 
-        disconnected = set()
+        payload = json.dumps(message)
+        message_type = message.get("type")
+        coalesce_key = (message_type, message.get("chat_id")) if message_type in WS_COALESCE_TYPES else None
+        self.stats["messages"] += 1
+
+        slow = []
         for ws in connections:
-            try:
-                await ws.send_text(json.dumps(message))
-            except Exception:
-                disconnected.add(ws)
+            if self._writers[ws].enqueue(payload, coalesce_key):
+                self.stats["deliveries"] += 1
+            else:
+                slow.append(ws)
 
-        # Clean up disconnected websockets
-        for ws in disconnected:
-            self.disconnect(ws, chat_id, route)
+        for ws in slow:
+            print("[WebSocket] Disconnecting slow client, send queue is full")
+            self.stats["slow_consumers_disconnected"] += 1
+            self._remove_websocket(ws)
+            asyncio.create_task(self._close_quietly(ws, code=1013))
+
+    def _on_send_error(self, websocket: WebSocket):
+        """
+        Writer task failed (closed or stuck connection): forget the connection.
+        """
+        self.stats["send_errors"] += 1
+        self._remove_websocket(websocket)
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def send(self, route: str, chat_id: str, message: dict):
+        """
+        Send a JSON message to all WebSockets registered for given route and chat_id.
+        The message is queued per connection, broken connections are removed by their writer.
+        """
+        self.publish(route, chat_id, message)
+
+    def publish(self, route: str, chat_id: str, message: dict):
+        """
+        Synchronous version of send for non-async code, the message is only queued.
+        """
+        self._deliver(self.active_connections.get((route, chat_id), ()), message)
+
+    async def send_to_connection(self, websocket: WebSocket, message: dict):
+        """
+        Send a JSON message to one registered connection, in order with the other messages it receives.
+        """
+        self._deliver([websocket], message)
 
     async def broadcast_to_all_routes(self, message: dict):
         """
         Broadcast a message to all connected WebSocket clients across all routes.
         Used for dashboard updates, new conversation creation, etc.
         """
-        all_websockets = []
+        all_websockets = set()
         for connections in self.active_connections.values():
-            all_websockets.extend(connections)
+            all_websockets.update(connections)
 
         if not all_websockets:
             return
@@ -84,36 +230,18 @@ class WebSocketMultiManager:
         # Add timestamp to broadcast messages
         message["broadcast_timestamp"] = datetime.now(timezone.utc).isoformat()
 
-        disconnected = []
-        for ws in all_websockets:
-            try:
-                await ws.send_text(json.dumps(message))
-            except Exception:
-                disconnected.append(ws)
-
-        # Clean up broken connections
-        await self._cleanup_disconnected_websockets(disconnected)
+        self._deliver(all_websockets, message)
 
     async def broadcast_to_route(self, route: str, message: dict):
         """
         Broadcast to all connections on a specific route (e.g., all dashboard connections).
         """
-        matching_connections = []
+        matching_connections = set()
         for (r, _), connections in self.active_connections.items():
             if r == route:
-                matching_connections.extend(connections)
-
-        if not matching_connections:
-            return
-
-        disconnected = []
-        for ws in matching_connections:
-            try:
-                await ws.send_text(json.dumps(message))
-            except Exception:
-                disconnected.append(ws)
+                matching_connections.update(connections)
 
-        await self._cleanup_disconnected_websockets(disconnected)
+        self._deliver(matching_connections, message)
 
     async def broadcast_conversation_created(self, chat_id: str, title: str):
         """
@@ -168,6 +296,57 @@ class WebSocketMultiManager:
         }
         await self.send("chat", chat_id, message)
 
+    async def broadcast_message_start(self, chat_id: str, message_id: str):
+        """
+        Announce a streamed assistant message to chat clients.
+        """
+        message = {
+            "type": "message_start",
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "role": "assistant",
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        await self.send("chat", chat_id, message)
+
+    async def broadcast_message_delta(self, chat_id: str, message_id: str, delta: str, index: int):
+        """
+        Send the next tokens of a streamed assistant message to chat clients.
+        """
+        message = {
+            "type": "message_delta",
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "index": index,
+            "delta": delta
+        }
+        await self.send("chat", chat_id, message)
+
+    async def broadcast_message_end(self, chat_id: str, message_id: str, final_message: dict = None, status: str = "completed"):
+        """
+        Close a streamed assistant message, final_message is the persisted message.
+        """
+        message = {
+            "type": "message_end",
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "status": status,
+            "message": final_message,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        await self.send("chat", chat_id, message)
+
+    def broadcast_history_delta(self, chat_id: str, seq: int, message: dict):
+        """
+        Send a new message of a conversation to history clients, seq is its position in the history.
+        """
+        self.publish("history", chat_id, {
+            "type": "history_delta",
+            "chat_id": chat_id,
+            "seq": seq,
+            "message": message
+        })
+
     async def broadcast_tool_call_triggered(self, chat_id: str, tool_call: dict):
         """
         Broadcast tool call initiation to chat clients.
@@ -223,15 +402,17 @@ class WebSocketMultiManager:
         Helper method to clean up disconnected websockets from all routes.
         """
         for ws in disconnected_websockets:
-            # Find and remove the websocket from active connections
-            keys_to_update = []
-            for key, connections in self.active_connections.items():
-                if ws in connections:
-                    keys_to_update.append((key, ws))
-            
-            for key, ws_to_remove in keys_to_update:
-                route, chat_id = key
-                self.disconnect(ws_to_remove, chat_id, route)
+            self._remove_websocket(ws)
+
+    def _remove_websocket(self, ws: WebSocket):
+        """
+        Remove a websocket from all routes and stop its writer.
+        """
+        keys_to_update = [key for key, connections in self.active_connections.items() if ws in connections]
+        for route, chat_id in keys_to_update:
+            self.disconnect(ws, chat_id, route)
+        if ws in self._writers:
+            self._writers.pop(ws).close()
 
     def get_connection_stats(self) -> dict:
         """
@@ -250,6 +431,19 @@ class WebSocketMultiManager:
             stats["active_chats"].add(chat_id)
         
         stats["active_chats"] = len(stats["active_chats"])
+
+        # Outbound queues of the open connections
+        writers = list(self._writers.values())
+        stats.update(self.stats)
+        stats["send_queues"] = {
+            "queued": sum(w.depth for w in writers),
+            "max_depth": max((w.stats["max_depth"] for w in writers), default=0),
+            "sent": sum(w.stats["sent"] for w in writers),
+            "dropped": sum(w.stats["dropped"] for w in writers),
+            "coalesced": sum(w.stats["coalesced"] for w in writers),
+            "queue_size": WS_SEND_QUEUE_SIZE,
+            "slow_consumer_policy": WS_SLOW_CONSUMER_POLICY
+        }
         return stats
 
     async def ping_all_connections(self):
@@ -1,15 +1,19 @@
 """Implementation of caching solutions.
 
 - :py:obj:`searx.cache.ExpireCache` and its :py:obj:`searx.cache.ExpireCacheCfg`
+- :py:obj:`searx.cache.ExpireCacheSQLite` and the :py:obj:`searx.cache.ExpireCacheTiered`
+  with an in-memory LRU in front of the SQLite DB
 
 ----
 """
 
 from __future__ import annotations
 
-__all__ = ["ExpireCacheCfg", "ExpireCacheStats", "ExpireCache", "ExpireCacheSQLite"]
+__all__ = ["ExpireCacheCfg", "ExpireCacheStats", "ExpireCache", "ExpireCacheSQLite", "ExpireCacheTiered"]
 
 import abc
+import atexit
+import collections
 from collections.abc import Iterator
 import dataclasses
 import datetime
@@ -20,8 +24,10 @@ import pickle
 import sqlite3
 import string
 import tempfile
+import threading
 import time
 import typing
+import weakref
 
 import msgspec
 
@@ -64,6 +70,29 @@ class ExpireCacheCfg(msgspec.Struct):  # pylint: disable=too-few-public-methods
       if required.
     """
 
+    WRITE_BATCH_SIZE: int = 32
+    """Values set by :py:obj:`ExpireCacheSQLite.set` are collected in a write
+    buffer and written to the DB in one transaction as soon as the buffer holds
+    ``WRITE_BATCH_SIZE`` values (or :py:obj:`WRITE_BATCH_DELAY` has expired).
+    A value of ``1`` disables the write buffer."""
+
+    WRITE_BATCH_DELAY: float = 0.5
+    """Max time in seconds a value remains in the write buffer.  In the meantime
+    the value is returned from the buffer (in this process)."""
+
+    MEMORY_MAX_ITEMS: int = 0
+    """Max number of key/value pairs in the in-memory LRU of the
+    :py:obj:`ExpireCacheTiered`.  If set (``> 0``), :py:obj:`ExpireCache.build_cache`
+    builds a :py:obj:`ExpireCacheTiered` cache."""
+
+    MEMORY_MAX_BYTES: int = 1024 * 1024 * 8
+    """Max size of all (*serialized*) values in the in-memory LRU."""
+
+    MEMORY_MAXHOLD_TIME: int = 60 * 10
+    """Max time in seconds a value is held in the in-memory LRU (a value is
+    also dropped when the expire time of the value is reached).  Limits the
+    time a value changed by another process is not seen in this process."""
+
     password: bytes = get_setting("server.secret_key").encode()  # type: ignore
     """Password used by :py:obj:`ExpireCache.secret_hash`.
 
@@ -98,6 +127,18 @@ class ExpireCacheStats:
        }
     """
 
+    ctx_stats: dict[str, dict[str, int]] = dataclasses.field(default_factory=dict)
+    """Statistics of the in-memory LRU (:py:obj:`ExpireCacheTiered`) mapped by
+    context name.
+
+    .. code: python
+
+       {
+           "context name": {"hits": 42, "misses": 3, "items": 12},
+           # ...
+       }
+    """
+
     def report(self):
         c_ctx = 0
         c_kv = 0
@@ -116,6 +157,11 @@ class ExpireCacheStats:
 
         lines.append(f"Number of contexts: {c_ctx}")
         lines.append(f"number of key/value pairs: {c_kv}")
+
+        for ctx_name, stats in self.ctx_stats.items():
+            lines.append(
+                f"[{ctx_name:20s}] memory: {stats['items']} items, {stats['hits']} hits, {stats['misses']} misses"
+            )
         return "\n".join(lines)
 
 
@@ -173,12 +219,18 @@ class ExpireCache(abc.ABC):
     def build_cache(cfg: ExpireCacheCfg) -> ExpireCache:
         """Factory to build a caching instance.
 
+        If :py:obj:`ExpireCacheCfg.MEMORY_MAX_ITEMS` is set, a
+        :py:obj:`ExpireCacheTiered` is build, otherwise a
+        :py:obj:`ExpireCacheSQLite`.
+
         .. note::
 
            Currently, only the SQLite adapter is available, but other database
            types could be implemented in the future, e.g. a Valkey (Redis)
            adapter.
         """
+        if cfg.MEMORY_MAX_ITEMS > 0:
+            return ExpireCacheTiered(cfg)
         return ExpireCacheSQLite(cfg)
 
     @staticmethod
@@ -238,6 +290,22 @@ class ExpireCacheSQLite(sqlitedb.SQLiteAppl, ExpireCache):
             log.critical("don't use SQLite DB in :memory: in production!!")
         super().__init__(cfg.db_url)
 
+        self._tables: set[str] = set()
+        self._next_maintenance: int = 0
+
+        # write buffer: {<table>: {<key>: (<serialized value>, <expire>)}}
+        self._pending: dict[str, dict[str, tuple[bytes, int]]] = {}
+        self._pending_count = 0
+        self._write_lock = threading.RLock()
+        self._flush_timer: threading.Timer | None = None
+        self._batch_size = cfg.WRITE_BATCH_SIZE
+        if cfg.db_url == ":memory:":
+            # each connection (thread) has its own in-memory DB, the buffer
+            # can't be flushed from another thread
+            self._batch_size = 1
+        if self._batch_size > 1:
+            _WRITE_BUFFERED.add(self)
+
     def init(self, conn: sqlite3.Connection) -> bool:
         ret_val = super().init(conn)
         if not ret_val:
@@ -255,13 +323,24 @@ class ExpireCacheSQLite(sqlitedb.SQLiteAppl, ExpireCache):
 
     def maintenance(self, force: bool = False, truncate: bool = False) -> bool:
 
-        if not force and int(time.time()) < self.next_maintenance_time:
-            # log.debug("no maintenance required yet, next maintenance interval is in the future")
-            return False
+        now = int(time.time())
+        if not force:
+            if now < self._next_maintenance:
+                # The time of the next maintenance is only read from the DB
+                # when the time of the last lookup has been reached.
+                return False
+            self._next_maintenance = self.next_maintenance_time
+            if now < self._next_maintenance:
+                # log.debug("no maintenance required yet, next maintenance interval is in the future")
+                return False
+
+        if not truncate:
+            self.flush()
 
         # Prevent parallel DB maintenance cycles from other DB connections
         # (e.g. in multi thread or process environments).
         self.properties.set("LAST_MAINTENANCE", "")  # hint: this (also) sets the m_time of the property!
+        self._next_maintenance = now + self.cfg.MAINTENANCE_PERIOD
 
         if truncate:
             self.truncate_tables(self.table_names)
@@ -287,7 +366,7 @@ class ExpireCacheSQLite(sqlitedb.SQLiteAppl, ExpireCache):
         """Create DB ``table`` if it has not yet been created, no recreates are
         initiated if the table already exists.
         """
-        if table in self.table_names:
+        if self.has_table(table):
             # log.debug("key/value table %s exists in DB (no need to recreate)", table)
             return False
 
@@ -308,8 +387,19 @@ class ExpireCacheSQLite(sqlitedb.SQLiteAppl, ExpireCache):
         conn.close()
 
         self.properties.set(f"{self.CACHE_TABLE_PREFIX}-{table}", table)
+        self._tables.add(table)
         return True
 
+    def has_table(self, table: str) -> bool:
+        """Returns ``True`` if the key/value ``table`` exists in the DB.  Tables
+        are never dropped, a table once found is not looked up again."""
+        if table in self._tables:
+            return True
+        if table in self.table_names:
+            self._tables.add(table)
+            return True
+        return False
+
     @property
     def table_names(self) -> list[str]:
         """List of key/value tables already created in the DB."""
@@ -356,23 +446,61 @@ class ExpireCacheSQLite(sqlitedb.SQLiteAppl, ExpireCache):
         table_name = table
         if not table_name:
             table_name = self.normalize_name(self.cfg.name)
-        self.create_table(table_name)
 
-        sql = (
+        self._set_item(table_name, key, value, expire)
+        return True
+
+    def _set_item(self, table_name: str, key: str, value: bytes, expire: int):
+        if self._batch_size > 1:
+            self._buffer_write(table_name, key, value, expire)
+        else:
+            self.create_table(table_name)
+            with self.DB:
+                self.DB.execute(self._sql_upsert(table_name), (key, value, expire, value, expire))
+
+    @staticmethod
+    def _sql_upsert(table_name: str) -> str:
+        return (
             f"INSERT INTO {table_name} (key, value, expire) VALUES (?, ?, ?)"
             f"    ON CONFLICT DO "
             f"UPDATE SET value=?, expire=?"
         )
 
-        if table:
-            with self.DB:
-                self.DB.execute(sql, (key, value, expire, value, expire))
-        else:
-            with self.connect() as conn:
-                conn.execute(sql, (key, value, expire, value, expire))
-            conn.close()
-
-        return True
+    def _buffer_write(self, table_name: str, key: str, value: bytes, expire: int):
+        with self._write_lock:
+            self._pending.setdefault(table_name, {})[key] = (value, expire)
+            self._pending_count += 1
+            if self._pending_count >= self._batch_size:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.cfg.WRITE_BATCH_DELAY, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Write the values from the write buffer of :py:obj:`ExpireCacheSQLite.set`
+        to the DB (one transaction for all values)."""
+        with self._write_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending:
+                return
+            # init the DB (schema, hash token) before writing the values
+            conn = self.DB
+            pending = self._pending
+            for table_name in pending:
+                self.create_table(table_name)
+            # the values remain in the buffer (for readers) until the
+            # transaction is committed
+            with conn:
+                for table_name, items in pending.items():
+                    conn.executemany(
+                        self._sql_upsert(table_name),
+                        [(key, value, expire, value, expire) for key, (value, expire) in items.items()],
+                    )
+            self._pending = {}
+            self._pending_count = 0
 
     def get(self, key: str, default=None, ctx: str | None = None) -> typing.Any:
         """Get value of ``key`` from table given by argument ``ctx``.  If
@@ -387,15 +515,28 @@ class ExpireCacheSQLite(sqlitedb.SQLiteAppl, ExpireCache):
         if not table:
             table = self.normalize_name(self.cfg.name)
 
-        if table not in self.table_names:
+        item = self._get_item(table, key)
+        if item is None:
             return default
 
-        sql = f"SELECT value FROM {table} WHERE key = ?"
+        return self.deserialize(item[0])
+
+    def _get_item(self, table: str, key: str) -> tuple[bytes, int] | None:
+        """Returns the *serialized* value and the expire time of ``key`` from
+        the write buffer or the DB ``table``."""
+
+        pending = self._pending.get(table)
+        if pending is not None and key in pending:
+            return pending[key]
+
+        if not self.has_table(table):
+            return None
+
+        sql = f"SELECT value, expire FROM {table} WHERE key = ?"
         row = self.DB.execute(sql, (key,)).fetchone()
         if row is None:
-            return default
-
-        return self.deserialize(row[0])
+            return None
+        return row[0], row[1]
 
     def pairs(self, ctx: str) -> Iterator[tuple[str, typing.Any]]:
         """Iterate over key/value pairs from table given by argument ``ctx``.
@@ -403,18 +544,142 @@ class ExpireCacheSQLite(sqlitedb.SQLiteAppl, ExpireCache):
         generated from the :py:obj:`ExpireCacheCfg.name`."""
         table = ctx
         self.maintenance()
+        self.flush()
 
         if not table:
             table = self.normalize_name(self.cfg.name)
 
-        if table in self.table_names:
+        if self.has_table(table):
             for row in self.DB.execute(f"SELECT key, value FROM {table}"):
                 yield row[0], self.deserialize(row[1])
 
     def state(self) -> ExpireCacheStats:
+        self.flush()
         cached_items = {}
         for table in self.table_names:
             cached_items[table] = []
             for row in self.DB.execute(f"SELECT key, value, expire FROM {table}"):
                 cached_items[table].append((row[0], self.deserialize(row[1]), row[2]))
         return ExpireCacheStats(cached_items=cached_items)
+
+
+class ExpireCacheTiered(ExpireCacheSQLite):
+    """A :py:obj:`ExpireCacheSQLite` with an in-memory LRU in front of the DB.
+
+    Values read from the DB (or set in this process) are held in the LRU, hot
+    values are returned without a SQL query and without deserializing the
+    value again.  Writes are passed through to the DB (:py:obj:`set
+    <ExpireCacheSQLite.set>`).
+
+    The LRU is bounded by :py:obj:`ExpireCacheCfg.MEMORY_MAX_ITEMS` and
+    :py:obj:`ExpireCacheCfg.MEMORY_MAX_BYTES`, a value is dropped from the LRU
+    when its expire time or :py:obj:`ExpireCacheCfg.MEMORY_MAXHOLD_TIME` is
+    reached.
+
+    .. note::
+
+       The values returned from the LRU are shared by all callers, they must
+       not be modified.
+
+    The hits and misses of the LRU are counted per context and reported in
+    :py:obj:`ExpireCacheStats.ctx_stats`.
+    """
+
+    def __init__(self, cfg: ExpireCacheCfg):
+        super().__init__(cfg)
+        self._lru_lock = threading.Lock()
+        # {(<table>, <key>): (<expire>, <size>, <value>)}
+        self._lru: collections.OrderedDict[tuple[str, str], tuple[float, int, typing.Any]] = collections.OrderedDict()
+        self._lru_bytes = 0
+        # {<table>: [<hits>, <misses>]}
+        self._ctx_stats: dict[str, list[int]] = {}
+
+    def get(self, key: str, default=None, ctx: str | None = None) -> typing.Any:
+        """Get value of ``key`` from the in-memory LRU, if the value is not
+        in the LRU, the value is read from the DB (see
+        :py:obj:`ExpireCacheSQLite.get`)."""
+
+        table = ctx or self.normalize_name(self.cfg.name)
+        now = time.time()
+
+        with self._lru_lock:
+            stats = self._ctx_stats.setdefault(table, [0, 0])
+            item = self._lru.get((table, key))
+            if item is not None:
+                if item[0] >= now:
+                    self._lru.move_to_end((table, key))
+                    stats[0] += 1
+                    return item[2]
+                self._lru_remove((table, key))
+            stats[1] += 1
+
+        self.maintenance()
+        item = self._get_item(table, key)
+        if item is None:
+            return default
+
+        value = self.deserialize(item[0])
+        self._lru_put(table, key, value, len(item[0]), item[1])
+        return value
+
+    def _set_item(self, table_name: str, key: str, value: bytes, expire: int):
+        super()._set_item(table_name, key, value, expire)
+        # the LRU gets its own copy of the value (the caller might modify its
+        # object)
+        self._lru_put(table_name, key, self.deserialize(value), len(value), expire)
+
+    def _lru_put(self, table: str, key: str, value: typing.Any, size: int, expire: int):
+        now = time.time()
+        expire = min(expire, now + self.cfg.MEMORY_MAXHOLD_TIME)
+        with self._lru_lock:
+            if (table, key) in self._lru:
+                self._lru_remove((table, key))
+            if expire <= now or size > self.cfg.MEMORY_MAX_BYTES:
+                return
+            self._lru[(table, key)] = (expire, size, value)
+            self._lru_bytes += size
+            while len(self._lru) > self.cfg.MEMORY_MAX_ITEMS or self._lru_bytes > self.cfg.MEMORY_MAX_BYTES:
+                self._lru_remove(next(iter(self._lru)))
+
+    def _lru_remove(self, lru_key: tuple[str, str]):
+        _, size, _ = self._lru.pop(lru_key)
+        self._lru_bytes -= size
+
+    def lru_clear(self):
+        """Drop all values from the in-memory LRU."""
+        with self._lru_lock:
+            self._lru.clear()
+            self._lru_bytes = 0
+
+    def maintenance(self, force: bool = False, truncate: bool = False) -> bool:
+        if not super().maintenance(force=force, truncate=truncate):
+            return False
+        if truncate:
+            self.lru_clear()
+            return True
+        now = time.time()
+        with self._lru_lock:
+            for lru_key in [k for k, item in self._lru.items() if item[0] < now]:
+                self._lru_remove(lru_key)
+        return True
+
+    def state(self) -> ExpireCacheStats:
+        state = super().state()
+        with self._lru_lock:
+            items = collections.Counter(table for table, _ in self._lru)
+            for table in sorted(set(items) | set(self._ctx_stats)):
+                hits, misses = self._ctx_stats.get(table, (0, 0))
+                state.ctx_stats[table] = {"hits": hits, "misses": misses, "items": items[table]}
+        return state
+
+
+_WRITE_BUFFERED: weakref.WeakSet[ExpireCacheSQLite] = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_write_buffers():
+    for cache in list(_WRITE_BUFFERED):
+        try:
+            cache.flush()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            log.error("ExpireCache(%s): flushing write buffer failed: %s", cache.cfg.name, exc)
@@ -22,6 +22,9 @@ def get_cache():
         _DATA_CACHE = ExpireCacheSQLite.build_cache(
             ExpireCacheCfg(
                 name="DATA_CACHE",
+                # the data (currencies, ..) is immutable and some of the values
+                # are requested again and again: hold them in memory
+                MEMORY_MAX_ITEMS=1000,
                 # MAX_VALUE_LEN=1024 * 200,  # max. 200kB length for a *serialized* value.
                 # MAXHOLD_TIME=60 * 60 * 24 * 7 * 4,  # 4 weeks
             )
@@ -1,5 +1,14 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
-"""Simple implementation to store TrackerPatterns data in a SQL database."""
+r"""Simple implementation to store TrackerPatterns data in a SQL database.
+
+The rules are stored in the SQL database, for :py:obj:`TrackerPatternsDB.clean_url`
+the rules are loaded once into memory (:py:obj:`TrackerPatternsDB.compiled_rules`)
+where the regular expressions are compiled and the rules are indexed by the
+host label of the provider (e.g. ``amazon`` for the pattern
+``^https?:\/\/(?:[a-z0-9-]+\.)*?amazon(?:\.[a-z]{2,}){1,}``).  Rules which
+can't be indexed (e.g. the global rules with pattern ``.*``) are tested for
+every URL.
+"""
 
 from __future__ import annotations
 import typing
@@ -17,6 +26,111 @@ from searx.network import get as http_get
 
 RuleType = tuple[str, list[str], list[str]]
 
+# URL pattern of a ClearURL provider: scheme, optional sub domains and a
+# literal host label (group 1) which is followed by the rest of the pattern
+# (group 2).
+PROVIDER_HOST_PATTERN = re.compile(r"^\^https\?:\\?/\\?/\(\?:\[a-z0-9-\]\+\\\.\)\*\?([a-z0-9-]+)(.*)$")
+
+# the leading host label of the URL (scheme is stripped)
+URL_HOST = re.compile(r"^[A-Za-z0-9.-]*")
+
+
+def _has_top_level_branch(pattern: str) -> bool:
+    """``True`` if there is a ``|`` outside of groups and character sets."""
+    depth = 0
+    in_set = False
+    escaped = False
+    for c in pattern:
+        if escaped:
+            escaped = False
+        elif c == "\\":
+            escaped = True
+        elif in_set:
+            in_set = c != "]"
+        elif c == "[":
+            in_set = True
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return True
+    return False
+
+
+def _compile_any(patterns: list[str]) -> re.Pattern | None:
+    """Compile a list of patterns into one pattern that matches (``re.match``)
+    if one of the patterns matches."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+class CompiledRule:  # pylint: disable=too-few-public-methods
+    """A rule of the :py:obj:`TrackerPatternsDB` with compiled regular
+    expressions.  The ``index`` is the position of the rule in the DB, the rules
+    are applied in this order."""
+
+    __slots__ = "index", "url_regexp", "url_ignore", "del_args"
+
+    def __init__(self, index: int, rule: RuleType):
+        self.index = index
+        self.url_regexp = re.compile(rule[TrackerPatternsDB.Fields.url_regexp])
+        self.url_ignore = _compile_any(rule[TrackerPatternsDB.Fields.url_ignore])
+        self.del_args = _compile_any(rule[TrackerPatternsDB.Fields.del_args])
+
+
+class CompiledRules:
+    """The rules of the :py:obj:`TrackerPatternsDB` indexed by the host label
+    of the URL pattern."""
+
+    def __init__(self, rules: typing.Iterable[RuleType]):
+        self.by_host_label: dict[str, list[CompiledRule]] = {}
+        self.global_rules: list[CompiledRule] = []
+        self.label_lengths: list[int] = []
+
+        for index, rule in enumerate(rules):
+            try:
+                compiled = CompiledRule(index, rule)
+            except re.error as exc:
+                log.warning("TRACKER_PATTERNS: ignore invalid rule %s (%s)", rule[0], exc)
+                continue
+            label = self.host_label(rule[TrackerPatternsDB.Fields.url_regexp])
+            if label:
+                self.by_host_label.setdefault(label, []).append(compiled)
+            else:
+                self.global_rules.append(compiled)
+
+        self.label_lengths = sorted({len(label) for label in self.by_host_label})
+
+    @staticmethod
+    def host_label(url_regexp: str) -> str:
+        """Returns the literal at the begin of a host label every URL matching
+        ``url_regexp`` contains, an empty string if there is no such literal."""
+        m = PROVIDER_HOST_PATTERN.match(url_regexp)
+        if not m or _has_top_level_branch(url_regexp):
+            return ""
+        label, rest = m.groups()
+        if rest[:1] in ("?", "*", "{"):
+            # the last character of the literal is optional
+            label = label[:-1]
+        return label
+
+    def candidates(self, url: str) -> list[CompiledRule]:
+        """Returns the rules that might match the ``url`` (in the order of
+        the DB)."""
+        rules = list(self.global_rules)
+        _, sep, rest = url.partition("://")
+        if sep:
+            for host_label in URL_HOST.match(rest).group().split("."):  # type: ignore
+                for length in self.label_lengths:
+                    if length > len(host_label):
+                        break
+                    rules.extend(self.by_host_label.get(host_label[:length], ()))
+        if len(rules) > len(self.global_rules):
+            rules.sort(key=lambda rule: rule.index)
+        return rules
+
 
 class TrackerPatternsDB:
     # pylint: disable=missing-class-docstring
@@ -38,6 +152,7 @@ class TrackerPatternsDB:
 
     def __init__(self):
         self.cache = get_cache()
+        self._compiled_rules: CompiledRules | None = None
 
     def init(self):
         if self.cache.properties("tracker_patterns loaded") != "OK":
@@ -52,6 +167,22 @@ class TrackerPatternsDB:
         log.debug("init searx.data.TRACKER_PATTERNS")
         for rule in self.iter_clear_list():
             self.add(rule)
+        self.reload()
+
+    def reload(self):
+        """Drop the rules loaded into memory, they are loaded again from the DB
+        by the next call of :py:obj:`TrackerPatternsDB.compiled_rules`.  Has to
+        be called when the rules in the DB are updated."""
+        self._compiled_rules = None
+
+    @property
+    def compiled_rules(self) -> CompiledRules:
+        """The rules of the DB loaded into memory (:py:obj:`CompiledRules`)."""
+        compiled_rules = self._compiled_rules
+        if compiled_rules is None:
+            compiled_rules = CompiledRules(self.rules())
+            self._compiled_rules = compiled_rules
+        return compiled_rules
 
     def add(self, rule: RuleType):
         self.cache.set(
@@ -107,19 +238,13 @@ class TrackerPatternsDB:
         new_url = url
         parsed_new_url = urlparse(url=new_url)
 
-        for rule in self.rules():
+        for rule in self.compiled_rules.candidates(url):
 
-            if not re.match(rule[self.Fields.url_regexp], new_url):
+            if not rule.url_regexp.match(new_url):
                 # no match / ignore pattern
                 continue
 
-            do_ignore = False
-            for pattern in rule[self.Fields.url_ignore]:
-                if re.match(pattern, new_url):
-                    do_ignore = True
-                    break
-
-            if do_ignore:
+            if rule.url_ignore and rule.url_ignore.match(new_url):
                 # pattern is in the list of exceptions / ignore pattern
                 # HINT:
                 #    we can't break the outer pattern loop since we have
@@ -129,10 +254,10 @@ class TrackerPatternsDB:
             # remove tracker arguments from the url-query part
             query_args: list[tuple[str, str]] = list(parse_qsl(parsed_new_url.query))
 
-            for name, val in query_args.copy():
-                # remove URL arguments
-                for pattern in rule[self.Fields.del_args]:
-                    if re.match(pattern, name):
+            if rule.del_args:
+                for name, val in query_args.copy():
+                    # remove URL arguments
+                    if rule.del_args.match(name):
                         log.debug("TRACKER_PATTERNS: %s remove tracker arg: %s='%s'", parsed_new_url.netloc, name, val)
                         query_args.remove((name, val))
 
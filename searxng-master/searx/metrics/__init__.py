@@ -1,17 +1,22 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # pylint: disable=missing-module-docstring
 
+import sys
 import typing
 import math
 import contextlib
+import functools
 from timeit import default_timer
 from operator import itemgetter
 
+from searx import logger, get_setting
 from searx.engines import engines
 from searx.openmetrics import OpenMetricsFamily
 from .models import HistogramStorage, CounterStorage, VoidHistogram, VoidCounterStorage
 from .error_recorder import count_error, count_exception, errors_per_engines
 
+logger = logger.getChild('searx.metrics')
+
 __all__ = [
     "initialize",
     "get_engines_stats",
@@ -69,13 +74,32 @@ def counter(*args):
     return counter_storage.get(*args)
 
 
-def initialize(engine_names=None, enabled=True):
+def initialize(engine_names=None, enabled=True, storage_cfg=None):
     """
-    Initialize metrics
+    Initialize metrics, ``storage_cfg`` is the :ref:`general.metrics_storage
+    <settings general>` setting.
     """
     global counter_storage, histogram_storage  # pylint: disable=global-statement
 
-    if enabled:
+    storage_cfg = storage_cfg or {}
+    shared_area = None
+    use_mmap = enabled and storage_cfg.get('backend') == 'mmap'
+    if use_mmap and sys.platform == "win32":
+        logger.warning("metrics_storage: the mmap backend is not available on Windows, using memory")
+        use_mmap = False
+
+    if use_mmap:
+        # pylint: disable=import-outside-toplevel
+        from .shared import SharedMemoryArea, SharedCounterStorage, SharedHistogram, DEFAULT_MAX_WORKERS
+
+        # the worker processes of this instance share the area, other instances on the host don't
+        instance = '|'.join(str(get_setting(name, '')) for name in ('server.secret_key', 'server.port'))
+        shared_area = SharedMemoryArea(
+            storage_cfg.get('directory', ''), storage_cfg.get('max_workers', DEFAULT_MAX_WORKERS), instance
+        )
+        counter_storage = SharedCounterStorage(shared_area)
+        histogram_storage = HistogramStorage(histogram_class=functools.partial(SharedHistogram, area=shared_area))
+    elif enabled:
         counter_storage = CounterStorage()
         histogram_storage = HistogramStorage()
     else:
@@ -92,6 +116,16 @@ def initialize(engine_names=None, enabled=True):
     histogram_width = 0.1
     histogram_size = int(1.5 * max_timeout / histogram_width)
 
+    # result cache (see searx.search.result_cache)
+    counter_storage.configure('search', 'cache', 'hit')
+    counter_storage.configure('search', 'cache', 'miss')
+
+    # engine executor (see searx.search.executor)
+    counter_storage.configure('search', 'executor', 'count', 'submitted')
+    counter_storage.configure('search', 'executor', 'count', 'saturated')
+    counter_storage.configure('search', 'executor', 'count', 'expired')
+    histogram_storage.configure(histogram_width, histogram_size, 'search', 'executor', 'time', 'wait')
+
     # engines
     for engine_name in engine_names or engines:
         # search count
@@ -109,6 +143,9 @@ def initialize(engine_names=None, enabled=True):
         # .time.request and ...response times may overlap .time.http time.
         histogram_storage.configure(histogram_width, histogram_size, 'engine', engine_name, 'time', 'total')
 
+    if shared_area is not None:
+        shared_area.open()
+
 
 def get_engine_errors(engline_name_list):
     result = {}
@@ -251,7 +288,7 @@ def get_engines_stats(engine_name_list):
     }
 
 
-def openmetrics(engine_stats, engine_reliabilities):
+def openmetrics(engine_stats, engine_reliabilities, executor_stats=None):
     metrics = [
         OpenMetricsFamily(
             key="searxng_engines_response_time_total_seconds",
@@ -302,4 +339,35 @@ def openmetrics(engine_stats, engine_reliabilities):
             ],
         ),
     ]
+    if executor_stats:
+        metrics += [
+            OpenMetricsFamily(
+                key="searxng_engine_workers_busy",
+                type_hint="gauge",
+                help_hint="The number of engine workers sending a request",
+                data_info=[{'max_workers': executor_stats['max_workers']}],
+                data=[executor_stats['busy']],
+            ),
+            OpenMetricsFamily(
+                key="searxng_engine_workers_queue_depth",
+                type_hint="gauge",
+                help_hint="The number of engine requests waiting for a worker",
+                data_info=[{'max_workers': executor_stats['max_workers']}],
+                data=[executor_stats['queue_depth']],
+            ),
+            OpenMetricsFamily(
+                key="searxng_engine_workers_saturated_total",
+                type_hint="counter",
+                help_hint="The number of engine requests submitted while all workers were busy",
+                data_info=[{'max_workers': executor_stats['max_workers']}],
+                data=[counter('search', 'executor', 'count', 'saturated')],
+            ),
+            OpenMetricsFamily(
+                key="searxng_engine_workers_expired_total",
+                type_hint="counter",
+                help_hint="The number of engine requests dropped before they were sent (deadline reached)",
+                data_info=[{'max_workers': executor_stats['max_workers']}],
+                data=[counter('search', 'executor', 'count', 'expired')],
+            ),
+        ]
     return "".join([str(metric) for metric in metrics])
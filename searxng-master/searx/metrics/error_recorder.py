@@ -1,8 +1,19 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
-# pylint: disable=missing-module-docstring, invalid-name
+# pylint: disable=invalid-name
+"""Records the errors of the engines (``/stats/errors``).
 
+The errors are recorded on the hot path of a search request: an engine that
+stops working causes an error in each request.  The location of an error is
+taken from the frame objects (:py:obj:`sys._getframe`, traceback objects)
+without reading the source files.  The source line of the location
+(:py:obj:`ErrorContext.code`) is read once when it is needed and the
+:py:obj:`ErrorContext` objects are memoized by location and message.
+"""
+
+import functools
+import linecache
+import sys
 import typing
-import inspect
 from json import JSONDecodeError
 from urllib.parse import urlparse
 from httpx import HTTPError, HTTPStatusError
@@ -25,24 +36,46 @@ class ErrorContext:  # pylint: disable=missing-class-docstring
         'filename',
         'function',
         'line_no',
-        'code',
+        '_code',
+        '_abs_filename',
         'exception_classname',
         'log_message',
         'log_parameters',
         'secondary',
+        '_hash',
     )
 
     def __init__(  # pylint: disable=too-many-arguments
-        self, filename, function, line_no, code, exception_classname, log_message, log_parameters, secondary
+        self,
+        filename,
+        function,
+        line_no,
+        code,
+        exception_classname,
+        log_message,
+        log_parameters,
+        secondary,
+        abs_filename=None,
     ):
         self.filename = filename
         self.function = function
         self.line_no = line_no
-        self.code = code
+        self._code = code
+        self._abs_filename = abs_filename or filename
         self.exception_classname = exception_classname
         self.log_message = log_message
         self.log_parameters = log_parameters
         self.secondary = secondary
+        self._hash = None
+
+    @property
+    def code(self) -> str:
+        """Source code line of the location, read on first access (the code is
+        given by ``filename`` and ``line_no`` and is therefore not part of the
+        comparison of two contexts)."""
+        if self._code is None:
+            self._code = linecache.getline(self._abs_filename, self.line_no).strip()
+        return self._code
 
     def __eq__(self, o) -> bool:  # pylint: disable=invalid-name
         if not isinstance(o, ErrorContext):
@@ -51,7 +84,6 @@ class ErrorContext:  # pylint: disable=missing-class-docstring
             self.filename == o.filename
             and self.function == o.function
             and self.line_no == o.line_no
-            and self.code == o.code
             and self.exception_classname == o.exception_classname
             and self.log_message == o.log_message
             and self.log_parameters == o.log_parameters
@@ -59,18 +91,19 @@ class ErrorContext:  # pylint: disable=missing-class-docstring
         )
 
     def __hash__(self):
-        return hash(
-            (
-                self.filename,
-                self.function,
-                self.line_no,
-                self.code,
-                self.exception_classname,
-                self.log_message,
-                self.log_parameters,
-                self.secondary,
+        if self._hash is None:
+            self._hash = hash(
+                (
+                    self.filename,
+                    self.function,
+                    self.line_no,
+                    self.exception_classname,
+                    self.log_message,
+                    self.log_parameters,
+                    self.secondary,
+                )
             )
-        )
+        return self._hash
 
     def __repr__(self):
         return "ErrorContext({!r}, {!r}, {!r}, {!r}, {!r}, {!r}) {!r}".format(
@@ -84,20 +117,60 @@ class ErrorContext:  # pylint: disable=missing-class-docstring
         )
 
 
+_error_contexts: typing.Dict[typing.Tuple, ErrorContext] = {}
+"""Memoized :py:obj:`ErrorContext` objects, see :py:obj:`get_error_context`."""
+
+
 def add_error_context(engine_name: str, error_context: ErrorContext) -> None:
     errors_for_engine = errors_per_engines.setdefault(engine_name, {})
     errors_for_engine[error_context] = errors_for_engine.get(error_context, 0) + 1
-    engines[engine_name].logger.warning('%s', str(error_context))
+    engines[engine_name].logger.warning('%s', error_context)
+
+
+Location = typing.Tuple[typing.Any, int]
+"""A code location: the code object of the frame and the line number."""
+
 
+@functools.lru_cache(maxsize=1024)
+def is_engine_or_processor(filename: str) -> bool:
+    """``True`` if ``filename`` is an engine or a processor module."""
+    split_filename = filename.split('/')
+    if '/'.join(split_filename[-3:-1]) == 'searx/engines':
+        return True
+    if '/'.join(split_filename[-4:-1]) == 'searx/search/processors':
+        return True
+    return False
 
-def get_trace(traces):
-    for trace in reversed(traces):
-        split_filename = trace.filename.split('/')
-        if '/'.join(split_filename[-3:-1]) == 'searx/engines':
-            return trace
-        if '/'.join(split_filename[-4:-1]) == 'searx/search/processors':
-            return trace
-    return traces[-1]
+
+def get_trace(locations: typing.Iterable[Location]) -> Location:
+    """Returns the innermost location in an engine or processor, if there is
+    none, the innermost location is returned.  The ``locations`` are ordered
+    from the innermost to the outermost location."""
+    innermost = None
+    for location in locations:
+        if innermost is None:
+            innermost = location
+        if is_engine_or_processor(location[0].co_filename):
+            return location
+    return innermost  # type: ignore
+
+
+def traceback_locations(tb) -> typing.List[Location]:
+    """Locations of a traceback, ordered from the innermost to the outermost
+    location."""
+    locations = []
+    while tb is not None:
+        locations.append((tb.tb_frame.f_code, tb.tb_lineno))
+        tb = tb.tb_next
+    locations.reverse()
+    return locations
+
+
+def stack_locations(frame) -> typing.Iterator[Location]:
+    """Locations of the call stack, starting with ``frame``."""
+    while frame is not None:
+        yield frame.f_code, frame.f_lineno
+        frame = frame.f_back
 
 
 def get_hostname(exc: HTTPError) -> typing.Optional[None]:
@@ -157,29 +230,46 @@ def get_exception_classname(exc: Exception) -> str:
     return exc_module + '.' + exc_name
 
 
-def get_error_context(framerecords, exception_classname, log_message, log_parameters, secondary) -> ErrorContext:
-    searx_frame = get_trace(framerecords)
-    filename = searx_frame.filename
+@functools.lru_cache(maxsize=1024)
+def get_relative_filename(filename: str) -> str:
     if filename.startswith(searx_parent_dir):
-        filename = filename[len(searx_parent_dir) + 1 :]
-    function = searx_frame.function
-    line_no = searx_frame.lineno
-    code = searx_frame.code_context[0].strip()
-    del framerecords
-    return ErrorContext(filename, function, line_no, code, exception_classname, log_message, log_parameters, secondary)
+        return filename[len(searx_parent_dir) + 1 :]
+    return filename
+
+
+def get_error_context(location: Location, exception_classname, log_message, log_parameters, secondary) -> ErrorContext:
+    """Returns the (memoized) :py:obj:`ErrorContext` of an error at
+    ``location``."""
+    code, line_no = location
+    key = (code.co_filename, code.co_name, line_no, exception_classname, log_message, log_parameters, secondary)
+    error_context = _error_contexts.get(key)
+    if error_context is None:
+        error_context = ErrorContext(
+            get_relative_filename(code.co_filename),
+            code.co_name,
+            line_no,
+            None,
+            exception_classname,
+            log_message,
+            log_parameters,
+            secondary,
+            abs_filename=code.co_filename,
+        )
+        error_context = _error_contexts.setdefault(key, error_context)
+    return error_context
 
 
 def count_exception(engine_name: str, exc: Exception, secondary: bool = False) -> None:
     if not settings['general']['enable_metrics']:
         return
-    framerecords = inspect.trace()
-    try:
-        exception_classname = get_exception_classname(exc)
-        log_parameters = get_messages(exc, framerecords[-1][1])
-        error_context = get_error_context(framerecords, exception_classname, None, log_parameters, secondary)
-        add_error_context(engine_name, error_context)
-    finally:
-        del framerecords
+    locations = traceback_locations(exc.__traceback__)
+    if not locations:
+        # the exception has not been raised
+        locations = list(stack_locations(sys._getframe(1)))  # pylint: disable=protected-access
+    exception_classname = get_exception_classname(exc)
+    log_parameters = get_messages(exc, locations[0][0].co_filename)
+    error_context = get_error_context(get_trace(locations), exception_classname, None, log_parameters, secondary)
+    add_error_context(engine_name, error_context)
 
 
 def count_error(
@@ -187,9 +277,6 @@ def count_error(
 ) -> None:
     if not settings['general']['enable_metrics']:
         return
-    framerecords = list(reversed(inspect.stack()[1:]))
-    try:
-        error_context = get_error_context(framerecords, None, log_message, log_parameters or (), secondary)
-        add_error_context(engine_name, error_context)
-    finally:
-        del framerecords
+    location = get_trace(stack_locations(sys._getframe(1)))  # pylint: disable=protected-access
+    error_context = get_error_context(location, None, log_message, log_parameters or (), secondary)
+    add_error_context(engine_name, error_context)
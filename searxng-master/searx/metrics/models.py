@@ -24,7 +24,7 @@ class Histogram:  # pylint: disable=missing-class-docstring
         self._count = 0
         self._sum = 0
 
-    def observe(self, value):
+    def _get_quartile(self, value):
         q = int(value / self._width)
         if q < 0:  # pylint: disable=consider-using-max-builtin
             # Value below zero is ignored
@@ -32,37 +32,47 @@ class Histogram:  # pylint: disable=missing-class-docstring
         if q >= self._size:
             # Value above the maximum is replaced by the maximum
             q = self._size - 1
+        return q
+
+    def observe(self, value):
+        q = self._get_quartile(value)
         with self._lock:
             self._quartiles[q] += 1
             self._count += 1
             self._sum += value
 
+    def _get_data(self):
+        """Returns a consistent copy of ``(quartiles, count, sum)``, all read
+        access is done by this method."""
+        with self._lock:
+            return list(self._quartiles), self._count, self._sum
+
     @property
     def quartiles(self):
-        return list(self._quartiles)
+        return self._get_data()[0]
 
     @property
     def count(self):
-        return self._count
+        return self._get_data()[1]
 
     @property
     def sum(self):
-        return self._sum
+        return self._get_data()[2]
 
     @property
     def average(self):
-        with self._lock:
-            if self._count != 0:
-                return self._sum / self._count
-            return 0
+        _, count, sum_value = self._get_data()
+        if count != 0:
+            return sum_value / count
+        return 0
 
     @property
     def quartile_percentage(self):
         '''Quartile in percentage'''
-        with self._lock:
-            if self._count > 0:
-                return [int(q * 100 / self._count) for q in self._quartiles]
-            return self._quartiles
+        quartiles, count, _ = self._get_data()
+        if count > 0:
+            return [int(q * 100 / count) for q in quartiles]
+        return quartiles
 
     @property
     def quartile_percentage_map(self):
@@ -71,32 +81,32 @@ class Histogram:  # pylint: disable=missing-class-docstring
         x = decimal.Decimal(0)
         width = decimal.Decimal(self._width)
         width_exponent = -width.as_tuple().exponent
-        with self._lock:
-            if self._count > 0:
-                for y in self._quartiles:
-                    yp = int(y * 100 / self._count)  # pylint: disable=invalid-name
-                    if yp != 0:
-                        result[round(float(x), width_exponent)] = yp
-                    x += width
+        quartiles, count, _ = self._get_data()
+        if count > 0:
+            for y in quartiles:
+                yp = int(y * 100 / count)  # pylint: disable=invalid-name
+                if yp != 0:
+                    result[round(float(x), width_exponent)] = yp
+                x += width
         return result
 
     def percentage(self, percentage):
         # use Decimal to avoid rounding errors
         x = decimal.Decimal(0)
         width = decimal.Decimal(self._width)
-        stop_at_value = decimal.Decimal(self._count) / 100 * percentage
+        quartiles, count, _ = self._get_data()
+        stop_at_value = decimal.Decimal(count) / 100 * percentage
         sum_value = 0
-        with self._lock:
-            if self._count > 0:
-                for y in self._quartiles:
-                    sum_value += y
-                    if sum_value >= stop_at_value:
-                        return x
-                    x += width
+        if count > 0:
+            for y in quartiles:
+                sum_value += y
+                if sum_value >= stop_at_value:
+                    return x
+                x += width
         return None
 
     def __repr__(self):
-        return "Histogram<avg: " + str(self.average) + ", count: " + str(self._count) + ">"
+        return "Histogram<avg: " + str(self.average) + ", count: " + str(self.count) + ">"
 
 
 class HistogramStorage:  # pylint: disable=missing-class-docstring
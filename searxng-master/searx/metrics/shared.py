@@ -0,0 +1,317 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Metrics shared by all worker processes of a SearXNG instance.
+
+With the default storage (``memory``), the counters and histograms of the
+metrics are stored in the memory of the process.  When SearXNG runs in
+multiple worker processes (uWSGI, gunicorn, ..), the ``/stats`` page and each
+scrape of ``/metrics`` only show the numbers of the worker that answers the
+request.
+
+The ``mmap`` storage (see :ref:`general.metrics_storage <settings general>`)
+stores the values of the metrics in a file that is mapped into the memory of
+all worker processes (:py:obj:`SharedMemoryArea`):
+
+- Each worker process claims a *slot* (a row of values) in the file, only the
+  owner of the slot writes into it, no lock is needed between the processes.
+
+- The values are aggregated over all slots when they are read
+  (:py:obj:`SharedCounterStorage.get`, :py:obj:`SharedHistogram`), so
+  :py:obj:`searx.metrics.get_engines_stats` and the OpenMetrics of
+  :py:obj:`searx.metrics.openmetrics` show the numbers of the whole instance.
+
+- The layout of a slot is given by the configured counters and histograms,
+  the hash of the layout and of the instance (see
+  :py:obj:`searx.metrics.initialize`) is the file name.  The worker processes
+  of an instance share the same file, other instances on the host don't.
+
+- The default directory of the file is private to the user
+  (``searxng-metrics-<uid>`` in the temporary directory of the OS).  A file
+  that is a symlink, a hard link or not owned by the user is refused.
+
+- A slot of a terminated worker process is taken over by the next worker
+  process (e.g. when uWSGI respawns a worker), the counters of the instance
+  keep increasing.  When the file is opened and no process of the slots is
+  alive anymore (the instance has been restarted), the values are reset.
+
+.. hint::
+
+   The errors of the engines (``/stats/errors``) are still recorded per
+   process (:py:obj:`searx.metrics.error_recorder`).
+"""
+from __future__ import annotations
+
+__all__ = ["SharedMemoryArea", "SharedCounterStorage", "SharedHistogram"]
+
+import contextlib
+import hashlib
+import mmap
+import os
+import stat
+import sys
+import tempfile
+import threading
+import weakref
+
+from searx import logger
+from .models import CounterStorage, Histogram
+
+if sys.platform != "win32":
+    import fcntl
+else:
+    fcntl = None  # the mmap storage is not available on Windows
+
+logger = logger.getChild('searx.metrics.shared')
+
+DEFAULT_MAX_WORKERS = 32
+
+_AREAS: weakref.WeakSet[SharedMemoryArea] = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for area in list(_AREAS):
+        area.release_slot()
+
+
+if sys.platform != "win32":
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except (ProcessLookupError, OverflowError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _check_owner(file_stat: os.stat_result, path: str, is_file: bool):
+    if file_stat.st_uid != os.getuid():
+        raise PermissionError(f"shared metrics: {path} is not owned by the user of the process")
+    if is_file and (not stat.S_ISREG(file_stat.st_mode) or file_stat.st_nlink != 1):
+        raise PermissionError(f"shared metrics: {path} is not a regular file (or has other links)")
+    if not is_file and (not stat.S_ISDIR(file_stat.st_mode) or file_stat.st_mode & 0o077):
+        raise PermissionError(f"shared metrics: {path} is not a private directory (mode 700)")
+
+
+def default_directory() -> str:
+    """Private directory of the user in the temporary directory of the OS
+    (created if needed)."""
+    path = os.path.join(tempfile.gettempdir(), f"searxng-metrics-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    # lstat: a symlink planted by another user is not a directory
+    _check_owner(os.lstat(path), path, is_file=False)
+    return path
+
+
+class SharedMemoryArea:
+    """A file mapped into the memory (:py:obj:`mmap.mmap`) with one slot per
+    worker process.
+
+    The layout of the file is::
+
+        MAGIC (8 bytes) | PID of slot 0 .. PID of slot N-1 | slot 0 .. slot N-1
+
+    A slot is an array of (float) values, the values are allocated by
+    :py:obj:`SharedMemoryArea.allocate` before the file is opened
+    (:py:obj:`SharedMemoryArea.open`).
+
+    ``instance`` identifies the SearXNG instance, the areas of two instances
+    with the same layout are distinct files.  Without a ``directory``, the
+    file is in :py:obj:`default_directory`.
+    """
+
+    MAGIC = b"SXNGMTR1"
+
+    def __init__(self, directory: str = "", max_workers: int = DEFAULT_MAX_WORKERS, instance: str = ""):
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be greater than 0 (got {max_workers})")
+        self.directory = directory
+        self.instance = instance
+        self.max_workers = max_workers
+        self.path: str | None = None
+        self.slot_size = 0
+        self._layout: list[tuple[tuple, int]] = []
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+        self._mm: mmap.mmap | None = None
+        self._pids: memoryview | None = None
+        self._data: memoryview | None = None
+        self._slot: memoryview | None = None
+        _AREAS.add(self)
+
+    def allocate(self, key: tuple, size: int) -> int:
+        """Allocate ``size`` values in the slots, returns the offset of the
+        first value."""
+        if self._mm is not None:
+            raise RuntimeError("the shared metrics are already opened, the layout can't be changed")
+        offset = self.slot_size
+        self._layout.append((key, size))
+        self.slot_size += size
+        return offset
+
+    def open(self):
+        """Open (create) the file of the layout and map it into the memory."""
+        area_hash = hashlib.sha256(repr((self.instance, self.max_workers, self._layout)).encode()).hexdigest()[:16]
+        self.path = os.path.join(self.directory or default_directory(), f"sxng_metrics_{area_hash}.mmap")
+        header_size = 8 + 8 * self.max_workers
+        length = header_size + 8 * self.slot_size * self.max_workers
+
+        fileno = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW | os.O_CLOEXEC, 0o600)
+        try:
+            # the file is truncated below: never a file planted by someone else
+            _check_owner(os.fstat(fileno), self.path, is_file=True)
+            with self._file_lock(fileno):
+                mapped = None
+                if os.fstat(fileno).st_size == length:
+                    mapped = mmap.mmap(fileno, length)
+                    pids = memoryview(mapped)[8:header_size].cast('q')
+                    if mapped[:8] != self.MAGIC or not any(_is_alive(pid) for pid in pids if pid):
+                        # no process of a running instance: start with fresh values
+                        pids.release()
+                        mapped.close()
+                        mapped = None
+                if mapped is None:
+                    os.ftruncate(fileno, 0)
+                    os.ftruncate(fileno, length)
+                    mapped = mmap.mmap(fileno, length)
+                    mapped[:8] = self.MAGIC
+        except BaseException:
+            os.close(fileno)
+            raise
+
+        self._fd = fileno
+        self._mm = mapped
+        self._pids = memoryview(mapped)[8:header_size].cast('q')
+        self._data = memoryview(mapped)[header_size:].cast('d')
+        logger.debug("shared metrics: %s (%s workers, %s values)", self.path, self.max_workers, self.slot_size)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _file_lock(fileno: int):
+        # POSIX locks (lockf) are owned by the process, a forked child does not
+        # share the lock of its parent (flock would).
+        fcntl.lockf(fileno, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.lockf(fileno, fcntl.LOCK_UN)
+
+    @property
+    def slot(self) -> memoryview:
+        """The values of the slot owned by this process, the slot is claimed
+        on first access."""
+        slot = self._slot
+        if slot is None:
+            with self._lock:
+                slot = self._slot
+                if slot is None:
+                    slot = self._claim_slot()
+                    self._slot = slot
+        return slot
+
+    def _claim_slot(self) -> memoryview:
+        assert self._pids is not None and self._data is not None and self._fd is not None
+        pid = os.getpid()
+        with self._file_lock(self._fd):
+            index = None
+            pids = list(self._pids)
+            if pid in pids:
+                index = pids.index(pid)
+            else:
+                for i, other in enumerate(pids):
+                    # the values of a terminated worker are taken over
+                    if other == 0 or not _is_alive(other):
+                        index = i
+                        break
+            if index is not None:
+                self._pids[index] = pid
+                return self._data[index * self.slot_size : (index + 1) * self.slot_size]
+
+        logger.warning(
+            "shared metrics: all %s slots are in use, the metrics of process %s are not shared",
+            self.max_workers,
+            pid,
+        )
+        return memoryview(bytearray(8 * self.slot_size)).cast('d')
+
+    def release_slot(self):
+        """Forget the slot of this process (called in a forked child
+        process)."""
+        self._lock = threading.Lock()
+        self._slot = None
+
+    def sum(self, offset: int, size: int) -> list[float]:
+        """Sum of the values ``offset .. offset+size`` of all (claimed)
+        slots."""
+        assert self._pids is not None and self._data is not None
+        result = [0.0] * size
+        for index, pid in enumerate(self._pids):
+            if pid == 0:
+                continue
+            start = index * self.slot_size + offset
+            values = self._data[start : start + size]
+            result = [a + b for a, b in zip(result, values)]
+        return result
+
+
+class SharedCounterStorage(CounterStorage):
+    """Counters in a :py:obj:`SharedMemoryArea`."""
+
+    __slots__ = ('area',)
+
+    def __init__(self, area: SharedMemoryArea):
+        self.area = area
+        super().__init__()
+
+    def configure(self, *args):
+        with self.lock:
+            if args not in self.counters:
+                self.counters[args] = self.area.allocate(args, 1)
+
+    def get(self, *args):
+        value = self.area.sum(self.counters[args], 1)[0]
+        if value.is_integer():
+            return int(value)
+        return value
+
+    def add(self, value, *args):
+        offset = self.counters[args]
+        slot = self.area.slot
+        with self.lock:
+            slot[offset] += value
+
+    def dump(self):
+        with self.lock:
+            ks = sorted(self.counters.keys(), key='/'.join)  # pylint: disable=invalid-name
+        logger.debug("Counters:")
+        for k in ks:
+            logger.debug("- %-60s %s", '|'.join(k), self.get(*k))
+
+
+class SharedHistogram(Histogram):
+    """Histogram in a :py:obj:`SharedMemoryArea`, the values are ``quartiles
+    .. count, sum``."""
+
+    def __init__(self, width=10, size=200, area: SharedMemoryArea | None = None):
+        super().__init__(width, size)
+        if area is None:
+            raise ValueError("SharedHistogram requires a SharedMemoryArea")
+        self._area = area
+        self._offset = area.allocate(('histogram', width, size), size + 2)
+
+    def observe(self, value):
+        q = self._get_quartile(value)
+        slot = self._area.slot
+        with self._lock:
+            slot[self._offset + q] += 1
+            slot[self._offset + self._size] += 1
+            slot[self._offset + self._size + 1] += value
+
+    def _get_data(self):
+        values = self._area.sum(self._offset, self._size + 2)
+        return [int(v) for v in values[: self._size]], int(values[self._size]), values[self._size + 1]
@@ -37,6 +37,13 @@ def set_timeout_for_thread(timeout, start_time=None):
     THREADLOCAL.start_time = start_time
 
 
+def clear_context_for_thread():
+    """Remove all thread specific values (timeout, total time & network) of
+    the current thread.  Used by threads which run more than one engine
+    request, see :py:obj:`searx.search.executor`."""
+    THREADLOCAL.__dict__.clear()
+
+
 def set_context_network_name(network_name):
     THREADLOCAL.network = get_network(network_name)
 
@@ -98,6 +105,15 @@ def request(method, url, **kwargs) -> SXNG_Response:
             raise httpx.TimeoutException('Timeout', request=None) from e
 
 
+async def arequest(method, url, network=None, **kwargs) -> SXNG_Response:
+    """Coroutine version of :py:obj:`request`, has to be awaited in the loop of
+    :py:obj:`get_loop`.  The thread specific values (timeout, network, total
+    time) are not used: pass ``timeout`` in the ``kwargs`` and the ``network``
+    (default: :py:obj:`get_network`)."""
+    network = network or get_network()
+    return await network.request(method, url, **kwargs)
+
+
 def multi_requests(request_list: List["Request"]) -> List[Union[httpx.Response, Exception]]:
     """send multiple HTTP requests in parallel. Wait for all requests to finish."""
     with _record_http_time() as start_time:
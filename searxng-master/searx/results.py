@@ -2,6 +2,7 @@
 # pylint: disable=missing-module-docstring, missing-class-docstring
 from __future__ import annotations
 
+import typing
 import warnings
 from collections import defaultdict
 from threading import RLock
@@ -152,6 +153,34 @@ class ResultContainer:
             if not self.paging and eng.paging:
                 self.paging = True
 
+    def get_state(self) -> dict[str, typing.Any]:
+        """Returns the results collected so far (before the container is
+        closed), see :py:obj:`searx.search.result_cache`."""
+        with self._lock:
+            return {
+                "main_results": list(self.main_results_map.values()),
+                "infoboxes": self.infoboxes,
+                "suggestions": self.suggestions,
+                "answers": self.answers,
+                "corrections": self.corrections,
+                "number_of_results": self._number_of_results,
+                "engine_data": dict(self.engine_data),
+                "paging": self.paging,
+            }
+
+    def set_state(self, state: dict[str, typing.Any]):
+        """Restore the results from a state returned by
+        :py:obj:`ResultContainer.get_state`."""
+        with self._lock:
+            self.main_results_map = {hash(result): result for result in state["main_results"]}
+            self.infoboxes = state["infoboxes"]
+            self.suggestions = state["suggestions"]
+            self.answers = state["answers"]
+            self.corrections = state["corrections"]
+            self._number_of_results = state["number_of_results"]
+            self.engine_data.update(state["engine_data"])
+            self.paging = state["paging"]
+
     def _merge_infobox(self, new_infobox: LegacyResult):
         add_infobox = True
 
@@ -203,46 +232,13 @@ class ResultContainer:
         results = sorted(self.main_results_map.values(), key=lambda x: x.score, reverse=True)
 
         # pass 2 : group results by category and template
-        gresults = []
-        categoryPositions = {}
-        max_count = 8
-        max_distance = 20
-
         for res in results:
             # do we need to handle more than one category per engine?
             engine = searx.engines.engines.get(res.engine or "")
             if engine:
                 res.category = engine.categories[0] if len(engine.categories) > 0 else ""
 
-            # do we need to handle more than one category per engine?
-            category = f"{res.category}:{res.template}:{'img_src' if (res.thumbnail or res.img_src) else ''}"
-            grp = categoryPositions.get(category)
-
-            # group with previous results using the same category, if the group
-            # can accept more result and is not too far from the current
-            # position
-
-            if (grp is not None) and (grp["count"] > 0) and (len(gresults) - grp["index"] < max_distance):
-                # group with the previous results using the same category with
-                # this one
-                index = grp["index"]
-                gresults.insert(index, res)
-
-                # update every index after the current one (including the
-                # current one)
-                for item in categoryPositions.values():
-                    v = item["index"]
-                    if v >= index:
-                        item["index"] = v + 1
-
-                # update this category
-                grp["count"] -= 1
-
-            else:
-                gresults.append(res)
-                # update categoryIndex
-                categoryPositions[category] = {"index": len(gresults), "count": max_count}
-                continue
+        gresults = group_results(results)
 
         self._main_results_sorted = gresults
         return self._main_results_sorted
@@ -289,6 +285,59 @@ class ResultContainer:
             return self.timings
 
 
+class _ResultGroup:
+    # pylint: disable=too-few-public-methods
+    __slots__ = "block", "position", "count"
+
+    def __init__(self, block: list, position: int, count: int):
+        self.block = block
+        self.position = position  # position of the block in the list of blocks
+        self.count = count  # number of results the group can still accept
+
+
+def group_results(
+    results: list[MainResult | LegacyResult], max_count: int = 8, max_distance: int = 20
+) -> list[MainResult | LegacyResult]:
+    """Group the (sorted) results by category and template.
+
+    A result is added to the group of the previous results of the same
+    category and template, if the group can accept more results (``max_count``)
+    and there are less than ``max_distance`` results behind the group.
+    Otherwise the result starts a new group at the end of the list.
+
+    The groups are blocks in the list of results which only grow at their end,
+    the list is build by concatenating the blocks once all results are
+    grouped.  The results behind a group are the results in the blocks after
+    its block.  Each of these blocks holds at least one result, so only a
+    group among the last ``max_distance`` blocks can accept a result and at
+    most ``max_distance`` block sizes are summed up: the cost of a result does
+    not depend on the number of groups.
+    """
+    blocks: list[list[MainResult | LegacyResult]] = []
+    groups: dict[str, _ResultGroup] = {}
+
+    for res in results:
+        category = f"{res.category}:{res.template}:{'img_src' if (res.thumbnail or res.img_src) else ''}"
+        grp = groups.get(category)
+
+        if (
+            (grp is not None)
+            and (grp.count > 0)
+            and (len(blocks) - 1 - grp.position < max_distance)
+            and (sum(map(len, blocks[grp.position + 1 :])) < max_distance)
+        ):
+            # group with the previous results using the same category
+            grp.block.append(res)
+            grp.count -= 1
+
+        else:
+            block = [res]
+            blocks.append(block)
+            groups[category] = _ResultGroup(block, len(blocks) - 1, max_count)
+
+    return [res for block in blocks for res in block]
+
+
 def merge_two_infoboxes(origin: LegacyResult, other: LegacyResult):
     """Merges the values from ``other`` into ``origin``."""
     # pylint: disable=too-many-branches
@@ -4,9 +4,9 @@
 # the public namespace has not yet been finally defined ..
 # __all__ = ["EngineRef", "SearchQuery"]
 
-import threading
+import asyncio
+import concurrent.futures
 from timeit import default_timer
-from uuid import uuid4
 
 from flask import copy_current_request_context
 
@@ -18,9 +18,11 @@ from searx.engines import load_engines
 from searx.extended_types import SXNG_Request
 from searx.external_bang import get_bang_url
 from searx.metrics import initialize as initialize_metrics, counter_inc, histogram_observe_time
-from searx.network import initialize as initialize_network, check_network_configuration
+from searx.network import initialize as initialize_network, check_network_configuration, get_loop
 from searx.results import ResultContainer
 from searx.search.checker import initialize as initialize_checker
+from searx.search.executor import get_executor, initialize as initialize_executor
+from searx.search import result_cache
 from searx.search.models import SearchQuery
 from searx.search.processors import PROCESSORS, initialize as initialize_processors
 
@@ -35,8 +37,12 @@ def initialize(settings_engines=None, enable_checker=False, check_network=False,
     initialize_network(settings_engines, settings['outgoing'])
     if check_network:
         check_network_configuration()
-    initialize_metrics([engine['name'] for engine in settings_engines], enable_metrics)
+    initialize_metrics(
+        [engine['name'] for engine in settings_engines], enable_metrics, settings['general']['metrics_storage']
+    )
     initialize_processors(settings_engines)
+    initialize_executor(settings['search']['engine_workers'])
+    result_cache.initialize(settings['search']['result_cache'])
     if enable_checker:
         initialize_checker()
 
@@ -131,39 +137,92 @@ class Search:
         return requests, actual_timeout
 
     def search_multiple_requests(self, requests):
-        # pylint: disable=protected-access
-        search_id = str(uuid4())
+        executor = get_executor()
+        deadline = self.start_time + self.actual_timeout
+        jobs = []
+        async_requests = []
 
         for engine_name, query, request_params in requests:
+            if PROCESSORS[engine_name].is_async:
+                async_requests.append((engine_name, query, request_params))
+                continue
             _search = copy_current_request_context(PROCESSORS[engine_name].search)
-            th = threading.Thread(  # pylint: disable=invalid-name
-                target=_search,
-                args=(query, request_params, self.result_container, self.start_time, self.actual_timeout),
-                name=search_id,
+            jobs.append(
+                executor.submit(
+                    engine_name,
+                    _search,
+                    (query, request_params, self.result_container, self.start_time, self.actual_timeout),
+                    deadline,
+                )
             )
-            th._timeout = False
-            th._engine_name = engine_name
-            th.start()
-
-        for th in threading.enumerate():  # pylint: disable=invalid-name
-            if th.name == search_id:
-                remaining_time = max(0.0, self.actual_timeout - (default_timer() - self.start_time))
-                th.join(remaining_time)
-                if th.is_alive():
-                    th._timeout = True
-                    self.result_container.add_unresponsive_engine(th._engine_name, 'timeout')
-                    PROCESSORS[th._engine_name].logger.error('engine timeout')
+
+        if async_requests:
+            self.search_async_requests(async_requests)
+
+        for job in jobs:
+            remaining_time = max(0.0, self.actual_timeout - (default_timer() - self.start_time))
+            if not job.wait(remaining_time):
+                job.timeout = True
+                self.result_container.add_unresponsive_engine(job.engine_name, 'timeout')
+                PROCESSORS[job.engine_name].logger.error('engine timeout')
+
+    def search_async_requests(self, requests):
+        """Run the requests of the engines with a coroutine ``asearch`` in the
+        loop of :py:obj:`searx.network.get_loop` and wait until they are all
+        done or the timeout is reached."""
+        future = asyncio.run_coroutine_threadsafe(self._gather_async_requests(requests), get_loop())
+        remaining_time = max(0.0, self.actual_timeout - (default_timer() - self.start_time))
+        try:
+            # _gather_async_requests stops by itself at the timeout, the
+            # overhead is the time to cancel the pending tasks.
+            future.result(remaining_time + 1.0)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            logger.error('async engines: the event loop did not respond in time')
+
+    async def _gather_async_requests(self, requests):
+        tasks = {}
+        for engine_name, query, request_params in requests:
+            coroutine = PROCESSORS[engine_name].asearch(
+                query, request_params, self.result_container, self.start_time, self.actual_timeout
+            )
+            tasks[asyncio.create_task(coroutine)] = engine_name
+
+        remaining_time = max(0.0, self.actual_timeout - (default_timer() - self.start_time))
+        _, pending = await asyncio.wait(tasks, timeout=remaining_time)
+        for task in pending:
+            task.cancel()
+            engine_name = tasks[task]
+            PROCESSORS[engine_name].handle_exception(self.result_container, 'timeout')
+            PROCESSORS[engine_name].logger.error('engine timeout')
+
+    def get_result_cache_key(self) -> str:
+        return result_cache.ResultCache.get_key(self.search_query)
 
     def search_standard(self):
         """
         Update self.result_container, self.actual_timeout
         """
+        cache = result_cache.CACHE
+        cache_key = None
+        if cache is not None:
+            cache_key = self.get_result_cache_key()
+            state = cache.get(cache_key)
+            if state is not None:
+                counter_inc('search', 'cache', 'hit')
+                self.result_container.set_state(state)
+                return True
+            counter_inc('search', 'cache', 'miss')
+
         requests, self.actual_timeout = self._get_requests()
 
         # send all search-request
         if requests:
             self.search_multiple_requests(requests)
 
+        if cache_key and requests and not self.result_container.unresponsive_engines:
+            cache.set(cache_key, self.result_container.get_state())
+
         # return results, suggestions, answers and infoboxes
         return True
 
@@ -194,6 +253,9 @@ class SearchWithPlugins(Search):
         # pylint: enable=line-too-long
         self.request = request._get_current_object()
 
+    def get_result_cache_key(self) -> str:
+        return result_cache.ResultCache.get_key(self.search_query, self.user_plugins)
+
     def _on_result(self, result):
         return searx.plugins.STORAGE.on_result(self.request, self, result)
 
@@ -0,0 +1,198 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Bounded pool of long-lived worker threads that run the engine requests of
+a search.
+
+Before, :py:obj:`searx.search.Search.search_multiple_requests` started a new
+thread for each engine of each query.  The :py:obj:`EngineExecutor` keeps up
+to :ref:`search.engine_workers <settings search>` threads alive and feeds them
+with :py:obj:`EngineJob` objects.  Each job has a *deadline*, a job that is
+dequeued after its deadline is dropped without sending a request.
+
+The ``timeout`` flag of the job running in the current thread is available
+by :py:obj:`job_timed_out` and is used by
+:py:obj:`searx.search.processors.abstract.EngineProcessor.extend_container`
+(replaces the ``_timeout`` attribute of the former one-shot threads).
+
+The metrics of the executor are:
+
+- counter ``search.executor.count.submitted``: number of submitted jobs
+- counter ``search.executor.count.saturated``: number of jobs submitted while
+  all workers have been busy
+- counter ``search.executor.count.expired``: number of jobs dropped from the
+  queue because their deadline has been reached
+- histogram ``search.executor.time.wait``: time a job waits in the queue
+
+The live values (workers, busy workers, queue depth) are returned by
+:py:obj:`EngineExecutor.get_stats`.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import typing
+from timeit import default_timer
+
+from searx import logger
+from searx.metrics import counter_inc, histogram_observe
+
+logger = logger.getChild('searx.search.executor')
+
+THREAD_LOCAL = threading.local()
+"""Thread-local data, ``THREAD_LOCAL.job`` is the :py:obj:`EngineJob` that is
+currently executed by the worker thread."""
+
+EXECUTOR: EngineExecutor | None = None
+"""Global executor, see :py:obj:`initialize` and :py:obj:`get_executor`."""
+
+DEFAULT_MAX_WORKERS = 64
+
+
+class EngineJob:  # pylint: disable=too-few-public-methods
+    """A call of an engine processor scheduled on the :py:obj:`EngineExecutor`."""
+
+    __slots__ = 'engine_name', 'func', 'args', 'deadline', 'submit_time', 'timeout', 'done'
+
+    def __init__(self, engine_name: str, func: typing.Callable, args: tuple, deadline: float):
+        self.engine_name = engine_name
+        self.func = func
+        self.args = args
+        self.deadline = deadline
+        self.submit_time = default_timer()
+        self.timeout = False
+        """Set to ``True`` by the caller when it doesn't wait any longer for
+        the result of this job."""
+        self.done = threading.Event()
+
+    def wait(self, timeout: float) -> bool:
+        """Wait for the job, returns ``False`` if the job has not finished in
+        time."""
+        return self.done.wait(timeout)
+
+
+def job_timed_out() -> bool:
+    """Returns ``True`` if the caller is not waiting any longer for the job
+    running in the current thread.
+
+    Outside of an executor worker (e.g. in the :ref:`searx.search.checker`)
+    the ``_timeout`` attribute of the current thread is evaluated.
+    """
+    job = THREAD_LOCAL.__dict__.get('job')
+    if job is not None:
+        return job.timeout
+    return getattr(threading.current_thread(), '_timeout', False)
+
+
+class EngineExecutor:
+    """Thread pool with at most ``max_workers`` threads.  The threads are
+    started on demand and live until :py:obj:`EngineExecutor.shutdown` is
+    called."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be greater than 0 (got {max_workers})")
+        self.max_workers = max_workers
+        self._queue: queue.SimpleQueue[EngineJob | None] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._workers: list[threading.Thread] = []
+        self._busy = 0
+
+    def submit(self, engine_name: str, func: typing.Callable, args: tuple, deadline: float) -> EngineJob:
+        """Schedule ``func(*args)``, the job is dropped if it can't be started
+        before ``deadline`` (a :py:obj:`timeit.default_timer` value)."""
+        job = EngineJob(engine_name, func, args, deadline)
+        with self._lock:
+            if self._busy + self._queue.qsize() < len(self._workers):
+                # an idle worker will pick up the job
+                pass
+            elif len(self._workers) < self.max_workers:
+                self._start_worker()
+            else:
+                counter_inc('search', 'executor', 'count', 'saturated')
+        counter_inc('search', 'executor', 'count', 'submitted')
+        self._queue.put(job)
+        return job
+
+    def _start_worker(self):
+        th = threading.Thread(  # pylint: disable=invalid-name
+            target=self._worker,
+            name=f'engine_worker_{len(self._workers)}',
+            daemon=True,
+        )
+        self._workers.append(th)
+        th.start()
+
+    def _worker(self):
+        # pylint: disable=import-outside-toplevel, cyclic-import
+        from searx.network import clear_context_for_thread
+
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            with self._lock:
+                self._busy += 1
+            now = default_timer()
+            histogram_observe(now - job.submit_time, 'search', 'executor', 'time', 'wait')
+
+            if job.timeout or now > job.deadline:
+                # nobody is waiting for this job anymore / do not set job.done,
+                # the caller records the timeout.
+                counter_inc('search', 'executor', 'count', 'expired')
+            else:
+                THREAD_LOCAL.job = job
+                try:
+                    job.func(*job.args)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception('engine %s: unhandled exception in worker', job.engine_name)
+                finally:
+                    THREAD_LOCAL.job = None
+                    clear_context_for_thread()
+                    job.done.set()
+
+            with self._lock:
+                self._busy -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        """Approximate number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def get_stats(self) -> dict[str, int]:
+        """Live values of the executor."""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'workers': len(self._workers),
+                'busy': self._busy,
+                'queue_depth': self._queue.qsize(),
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop all worker threads once the queue is drained."""
+        with self._lock:
+            workers = self._workers
+            self._workers = []
+        for _ in workers:
+            self._queue.put(None)
+        if wait:
+            for th in workers:  # pylint: disable=invalid-name
+                th.join()
+
+
+def initialize(max_workers: int = DEFAULT_MAX_WORKERS):
+    """(Re-) initialize the global :py:obj:`EXECUTOR`."""
+    global EXECUTOR  # pylint: disable=global-statement
+    if EXECUTOR is not None:
+        if EXECUTOR.max_workers == max_workers:
+            return
+        EXECUTOR.shutdown()
+    EXECUTOR = EngineExecutor(max_workers)
+
+
+def get_executor() -> EngineExecutor:
+    """Returns the global :py:obj:`EXECUTOR`, initialize it with default
+    values if not yet done."""
+    if EXECUTOR is None:
+        initialize()
+    return EXECUTOR  # type: ignore
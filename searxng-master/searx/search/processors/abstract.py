@@ -14,6 +14,7 @@ from searx.network import get_time_for_thread, get_network
 from searx.metrics import histogram_observe, counter_inc, count_exception, count_error
 from searx.exceptions import SearxEngineAccessDeniedException, SearxEngineResponseException
 from searx.utils import get_engine_from_settings
+from searx.search.executor import job_timed_out
 
 logger = logger.getChild('searx.search.processor')
 SUSPENDED_STATUS: Dict[Union[int, str], 'SuspendedStatus'] = {}
@@ -105,11 +106,12 @@ class EngineProcessor(ABC):
                 suspended_time = exception_or_message.suspended_time
             self.suspended_status.suspend(suspended_time, error_message)  # pylint: disable=no-member
 
-    def _extend_container_basic(self, result_container, start_time, search_results):
+    def _extend_container_basic(self, result_container, start_time, search_results, page_load_time=None):
         # update result_container
         result_container.extend(self.engine_name, search_results)
         engine_time = default_timer() - start_time
-        page_load_time = get_time_for_thread()
+        if page_load_time is None:
+            page_load_time = get_time_for_thread()
         result_container.add_timing(self.engine_name, engine_time, page_load_time)
         # metrics
         counter_inc('engine', self.engine_name, 'search', 'count', 'successful')
@@ -117,14 +119,14 @@ class EngineProcessor(ABC):
         if page_load_time is not None:
             histogram_observe(page_load_time, 'engine', self.engine_name, 'time', 'http')
 
-    def extend_container(self, result_container, start_time, search_results):
-        if getattr(threading.current_thread(), '_timeout', False):
+    def extend_container(self, result_container, start_time, search_results, page_load_time=None):
+        if job_timed_out():
             # the main thread is not waiting anymore
             self.handle_exception(result_container, 'timeout', None)
         else:
             # check if the engine accepted the request
             if search_results is not None:
-                self._extend_container_basic(result_container, start_time, search_results)
+                self._extend_container_basic(result_container, start_time, search_results, page_load_time)
             self.suspended_status.resume()
 
     def extend_container_if_suspended(self, result_container):
@@ -180,6 +182,12 @@ class EngineProcessor(ABC):
 
         return params
 
+    @property
+    def is_async(self):
+        """``True`` if the processor implements a coroutine ``asearch`` with
+        the same arguments as :py:obj:`EngineProcessor.search`."""
+        return False
+
     @abstractmethod
     def search(self, query, params, result_container, start_time, timeout_limit):
         pass
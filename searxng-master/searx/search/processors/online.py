@@ -4,8 +4,10 @@
 """
 # pylint: disable=use-dict-literal
 
+from contextlib import contextmanager
 from timeit import default_timer
 import asyncio
+import inspect
 import ssl
 import httpx
 
@@ -34,6 +36,12 @@ def default_request_params():
     }
 
 
+async def _maybe_await(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
 class OnlineProcessor(EngineProcessor):
     """Processor class for ``online`` engines."""
 
@@ -76,7 +84,7 @@ class OnlineProcessor(EngineProcessor):
         self.logger.debug('HTTP Accept-Language: %s', params['headers'].get('Accept-Language', ''))
         return params
 
-    def _send_http_request(self, params):
+    def _get_request_args(self, params):
         # create dictionary which contain all
         # information about the request
         request_args = dict(headers=params['headers'], cookies=params['cookies'], auth=params['auth'])
@@ -98,22 +106,15 @@ class OnlineProcessor(EngineProcessor):
         if 'allow_redirects' in params:
             request_args['allow_redirects'] = params['allow_redirects']
 
-        # soft_max_redirects
-        soft_max_redirects = params.get('soft_max_redirects', max_redirects or 0)
-
         # raise_for_status
         request_args['raise_for_httperror'] = params.get('raise_for_httperror', True)
 
-        # specific type of request (GET or POST)
-        if params['method'] == 'GET':
-            req = searx.network.get
-        else:
-            req = searx.network.post
-
         request_args['data'] = params['data']
+        return request_args
 
-        # send the request
-        response = req(params['url'], **request_args)
+    def _check_redirects(self, params, response):
+        # soft_max_redirects
+        soft_max_redirects = params.get('soft_max_redirects', params.get('max_redirects') or 0)
 
         # check soft limit of the redirect count
         if len(response.history) > soft_max_redirects:
@@ -129,6 +130,36 @@ class OnlineProcessor(EngineProcessor):
                 secondary=True,
             )
 
+    def _send_http_request(self, params):
+        request_args = self._get_request_args(params)
+
+        # specific type of request (GET or POST)
+        if params['method'] == 'GET':
+            req = searx.network.get
+        else:
+            req = searx.network.post
+
+        # send the request
+        response = req(params['url'], **request_args)
+        self._check_redirects(params, response)
+        return response
+
+    async def _asend_http_request(self, params, timeout_limit):
+        request_args = self._get_request_args(params)
+        request_args['timeout'] = timeout_limit
+
+        # specific type of request (GET or POST)
+        if params['method'] == 'GET':
+            method = 'GET'
+            request_args.setdefault('allow_redirects', True)
+        else:
+            method = 'POST'
+
+        # send the request
+        response = await searx.network.arequest(
+            method, params['url'], network=searx.network.get_network(self.engine_name), **request_args
+        )
+        self._check_redirects(params, response)
         return response
 
     def _search_basic(self, query, params):
@@ -147,6 +178,32 @@ class OnlineProcessor(EngineProcessor):
         response.search_params = params
         return self.engine.response(response)
 
+    async def _asearch_basic(self, query, params, timeout_limit):
+        # same as _search_basic, the request & response functions of the
+        # engine might be coroutine functions
+        await _maybe_await(self.engine.request(query, params))
+
+        # ignoring empty urls
+        if not params['url']:
+            return None, None
+
+        # send request
+        http_start_time = default_timer()
+        response = await self._asend_http_request(params, timeout_limit)
+        http_time = default_timer() - http_start_time
+
+        # parse the response
+        response.search_params = params
+        return await _maybe_await(self.engine.response(response)), http_time
+
+    @property
+    def is_async(self):
+        """``True`` if the engine implements ``async def request`` or ``async
+        def response``, see :py:obj:`OnlineProcessor.asearch`."""
+        return inspect.iscoroutinefunction(getattr(self.engine, 'request', None)) or inspect.iscoroutinefunction(
+            getattr(self.engine, 'response', None)
+        )
+
     def search(self, query, params, result_container, start_time, timeout_limit):
         # set timeout for all HTTP requests
         searx.network.set_timeout_for_thread(timeout_limit, start_time=start_time)
@@ -155,10 +212,23 @@ class OnlineProcessor(EngineProcessor):
         # set the network
         searx.network.set_context_network_name(self.engine_name)
 
-        try:
+        with self._handle_search_exceptions(result_container, start_time, timeout_limit):
             # send requests and parse the results
             search_results = self._search_basic(query, params)
             self.extend_container(result_container, start_time, search_results)
+
+    async def asearch(self, query, params, result_container, start_time, timeout_limit):
+        """Coroutine version of :py:obj:`OnlineProcessor.search`, has to run
+        in the loop of :py:obj:`searx.network.get_loop`.  The HTTP request is
+        awaited, there is no thread blocked while waiting for the response."""
+        with self._handle_search_exceptions(result_container, start_time, timeout_limit):
+            search_results, http_time = await self._asearch_basic(query, params, timeout_limit)
+            self.extend_container(result_container, start_time, search_results, page_load_time=http_time)
+
+    @contextmanager
+    def _handle_search_exceptions(self, result_container, start_time, timeout_limit):
+        try:
+            yield
         except ssl.SSLError as e:
             # requests timeout (connect or read)
             self.handle_exception(result_container, e, suspend=True)
@@ -0,0 +1,206 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Opt-in cache of the engine results of a search query.
+
+Clients like the OSS_Lab agents send the same query (same engines, same
+language, page, ..) again and again.  With the cache activated (see
+:ref:`search.result_cache <settings search>`), the results of the engines are
+stored and a repeated query is answered without sending any request to the
+engines.
+
+The cache key is build from the normalized :py:obj:`SearchQuery
+<searx.search.models.SearchQuery>` (query, engines, lang, pageno, safesearch,
+time_range, engine_data) and the plugins of the user (the results are stored
+*after* the ``on_result`` hook of the plugins, but *before* the
+``post_search`` hook).
+
+Results are only cached if all engines have responded (no unresponsive or
+suspended engines) and if the results have not been produced by an answerer
+or an external bang.
+
+Two backends are available:
+
+``memory``:
+  A LRU cache per process, bounded by :py:obj:`ResultCacheCfg.max_items` and
+  :py:obj:`ResultCacheCfg.max_bytes`.
+
+``sqlite``:
+  The results are stored in a :py:obj:`searx.cache.ExpireCacheSQLite` DB, the
+  DB is shared by all processes of the instance.
+
+The metrics of the cache are counted in ``search.cache.hit`` and
+``search.cache.miss``.
+"""
+from __future__ import annotations
+
+__all__ = ["ResultCacheCfg", "ResultCache", "ResultCacheMemory", "ResultCacheSQLite"]
+
+import abc
+import collections
+import hashlib
+import pickle
+import threading
+import time
+import typing
+
+import msgspec
+
+from searx import logger
+from searx.cache import ExpireCache, ExpireCacheCfg
+
+if typing.TYPE_CHECKING:
+    from searx.search.models import SearchQuery
+
+log = logger.getChild("search.result_cache")
+
+CACHE: ResultCache | None = None
+"""Global cache instance, ``None`` if the cache is disabled."""
+
+
+class ResultCacheCfg(msgspec.Struct):  # pylint: disable=too-few-public-methods
+    """Configuration of the result cache (:ref:`search.result_cache <settings
+    search>`)."""
+
+    enabled: bool = False
+    """The cache is opt-in."""
+
+    backend: typing.Literal["memory", "sqlite"] = "memory"
+    """Where to store the results."""
+
+    expire: int = 300
+    """Time in seconds after which cached results are no longer used."""
+
+    max_items: int = 1000
+    """Max number of queries in the ``memory`` backend."""
+
+    max_bytes: int = 64 * 1024 * 1024
+    """Max size of all (serialized) results in the ``memory`` backend.  In the
+    ``sqlite`` backend, this is the max size of the results of one query."""
+
+    db_url: str = ""
+    """URL of the SQLite DB (``sqlite`` backend), see
+    :py:obj:`searx.cache.ExpireCacheCfg.db_url`."""
+
+
+class ResultCache(abc.ABC):
+    """Abstract base class of the result cache backends.  The values are the
+    serialized (pickled) result states of a :py:obj:`ResultContainer
+    <searx.results.ResultContainer>`."""
+
+    def __init__(self, cfg: ResultCacheCfg):
+        self.cfg = cfg
+
+    @staticmethod
+    def build_cache(cfg: ResultCacheCfg) -> ResultCache:
+        """Factory to build the cache of the configured backend."""
+        if cfg.backend == "sqlite":
+            return ResultCacheSQLite(cfg)
+        return ResultCacheMemory(cfg)
+
+    @staticmethod
+    def get_key(search_query: SearchQuery, user_plugins: typing.Iterable[str] = ()) -> str:
+        """Returns the cache key of a search query."""
+        key = (
+            search_query.query,
+            sorted((ref.name, ref.category) for ref in search_query.engineref_list),
+            search_query.lang,
+            search_query.pageno,
+            search_query.safesearch,
+            search_query.time_range or "",
+            sorted((name, sorted(data.items())) for name, data in search_query.engine_data.items()),
+            sorted(user_plugins),
+        )
+        return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict[str, typing.Any] | None:
+        """Returns the cached result state or ``None``."""
+        value = self.get_value(key)
+        if value is None:
+            return None
+        return pickle.loads(value)
+
+    def set(self, key: str, state: dict[str, typing.Any]) -> bool:
+        """Store the result state of a search query."""
+        return self.set_value(key, pickle.dumps(state))
+
+    @abc.abstractmethod
+    def get_value(self, key: str) -> bytes | None:
+        """Returns the serialized value of ``key`` or ``None``."""
+
+    @abc.abstractmethod
+    def set_value(self, key: str, value: bytes) -> bool:
+        """Set ``key`` to the serialized ``value``."""
+
+
+class ResultCacheMemory(ResultCache):
+    """LRU cache in the memory of the process.  The values are stored
+    serialized, the results returned from the cache are always new objects
+    (the results are modified when they are rendered)."""
+
+    def __init__(self, cfg: ResultCacheCfg):
+        super().__init__(cfg)
+        self._lock = threading.Lock()
+        self._items: collections.OrderedDict[str, tuple[float, bytes]] = collections.OrderedDict()
+        self._bytes = 0
+
+    def get_value(self, key: str) -> bytes | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expire, value = item
+            if expire < time.time():
+                self._remove(key)
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set_value(self, key: str, value: bytes) -> bool:
+        if len(value) > self.cfg.max_bytes:
+            return False
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            self._items[key] = (time.time() + self.cfg.expire, value)
+            self._bytes += len(value)
+            while len(self._items) > self.cfg.max_items or self._bytes > self.cfg.max_bytes:
+                self._remove(next(iter(self._items)))
+        return True
+
+    def _remove(self, key: str):
+        _, value = self._items.pop(key)
+        self._bytes -= len(value)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ResultCacheSQLite(ResultCache):
+    """Stores the results in a :py:obj:`searx.cache.ExpireCacheSQLite` DB."""
+
+    def __init__(self, cfg: ResultCacheCfg):
+        super().__init__(cfg)
+        self.cache = ExpireCache.build_cache(
+            ExpireCacheCfg(
+                name="SEARCH_RESULTS",
+                db_url=cfg.db_url,
+                MAX_VALUE_LEN=cfg.max_bytes,
+                MAXHOLD_TIME=cfg.expire,
+                MAINTENANCE_PERIOD=max(cfg.expire, 60),
+            )
+        )
+
+    def get_value(self, key: str) -> bytes | None:
+        return self.cache.get(self.cache.secret_hash(key))
+
+    def set_value(self, key: str, value: bytes) -> bool:
+        return self.cache.set(self.cache.secret_hash(key), value, expire=self.cfg.expire)
+
+
+def initialize(cfg: dict[str, typing.Any] | None):
+    """Initialize the global :py:obj:`CACHE` from the settings."""
+    global CACHE  # pylint: disable=global-statement
+    CACHE = None
+    cache_cfg = msgspec.convert(cfg or {}, ResultCacheCfg)
+    if cache_cfg.enabled:
+        CACHE = ResultCache.build_cache(cache_cfg)
+        log.info("result cache enabled (backend: %s, expire: %ss)", cache_cfg.backend, cache_cfg.expire)
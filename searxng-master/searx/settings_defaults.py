@@ -143,6 +143,11 @@ SCHEMA = {
         'contact_url': SettingsValue((None, False, str), None),
         'donation_url': SettingsValue((bool, str), "https://docs.searxng.org/donate.html"),
         'enable_metrics': SettingsValue(bool, True),
+        'metrics_storage': {
+            'backend': SettingsValue(('memory', 'mmap'), 'memory'),
+            'directory': SettingsValue(str, ''),
+            'max_workers': SettingsValue(int, 32),
+        },
         'open_metrics': SettingsValue(str, ''),
     },
     'brand': {
@@ -172,6 +177,15 @@ SCHEMA = {
         },
         'formats': SettingsValue(list, OUTPUT_FORMATS),
         'max_page': SettingsValue(int, 0),
+        'engine_workers': SettingsValue(int, 64),
+        'result_cache': {
+            'enabled': SettingsValue(bool, False),
+            'backend': SettingsValue(('memory', 'sqlite'), 'memory'),
+            'expire': SettingsValue(int, 300),
+            'max_items': SettingsValue(int, 1000),
+            'max_bytes': SettingsValue(int, 64 * 1024 * 1024),
+            'db_url': SettingsValue(str, ''),
+        },
     },
     'server': {
         'port': SettingsValue((int, str), 8888, 'SEARXNG_PORT'),
@@ -7,6 +7,10 @@
 :py:obj:`SQLiteProperties`:
   Class to manage properties stored in a database.
 
+:py:obj:`ConnectionPool`:
+  Bounded pool of DB connections, the connections are reused by the
+  (short-lived) threads.
+
 Examplarical implementations based on :py:obj:`SQLiteAppl`:
 
 :py:obj:`searx.cache.ExpireCacheSQLite` :
@@ -36,8 +40,84 @@ logger = logger.getChild("sqlitedb")
 THREAD_LOCAL = threading.local()
 
 
+class ConnectionPool:
+    """A bounded pool of idle DB connections of one DB (``db_url``).
+
+    A :py:obj:`DBSession` takes a connection from the pool when its thread
+    needs a connection for the first time and gives the connection back to the
+    pool when the thread ends.  A connection is only used by one thread at a
+    time, but it is reused by the following threads: threads that live only for
+    one request (or one search query) don't have to connect and set up the DB
+    (:py:obj:`SQLiteAppl.connect`) again and again.
+
+    At most :py:obj:`SQLiteAppl.SQLITE_POOL_SIZE` idle connections are kept in
+    the pool, surplus connections are closed.
+    """
+
+    POOLS: dict[str, ConnectionPool] = {}
+    """Pools mapped by ``db_url``."""
+
+    _POOLS_LOCK = threading.Lock()
+
+    @classmethod
+    def get_pool(cls, app: SQLiteAppl) -> ConnectionPool | None:
+        """Returns the pool of the DB ``app.db_url``, the pool is created on
+        demand.  ``None`` is returned if connections can't be shared among
+        threads (SQLite library in ``single-thread`` mode or
+        :py:obj:`SQLiteAppl.SQLITE_POOL_SIZE` is ``0``)."""
+
+        if app.SQLITE_THREADING_MODE == "single-thread" or app.SQLITE_POOL_SIZE < 1:
+            return None
+        pool = cls.POOLS.get(app.db_url)
+        if pool is None:
+            with cls._POOLS_LOCK:
+                pool = cls.POOLS.get(app.db_url)
+                if pool is None:
+                    pool = cls(app, app.SQLITE_POOL_SIZE)
+                    cls.POOLS[app.db_url] = pool
+        return pool
+
+    def __init__(self, app: SQLiteAppl, max_idle: int):
+        self.app = app
+        self.max_idle = max_idle
+        # RLock: release() is called from DBSession.__del__, which might be
+        # called at any time in the thread that holds the lock.
+        self._lock = threading.RLock()
+        self._idle: list[sqlite3.Connection] = []
+
+    def acquire(self) -> sqlite3.Connection:
+        """Returns an idle connection from the pool or a new connection
+        (:py:obj:`SQLiteAppl.connect`)."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.app.connect()
+
+    def release(self, conn: sqlite3.Connection):
+        """Give ``conn`` back to the pool, the connection is closed if the pool
+        is full."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close all idle connections of the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def __len__(self):
+        return len(self._idle)
+
+
 class DBSession:
-    """A *thead-local* DB session"""
+    """A *thead-local* DB session, the connection of the session is taken from
+    the :py:obj:`ConnectionPool` of the DB."""
 
     @classmethod
     def get_connect(cls, app: SQLiteAppl) -> sqlite3.Connection:
@@ -55,6 +135,7 @@ class DBSession:
     def __init__(self, app: SQLiteAppl):
         self.uuid = uuid.uuid4()
         self.app = app
+        self.pool = ConnectionPool.get_pool(app)
         self._conn = None
         # self.__del__ will be called, when thread ends
         if getattr(THREAD_LOCAL, "DBSession_map", None) is None:
@@ -65,8 +146,11 @@ class DBSession:
     def conn(self) -> sqlite3.Connection:
         msg = f"[{threading.current_thread().ident}] DBSession: " f"{self.app.__class__.__name__}({self.app.db_url})"
         if self._conn is None:
-            self._conn = self.app.connect()
-            logger.debug("%s --> created new connection", msg)
+            if self.pool is None:
+                self._conn = self.app.connect()
+                logger.debug("%s --> created new connection", msg)
+            else:
+                self._conn = self.pool.acquire()
         # else:
         #     logger.debug("%s --> already connected", msg)
 
@@ -81,7 +165,10 @@ class DBSession:
                 # needs, do not exist anymore.
                 # msg = f"DBSession: close [{self.uuid}] {self.app.__class__.__name__}({self.app.db_url})"
                 # logger.debug(msg)
-                self._conn.close()
+                if self.pool is None:
+                    self._conn.close()
+                else:
+                    self.pool.release(self._conn)
         except Exception:  # pylint: disable=broad-exception-caught
             pass
 
@@ -122,7 +209,7 @@ class SQLiteAppl(abc.ABC):
     SQLITE_CONNECT_ARGS = {
         # "timeout": 5.0,
         # "detect_types": 0,
-        "check_same_thread": bool(SQLITE_THREADING_MODE != "serialized"),
+        "check_same_thread": bool(SQLITE_THREADING_MODE == "single-thread"),
         "cached_statements": 0,  # https://github.com/python/cpython/issues/118172
         # "uri": False,
         "isolation_level": None,
@@ -131,8 +218,11 @@ class SQLiteAppl(abc.ABC):
 
     ``check_same_thread``:
       Is disabled by default when :py:obj:`SQLITE_THREADING_MODE` is
-      ``serialized``.  The check is more of a hindrance in this case because it
-      would prevent a DB connector from being used in multiple threads.
+      ``serialized`` or ``multi-thread``.  The check is more of a hindrance in
+      this case because it would prevent a DB connector from being used in
+      multiple threads.  In ``multi-thread`` mode a connection must not be used
+      by two threads at the same time, the :py:obj:`ConnectionPool` hands over
+      a connection to one thread at a time.
 
     ``cached_statements``:
       Is set to ``0`` by default.  Note: Python 3.12+ fetch result are not
@@ -149,6 +239,11 @@ class SQLiteAppl(abc.ABC):
       option ``cached_statements`` to ``0`` by default.
     """
 
+    SQLITE_POOL_SIZE: int = 8
+    """Max number of idle connections kept in the :py:obj:`ConnectionPool` of
+    the DB (``0`` disables the pool, each thread closes its connection when
+    the thread ends)."""
+
     def __init__(self, db_url):
 
         self.db_url = db_url
@@ -238,10 +333,10 @@ class SQLiteAppl(abc.ABC):
 
     @property
     def DB(self) -> sqlite3.Connection:
-        """Provides a DB connection.  The connection is a *singleton* and
-        therefore well suited for read access.  If
-        :py:obj:`SQLITE_THREADING_MODE` is ``serialized`` only one DB connection
-        is created for all threads.
+        """Provides a DB connection.  The connection is a *singleton* in the
+        thread and therefore well suited for read access.  The connection is
+        taken from the :py:obj:`ConnectionPool` of the DB and returned to the
+        pool when the thread ends.
 
         .. note::
 
@@ -50,6 +50,7 @@ def get_WEATHER_DATA_CACHE():
                 name="WEATHER_DATA_CACHE",
                 MAX_VALUE_LEN=1024 * 200,  # max. 200kB per icon (icons have most often 10-20kB)
                 MAXHOLD_TIME=60 * 60 * 24 * 7 * 4,  # 4 weeks
+                MEMORY_MAX_ITEMS=500,  # geo-locations & icons of the hot locations
             )
         )
     return WEATHER_DATA_CACHE
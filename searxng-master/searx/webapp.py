@@ -120,6 +120,7 @@ from searx.sxng_locales import sxng_locales
 import searx.search
 from searx.network import stream as http_stream, set_context_network_name
 from searx.search.checker import get_result as checker_get_result
+from searx.search.executor import get_executor
 
 
 logger = logger.getChild('webapp')
@@ -1212,7 +1213,7 @@ def stats_open_metrics():
 
     engine_stats = get_engines_stats(filtered_engines)
     engine_reliabilities = get_reliabilities(filtered_engines, checker_results)
-    metrics_text = openmetrics(engine_stats, engine_reliabilities)
+    metrics_text = openmetrics(engine_stats, engine_reliabilities, get_executor().get_stats())
 
     return Response(metrics_text, mimetype='text/plain')
 
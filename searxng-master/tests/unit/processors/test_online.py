@@ -1,6 +1,14 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # pylint: disable=missing-module-docstring,disable=missing-class-docstring,invalid-name
 
+import types
+from timeit import default_timer
+from unittest.mock import AsyncMock
+
+import httpx
+from mock import patch
+
+from searx.results import ResultContainer
 from searx.search import SearchQuery, EngineRef
 from searx.search.processors import online
 from searx import engines
@@ -36,3 +44,56 @@ class TestOnlineProcessor(SearxTestCase):
         search_query = SearchQuery('test', [EngineRef(TEST_ENGINE_NAME, 'general')], 'all', 0, 1, None, None, None)
         params = self._get_params(online_processor, search_query, 'general')
         self.assertIn('User-Agent', params['headers'])
+
+
+class TestOnlineProcessorAsync(SearxTestCase):
+
+    def _get_processor(self, request, response):
+        engine = types.SimpleNamespace(timeout=3.0, request=request, response=response)
+        return online.OnlineProcessor(engine, TEST_ENGINE_NAME)
+
+    def _get_params(self):
+        params = online.default_request_params()
+        params['url'] = 'https://example.org/search'
+        return params
+
+    def test_is_async(self):
+        def request(query, params):  # pylint: disable=unused-argument
+            params['url'] = ''
+
+        async def arequest(query, params):  # pylint: disable=unused-argument
+            params['url'] = ''
+
+        self.assertFalse(self._get_processor(request, lambda resp: []).is_async)
+        self.assertTrue(self._get_processor(arequest, lambda resp: []).is_async)
+
+    async def test_asearch(self):
+        async def request(query, params):  # pylint: disable=unused-argument
+            params['url'] = 'https://example.org/search?q=' + query
+
+        async def response(resp):
+            return [{'url': str(resp.url), 'title': 'async'}]
+
+        http_response = httpx.Response(200, request=httpx.Request('GET', 'https://example.org/search?q=test'))
+        processor = self._get_processor(request, response)
+        result_container = ResultContainer()
+        with patch('searx.network.arequest', AsyncMock(return_value=http_response)) as arequest:
+            await processor.asearch('test', self._get_params(), result_container, default_timer(), 3.0)
+
+        self.assertEqual(arequest.call_args.args, ('GET', 'https://example.org/search?q=test'))
+        self.assertEqual(arequest.call_args.kwargs['timeout'], 3.0)
+        self.assertEqual(result_container.unresponsive_engines, set())
+        self.assertEqual(len(result_container.get_ordered_results()), 1)
+
+    async def test_asearch_exception(self):
+        async def request(query, params):  # pylint: disable=unused-argument
+            params['url'] = 'https://example.org/search'
+
+        processor = self._get_processor(request, lambda resp: [])
+        result_container = ResultContainer()
+        with patch('searx.network.arequest', AsyncMock(side_effect=httpx.ConnectTimeout('timeout'))):
+            await processor.asearch('test', self._get_params(), result_container, default_timer(), 3.0)
+
+        self.assertEqual(len(result_container.unresponsive_engines), 1)
+        self.assertTrue(processor.suspended_status.is_suspended)
+        processor.suspended_status.resume()
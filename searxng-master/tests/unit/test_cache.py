@@ -0,0 +1,151 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# pylint: disable=missing-module-docstring,disable=missing-class-docstring,invalid-name
+
+import os
+import tempfile
+import threading
+
+from searx import sqlitedb
+from searx.cache import ExpireCache, ExpireCacheCfg, ExpireCacheSQLite, ExpireCacheTiered
+from tests import SearxTestCase
+
+
+def run_in_thread(func):
+    result = []
+    th = threading.Thread(target=lambda: result.append(func()))
+    th.start()
+    th.join()
+    return result[0]
+
+
+class ExpireCacheSQLiteTestCase(SearxTestCase):
+
+    def setUp(self):
+        super().setUp()
+        fd, self.db_url = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.addCleanup(self._remove_db)
+
+    def _remove_db(self):
+        pool = sqlitedb.ConnectionPool.POOLS.pop(self.db_url, None)
+        if pool is not None:
+            pool.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_url + suffix):
+                os.remove(self.db_url + suffix)
+
+    def build_cache(self, **kwargs) -> ExpireCacheSQLite:
+        cache = ExpireCacheSQLite(ExpireCacheCfg(name='TEST_CACHE', db_url=self.db_url, **kwargs))
+        self.addCleanup(cache.flush)
+        return cache
+
+    def test_connection_reused_by_threads(self):
+        if sqlitedb.SQLiteAppl.SQLITE_THREADING_MODE == 'single-thread':
+            self.skipTest('SQLite library is compiled in single-thread mode')
+        cache = self.build_cache(WRITE_BATCH_SIZE=1)
+        cache.set('foo', 'bar', expire=None)
+
+        conn_ids = [run_in_thread(lambda: id(cache.DB)) for _ in range(3)]
+        self.assertEqual(len(set(conn_ids)), 1)
+        self.assertEqual(len(sqlitedb.ConnectionPool.POOLS[self.db_url]), 1)
+        self.assertEqual(run_in_thread(lambda: cache.get('foo')), 'bar')
+
+    def test_unbuffered_set(self):
+        cache = self.build_cache(WRITE_BATCH_SIZE=1)
+        self.assertTrue(cache.set('foo', {'a': 1}, expire=None))
+        self.assertEqual(cache.get('foo'), {'a': 1})
+        self.assertEqual(cache.get('bar', default='x'), 'x')
+        self.assertEqual(dict(cache.pairs(ctx=None)), {'foo': {'a': 1}})  # type: ignore
+
+    def test_buffered_set(self):
+        cache = self.build_cache(WRITE_BATCH_SIZE=3, WRITE_BATCH_DELAY=60)
+        other = ExpireCacheSQLite(ExpireCacheCfg(name='TEST_CACHE', db_url=self.db_url, WRITE_BATCH_SIZE=1))
+
+        cache.set('a', 1, expire=None)
+        cache.set('b', 2, expire=None)
+        # values in the write buffer are returned by the cache that holds the buffer ..
+        self.assertEqual(cache.get('a'), 1)
+        # .. but they are not yet in the DB
+        self.assertIsNone(other.get('a'))
+
+        # the third value fills the buffer and all values are written in one go
+        cache.set('c', 3, expire=None)
+        self.assertEqual(cache._pending, {})  # pylint: disable=protected-access
+        self.assertEqual([other.get(k) for k in 'abc'], [1, 2, 3])
+
+    def test_buffer_flushed_by_timer(self):
+        cache = self.build_cache(WRITE_BATCH_SIZE=100, WRITE_BATCH_DELAY=0.01)
+        cache.set('foo', 'bar', expire=None)
+        timer = cache._flush_timer  # pylint: disable=protected-access
+        self.assertIsNotNone(timer)
+        timer.join(5)  # type: ignore
+        self.assertEqual(cache._pending, {})  # pylint: disable=protected-access
+        self.assertEqual(cache.state().cached_items['TEST_CACHE'][0][:2], ('foo', 'bar'))
+
+    def test_maintenance_time_is_cached(self):
+        cache = self.build_cache(WRITE_BATCH_SIZE=1)
+        cache.set('foo', 'bar', expire=None)
+        next_maintenance = cache._next_maintenance  # pylint: disable=protected-access
+        self.assertGreater(next_maintenance, 0)
+        self.assertFalse(cache.maintenance())
+        self.assertTrue(cache.maintenance(force=True))
+        self.assertEqual(cache.get('foo'), 'bar')
+
+
+class ExpireCacheTieredTestCase(ExpireCacheSQLiteTestCase):
+
+    def build_cache(self, **kwargs) -> ExpireCacheTiered:  # type: ignore
+        kwargs.setdefault('MEMORY_MAX_ITEMS', 2)
+        cache = ExpireCache.build_cache(ExpireCacheCfg(name='TEST_CACHE', db_url=self.db_url, **kwargs))
+        self.assertIsInstance(cache, ExpireCacheTiered)
+        self.addCleanup(cache.flush)  # type: ignore
+        return cache  # type: ignore
+
+    def test_build_cache(self):
+        cache = ExpireCache.build_cache(ExpireCacheCfg(name='TEST_CACHE', db_url=self.db_url))
+        self.assertNotIsInstance(cache, ExpireCacheTiered)
+
+    def test_hits_and_misses(self):
+        cache = self.build_cache(WRITE_BATCH_SIZE=1)
+        other = ExpireCacheSQLite(ExpireCacheCfg(name='TEST_CACHE', db_url=self.db_url, WRITE_BATCH_SIZE=1))
+        other.set('foo', [1, 2], expire=None)
+
+        self.assertEqual(cache.get('foo'), [1, 2])  # miss, read from DB
+        self.assertEqual(cache.get('foo'), [1, 2])  # hit
+        self.assertEqual(cache.get('bar', default='x'), 'x')  # miss
+
+        # write-through
+        cache.set('bar', 'baz', expire=None)
+        self.assertEqual(other.get('bar'), 'baz')
+        self.assertEqual(cache.get('bar'), 'baz')  # hit
+
+        state = cache.state()
+        self.assertEqual(state.ctx_stats['TEST_CACHE'], {'hits': 2, 'misses': 2, 'items': 2})
+        self.assertIn('memory: 2 items, 2 hits, 2 misses', state.report())
+
+    def test_lru_limits(self):
+        cache = self.build_cache(WRITE_BATCH_SIZE=1, MEMORY_MAX_ITEMS=2)
+        for key in 'abc':
+            cache.set(key, key, expire=None)
+        self.assertEqual(cache.state().ctx_stats['TEST_CACHE']['items'], 2)
+        # 'a' has been dropped from the LRU, but is still in the DB
+        self.assertEqual(cache.get('a'), 'a')
+        self.assertEqual(cache.state().ctx_stats['TEST_CACHE']['misses'], 1)
+
+        cache = self.build_cache(WRITE_BATCH_SIZE=1, MEMORY_MAX_BYTES=1)
+        cache.set('a', 'a', expire=None)
+        self.assertEqual(cache.state().ctx_stats, {})
+
+    def test_expire(self):
+        cache = self.build_cache(WRITE_BATCH_SIZE=1, MEMORY_MAXHOLD_TIME=0)
+        cache.set('a', 'a', expire=None)
+        # the hold time in the LRU has been reached, the value is read from the DB
+        self.assertEqual(cache.get('a'), 'a')
+        self.assertEqual(cache.state().ctx_stats['TEST_CACHE'], {'hits': 0, 'misses': 1, 'items': 0})
+
+    def test_values_are_copied(self):
+        cache = self.build_cache(WRITE_BATCH_SIZE=1)
+        value = {'a': 1}
+        cache.set('foo', value, expire=None)
+        value['a'] = 2
+        self.assertEqual(cache.get('foo'), {'a': 1})
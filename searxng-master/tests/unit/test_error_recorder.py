@@ -0,0 +1,79 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# pylint: disable=missing-module-docstring,disable=missing-class-docstring,invalid-name
+
+from unittest import mock
+
+from searx import settings
+from searx.metrics import error_recorder
+from searx.metrics.error_recorder import count_error, count_exception, errors_per_engines
+from tests import SearxTestCase
+
+
+def raise_value_error():
+    raise ValueError('bad value')
+
+
+class ErrorRecorderTestCase(SearxTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(settings['general'], {'enable_metrics': True})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        errors_per_engines.pop('dummy engine', None)
+        self.addCleanup(errors_per_engines.pop, 'dummy engine', None)
+
+    def test_count_exception(self):
+        for _ in range(2):
+            try:
+                raise_value_error()
+            except ValueError as e:
+                count_exception('dummy engine', e)
+
+        errors = errors_per_engines['dummy engine']
+        self.assertEqual(len(errors), 1)
+        error_context, count = list(errors.items())[0]
+        self.assertEqual(count, 2)
+        self.assertEqual(error_context.filename, 'tests/unit/test_error_recorder.py')
+        # neither the engines nor the processors are in the trace: innermost location
+        self.assertEqual(error_context.function, 'raise_value_error')
+        self.assertEqual(error_context.code, "raise ValueError('bad value')")
+        self.assertEqual(error_context.exception_classname, 'ValueError')
+
+    def test_count_error(self):
+        def report():
+            count_error('dummy engine', 'some error', ('a', 'b'), secondary=True)
+
+        report()
+        report()
+        ((error_context, count),) = errors_per_engines['dummy engine'].items()
+        self.assertEqual(count, 2)
+        self.assertEqual(error_context.function, 'report')
+        self.assertEqual(error_context.code, "count_error('dummy engine', 'some error', ('a', 'b'), secondary=True)")
+        self.assertEqual(error_context.log_parameters, ('a', 'b'))
+        self.assertTrue(error_context.secondary)
+
+    def test_error_context_is_memoized(self):
+        contexts = []
+        for _ in range(2):
+            try:
+                raise_value_error()
+            except ValueError as e:
+                count_exception('dummy engine', e)
+            contexts.extend(errors_per_engines.pop('dummy engine'))
+        self.assertIs(contexts[0], contexts[1])
+        self.assertIn(contexts[0], error_recorder._error_contexts.values())  # pylint: disable=protected-access
+
+    def test_engine_location(self):
+        # the innermost location in an engine is recorded
+        code = compile("def request():\n    raise_value_error()\n", '/src/searx/engines/foo.py', 'exec')
+        ns = {'raise_value_error': raise_value_error}
+        exec(code, ns)  # pylint: disable=exec-used
+        try:
+            ns['request']()
+        except ValueError as e:
+            count_exception('dummy engine', e)
+        ((error_context, _),) = errors_per_engines['dummy engine'].items()
+        self.assertEqual(error_context.filename, '/src/searx/engines/foo.py')
+        self.assertEqual(error_context.function, 'request')
+        self.assertEqual(error_context.line_no, 2)
@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# pylint: disable=missing-module-docstring,disable=missing-class-docstring,invalid-name
+
+import functools
+import os
+import tempfile
+
+from searx.metrics.models import Histogram, HistogramStorage
+from searx.metrics.shared import SharedCounterStorage, SharedHistogram, SharedMemoryArea, default_directory
+from tests import SearxTestCase
+
+
+class SharedMetricsTestCase(SearxTestCase):
+
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp_dir.cleanup)
+        self.directory = tmp_dir.name
+
+    def build_storages(self, max_workers=4):
+        area = SharedMemoryArea(self.directory, max_workers)
+        counters = SharedCounterStorage(area)
+        histograms = HistogramStorage(histogram_class=functools.partial(SharedHistogram, area=area))
+        counters.configure('engine', 'foo', 'count')
+        counters.configure('engine', 'foo', 'score')
+        histograms.configure(1, 10, 'engine', 'foo', 'time')
+        area.open()
+        return area, counters, histograms
+
+    def test_single_process(self):
+        _, counters, histograms = self.build_storages()
+        counters.add(1, 'engine', 'foo', 'count')
+        counters.add(1, 'engine', 'foo', 'count')
+        counters.add(0.5, 'engine', 'foo', 'score')
+        self.assertEqual(counters.get('engine', 'foo', 'count'), 2)
+        self.assertEqual(counters.get('engine', 'foo', 'score'), 0.5)
+
+        expected = Histogram(1, 10)
+        for value in (0.5, 2.5, 2.7, 100):
+            histograms.get('engine', 'foo', 'time').observe(value)
+            expected.observe(value)
+        histogram = histograms.get('engine', 'foo', 'time')
+        self.assertEqual(histogram.quartiles, expected.quartiles)
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, expected.sum)
+        self.assertEqual(histogram.percentage(50), expected.percentage(50))
+        self.assertEqual(histogram.quartile_percentage_map, expected.quartile_percentage_map)
+
+    def test_layout_is_fixed(self):
+        area, counters, _ = self.build_storages()
+        self.assertTrue(area.path.startswith(self.directory))  # type: ignore
+        with self.assertRaises(RuntimeError):
+            counters.configure('engine', 'bar', 'count')
+
+    def test_processes_are_aggregated(self):
+        area, counters, histograms = self.build_storages()
+        counters.add(1, 'engine', 'foo', 'count')
+
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            # worker process: own slot
+            try:
+                counters.add(2, 'engine', 'foo', 'count')
+                histograms.get('engine', 'foo', 'time').observe(3)
+            finally:
+                os._exit(0)  # pylint: disable=protected-access
+        os.waitpid(pid, 0)
+
+        self.assertEqual(counters.get('engine', 'foo', 'count'), 3)
+        self.assertEqual(histograms.get('engine', 'foo', 'time').count, 1)
+        pids = area._pids  # pylint: disable=protected-access
+        self.assertEqual(sorted(p for p in pids if p), sorted([os.getpid(), pid]))
+
+        # the file is shared by all storages with the same layout, the values
+        # are kept as long as a process of the instance is alive
+        other_area, other_counters, _ = self.build_storages()
+        self.assertEqual(other_area.path, area.path)
+        self.assertEqual(other_counters.get('engine', 'foo', 'count'), 3)
+        other_counters.add(1, 'engine', 'foo', 'count')
+        self.assertEqual(counters.get('engine', 'foo', 'count'), 4)
+
+    def test_reset_when_instance_restarted(self):
+        area, counters, _ = self.build_storages()
+        counters.add(1, 'engine', 'foo', 'count')
+        # simulate a terminated instance: the process of the slot is not alive
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            os._exit(0)  # pylint: disable=protected-access
+        os.waitpid(pid, 0)
+        area._pids[0] = pid  # pylint: disable=protected-access
+        _, new_counters, _ = self.build_storages()
+        self.assertEqual(new_counters.get('engine', 'foo', 'count'), 0)
+
+    def test_instances_are_distinct(self):
+        area, _, _ = self.build_storages()
+        other_area = SharedMemoryArea(self.directory, 4, instance='other')
+        other_area.allocate(('engine', 'foo', 'count'), 1)
+        other_area.open()
+        self.assertNotEqual(other_area.path, area.path)
+
+    def test_planted_file_is_refused(self):
+        victim = os.path.join(self.directory, 'victim')
+        with open(victim, 'w', encoding='utf-8') as f:
+            f.write('keep')
+        area, _, _ = self.build_storages()
+        path = area.path
+        # the name of the file is predictable: plant a symlink, then a hard link
+        for link in (os.symlink, os.link):
+            os.unlink(path)  # type: ignore
+            link(victim, path)  # type: ignore
+            with self.assertRaises(OSError):
+                self.build_storages()
+        with open(victim, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'keep')
+
+    def test_default_directory_is_private(self):
+        old_tempdir = tempfile.tempdir
+        tempfile.tempdir = self.directory
+        self.addCleanup(setattr, tempfile, 'tempdir', old_tempdir)
+
+        path = default_directory()
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o700)
+        os.chmod(path, 0o777)
+        with self.assertRaises(PermissionError):
+            default_directory()
+        os.rmdir(path)
+        os.symlink(self.directory, path)
+        with self.assertRaises(PermissionError):
+            default_directory()
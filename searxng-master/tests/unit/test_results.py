@@ -1,9 +1,11 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # pylint: disable=missing-module-docstring,disable=missing-class-docstring,invalid-name
 
+import random
+from timeit import default_timer
 
 from searx.result_types import LegacyResult
-from searx.results import ResultContainer
+from searx.results import ResultContainer, group_results
 from tests import SearxTestCase
 
 
@@ -58,3 +60,78 @@ class ResultContainerTestCase(SearxTestCase):
         self.assertIn(result, result_list)
         self.assertEqual(result_list[0].title, result.title)
         self.assertEqual(result_list[0].content, result.content)
+
+
+def _group_results_quadratic(results, max_count=8, max_distance=20):
+    """Former implementation of the grouping in
+    ResultContainer.get_ordered_results, reference for the tests."""
+    gresults = []
+    categoryPositions = {}
+
+    for res in results:
+        category = f"{res.category}:{res.template}:{'img_src' if (res.thumbnail or res.img_src) else ''}"
+        grp = categoryPositions.get(category)
+        if (grp is not None) and (grp["count"] > 0) and (len(gresults) - grp["index"] < max_distance):
+            index = grp["index"]
+            gresults.insert(index, res)
+            for item in categoryPositions.values():
+                v = item["index"]
+                if v >= index:
+                    item["index"] = v + 1
+            grp["count"] -= 1
+        else:
+            gresults.append(res)
+            categoryPositions[category] = {"index": len(gresults), "count": max_count}
+    return gresults
+
+
+class GroupResultsTestCase(SearxTestCase):
+    """Compares :py:obj:`searx.results.group_results` with the former
+    (quadratic) implementation on synthetic result lists and reports the
+    timings of both."""
+
+    CATEGORIES = ["general", "images", "videos", "news", "it"]
+    TEMPLATES = ["default.html", "images.html", "videos.html"]
+
+    def _synthetic_results(self, size, seed):
+        rnd = random.Random(seed)
+        results = []
+        for i in range(size):
+            res = LegacyResult(
+                url=f"https://example.org/{i}",
+                title=f"title {i}",
+                content="",
+                category=rnd.choice(self.CATEGORIES),
+                template=rnd.choice(self.TEMPLATES),
+                thumbnail=rnd.choice(["", "", f"https://example.org/{i}.png"]),
+            )
+            res.normalize_result_fields()
+            results.append(res)
+        return results
+
+    def test_same_order(self):
+        for size in (0, 1, 100, 1000, 10000):
+            for seed in range(3):
+                results = self._synthetic_results(size, seed)
+
+                start = default_timer()
+                expected = _group_results_quadratic(list(results))
+                quadratic_time = default_timer() - start
+
+                start = default_timer()
+                actual = group_results(list(results))
+                linear_time = default_timer() - start
+
+                with self.subTest(size=size, seed=seed, quadratic=quadratic_time, linear=linear_time):
+                    self.assertEqual([id(r) for r in actual], [id(r) for r in expected])
+
+    def test_few_categories(self):
+        # long runs of the same category: the groups are closed by max_count
+        # and max_distance
+        for seed in range(5):
+            rnd = random.Random(seed)
+            results = self._synthetic_results(500, seed)
+            for res in results:
+                res.category = rnd.choice(["general", "images"])
+            expected = _group_results_quadratic(list(results))
+            self.assertEqual([id(r) for r in group_results(list(results))], [id(r) for r in expected])
@@ -4,7 +4,8 @@
 from copy import copy
 
 import searx.search
-from searx.search import SearchQuery, EngineRef
+from searx.metrics import counter
+from searx.search import SearchQuery, EngineRef, result_cache
 from searx import settings
 from tests import SearxTestCase
 
@@ -118,3 +119,75 @@ class SearchTestCase(SearxTestCase):
             results = search.search()
         # This should not redirect
         self.assertIsNone(results.redirect_url)
+
+
+class SearchResultCacheTestCase(SearxTestCase):
+
+    def setUp(self):
+        super().setUp()
+        result_cache.initialize({'enabled': True, 'backend': 'memory', 'expire': 60})
+        self.addCleanup(result_cache.initialize, None)
+
+    def _search(self, query='test'):
+        search_query = SearchQuery(query, [EngineRef(PUBLIC_ENGINE_NAME, 'general')], 'en-US', SAFESEARCH, PAGENO)
+        search = searx.search.Search(search_query)
+        with self.app.test_request_context('/search'):
+            result_container = search.search()
+        return search, result_container
+
+    def test_hit_and_miss(self):
+        hit = counter('search', 'cache', 'hit')
+        miss = counter('search', 'cache', 'miss')
+
+        search, result_container = self._search()
+        self.assertIsNotNone(search.actual_timeout)
+        results = [r.url for r in result_container.get_ordered_results()]
+
+        # second query is served from the cache without sending requests
+        search, result_container = self._search()
+        self.assertIsNone(search.actual_timeout)
+        self.assertEqual([r.url for r in result_container.get_ordered_results()], results)
+
+        self._search('other query')
+        self.assertEqual(counter('search', 'cache', 'hit'), hit + 1)
+        self.assertEqual(counter('search', 'cache', 'miss'), miss + 2)
+
+    def test_cached_results_are_copies(self):
+        _, result_container = self._search()
+        result_container.get_ordered_results()[0].title = 'modified'
+        _, result_container = self._search()
+        self.assertNotEqual(result_container.get_ordered_results()[0].title, 'modified')
+
+    def test_key(self):
+        sq1 = SearchQuery('test', [EngineRef('bing', 'general'), EngineRef('google', 'general')], 'en', 0, 1)
+        sq2 = SearchQuery('test', [EngineRef('google', 'general'), EngineRef('bing', 'general')], 'en', 0, 1)
+        sq3 = SearchQuery('test', [EngineRef('google', 'general'), EngineRef('bing', 'general')], 'en', 0, 2)
+        get_key = result_cache.ResultCache.get_key
+        self.assertEqual(get_key(sq1), get_key(sq2))
+        self.assertNotEqual(get_key(sq1), get_key(sq3))
+        self.assertNotEqual(get_key(sq1), get_key(sq1, ['tracker_url_remover']))
+
+
+class ResultCacheMemoryTestCase(SearxTestCase):
+
+    def test_lru(self):
+        cache = result_cache.ResultCacheMemory(result_cache.ResultCacheCfg(max_items=2))
+        cache.set('a', {'value': 1})
+        cache.set('b', {'value': 2})
+        self.assertEqual(cache.get('a'), {'value': 1})
+        cache.set('c', {'value': 3})
+        # 'b' is the least recently used item
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'value': 1})
+        self.assertEqual(len(cache), 2)
+
+    def test_max_bytes(self):
+        cache = result_cache.ResultCacheMemory(result_cache.ResultCacheCfg(max_bytes=100))
+        self.assertFalse(cache.set('a', {'value': 'x' * 200}))
+        self.assertIsNone(cache.get('a'))
+
+    def test_expire(self):
+        cache = result_cache.ResultCacheMemory(result_cache.ResultCacheCfg(expire=-1))
+        cache.set('a', {'value': 1})
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
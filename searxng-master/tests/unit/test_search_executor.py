@@ -0,0 +1,74 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# pylint: disable=missing-module-docstring,disable=missing-class-docstring,invalid-name
+
+import threading
+from timeit import default_timer
+
+from searx.metrics import counter
+from searx.search.executor import EngineExecutor, job_timed_out
+from tests import SearxTestCase
+
+
+class EngineExecutorTestCase(SearxTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.executor = EngineExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_submit(self):
+        results = []
+        job = self.executor.submit('dummy engine', results.append, ('a',), default_timer() + 5)
+        self.assertTrue(job.wait(5))
+        self.assertEqual(results, ['a'])
+
+    def test_workers_are_reused(self):
+        thread_names = []
+
+        def record():
+            thread_names.append(threading.current_thread().name)
+
+        for _ in range(3):
+            self.assertTrue(self.executor.submit('dummy engine', record, (), default_timer() + 5).wait(5))
+        self.assertEqual(len(set(thread_names)), 1)
+        self.assertEqual(self.executor.get_stats()['workers'], 1)
+
+    def test_saturated_and_expired(self):
+        saturated = counter('search', 'executor', 'count', 'saturated')
+        expired = counter('search', 'executor', 'count', 'expired')
+        release = threading.Event()
+        results = []
+
+        blocking_job = self.executor.submit('dummy engine', release.wait, (5,), default_timer() + 5)
+        # the only worker is busy, the job waits in the queue until its deadline is over
+        late_job = self.executor.submit('dummy engine', results.append, ('late',), default_timer() + 0.01)
+        self.assertEqual(counter('search', 'executor', 'count', 'saturated'), saturated + 1)
+        self.assertFalse(late_job.wait(0.1))
+
+        release.set()
+        self.assertTrue(blocking_job.wait(5))
+        next_job = self.executor.submit('dummy engine', results.append, ('next',), default_timer() + 5)
+        self.assertTrue(next_job.wait(5))
+
+        self.assertEqual(results, ['next'])
+        self.assertFalse(late_job.done.is_set())
+        self.assertEqual(counter('search', 'executor', 'count', 'expired'), expired + 1)
+
+    def test_job_timed_out(self):
+        started = threading.Event()
+        release = threading.Event()
+        timed_out = []
+
+        def engine_search():
+            started.set()
+            release.wait(5)
+            timed_out.append(job_timed_out())
+
+        job = self.executor.submit('dummy engine', engine_search, (), default_timer() + 5)
+        self.assertTrue(started.wait(5))
+        job.timeout = True
+        release.set()
+        self.assertTrue(job.wait(5))
+        self.assertEqual(timed_out, [True])
+        # outside of a worker thread
+        self.assertFalse(job_timed_out())
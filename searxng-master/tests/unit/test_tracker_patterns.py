@@ -0,0 +1,50 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# pylint: disable=missing-module-docstring,disable=missing-class-docstring,invalid-name
+
+from searx.data.tracker_patterns import TrackerPatternsDB, CompiledRules
+from tests import SearxTestCase
+
+RULES = [
+    (
+        r"^https?:\/\/(?:[a-z0-9-]+\.)*?amazon(?:\.[a-z]{2,}){1,}",
+        [r"^https?:\/\/(?:[a-z0-9-]+\.)*?amazon\.com\/gp\/"],
+        ["pd_rd_[a-z]*", "qid", "ref_?"],
+    ),
+    (r"^https?:\/\/(?:[a-z0-9-]+\.)*?goo?gle(?:\.[a-z]{2,}){1,}", [], ["ved", "ei"]),
+    (r".*", [], ["(?:%3F)?utm(?:_[a-z_]*)?", "fbclid"]),
+    (r"^https?:\/\/(?:[a-z0-9-]+\.)*?bing\.com|^https?:\/\/duckduckgo\.com", [], ["form"]),
+]
+
+
+class TrackerPatternsTestCase(SearxTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db = TrackerPatternsDB()
+        self.db._compiled_rules = CompiledRules(RULES)  # pylint: disable=protected-access
+
+    def test_index(self):
+        rules = self.db.compiled_rules
+        self.assertEqual(sorted(rules.by_host_label), ["amazon", "go"])
+        self.assertEqual([r.index for r in rules.global_rules], [2, 3])
+        self.assertEqual([r.index for r in rules.candidates("https://www.amazon.de/dp/1")], [0, 2, 3])
+        self.assertEqual([r.index for r in rules.candidates("https://example.org/")], [2, 3])
+
+    def test_clean_url(self):
+        self.assertEqual(
+            self.db.clean_url("https://www.amazon.de/dp/1?qid=1&ref_=x&keep=1&utm_source=y"),
+            "https://www.amazon.de/dp/1?keep=1",
+        )
+        # exception of the amazon rule, the global rule is still applied
+        self.assertEqual(
+            self.db.clean_url("https://www.amazon.com/gp/1?qid=1&utm_source=y"), "https://www.amazon.com/gp/1?qid=1"
+        )
+        self.assertEqual(
+            self.db.clean_url("https://www.gogle.com/search?q=a&ved=1"), "https://www.gogle.com/search?q=a"
+        )
+        self.assertEqual(self.db.clean_url("https://duckduckgo.com/?q=a&form=1"), "https://duckduckgo.com/?q=a")
+        self.assertTrue(self.db.clean_url("https://example.org/?q=a"))
+
+    def test_reload(self):
+        self.db.reload()
+        self.assertIsNone(self.db._compiled_rules)  # pylint: disable=protected-access